@@ -14,12 +14,34 @@ class Settings(BaseSettings):
     NETBOX_URL: str = ""
     NETBOX_TOKEN: str = ""
     NETBOX_TENANT_GROUP_FILTER: str = "K3G Solutions"
+    NETBOX_TIMEOUT: float = 30.0
+    NETBOX_PAGE_SIZE: int = 500
+    NETBOX_FETCH_CONCURRENCY: int = 8
+    NETBOX_METADATA_TTL: int = 900  # cache de tenant groups, content types e custom fields
+    NETBOX_BULK_CHUNK_SIZE: int = 100  # objetos por chamada nos POST/PATCH em lote
+    NETBOX_GRAPHQL_ENABLED: bool = os.getenv("NETBOX_GRAPHQL_ENABLED", "false").lower() == "true"
+    NETBOX_GRAPHQL_PAGE_SIZE: int = 1000
+    NETBOX_SNAPSHOT_SYNC_ENABLED: bool = os.getenv("NETBOX_SNAPSHOT_SYNC_ENABLED", "true").lower() == "true"
+    NETBOX_SNAPSHOT_SYNC_INTERVAL: int = 300  # sincronizacao incremental (last_updated__gte)
+    NETBOX_SNAPSHOT_RECONCILE_INTERVAL: int = 3600  # conferencia de ids para detectar exclusoes
     
     # Jumpserver
     JUMPSERVER_URL: Optional[str] = None
     JUMPSERVER_TOKEN: Optional[str] = None
     JUMPSERVER_USERNAME: Optional[str] = None
     JUMPSERVER_PASSWORD: Optional[str] = None
+    JUMPSERVER_PAGE_SIZE: int = 200
+    JUMPSERVER_FETCH_CONCURRENCY: int = 8
+    JUMPSERVER_CREATE_CONCURRENCY: int = 4
+    JUMPSERVER_TOKEN_REFRESH_MARGIN: int = 120  # renova o JWT este tanto de segundos antes de expirar
+    JUMPSERVER_TOKEN_REFRESH_INTERVAL: int = 1800  # usado quando a expiracao do token e desconhecida
+    JUMPSERVER_TOKEN_READY_TIMEOUT: float = 5.0
+    JUMPSERVER_MAX_RETRIES: int = 3
+    JUMPSERVER_RETRY_BACKOFF: float = 0.5
+    JUMPSERVER_RETRY_MAX_DELAY: float = 30.0
+    JUMPSERVER_CONCURRENCY_INITIAL: int = 8
+    JUMPSERVER_CONCURRENCY_MIN: int = 1
+    JUMPSERVER_CONCURRENCY_MAX: int = 32
 
 
     
@@ -31,12 +53,41 @@ class Settings(BaseSettings):
     MOVIDESK_TOKEN: Optional[str] = None
     MOVIDESK_SYNC_INTERVAL: int = 300  # 5 minutes
     MOVIDESK_SYNC_ENABLED: bool = True
+    SYNC_EXECUTOR_CONCURRENCY: int = 8  # limite global ao executar acoes aprovadas
+    SYNC_EXECUTOR_NETBOX_CONCURRENCY: int = 4
+    SYNC_EXECUTOR_JUMPSERVER_CONCURRENCY: int = 1  # lotes de nodes em serie: ancestrais comuns criados uma vez
+    SYNC_ACTION_CLAIM_TIMEOUT: int = 900  # acao em 'executing' ha mais tempo que isso pode ser retomada
+    # Eleicao de lider (advisory lock no Postgres): so o lider roda as varreduras periodicas.
+    # O lock fica numa conexao propria, fora do pool: cada replica usa ate uma conexao a mais.
+    LEADER_ELECTION_ENABLED: bool = os.getenv("LEADER_ELECTION_ENABLED", "true").lower() == "true"
+    LEADER_RENEW_INTERVAL: float = 10.0
+    LEADER_RETRY_INTERVAL: float = 5.0  # tempo maximo ate um seguidor assumir apos a queda do lider
     MOVIDESK_WEBHOOK_AUTO_CREATE: bool = os.getenv("MOVIDESK_WEBHOOK_AUTO_CREATE", "false").lower() == "true"
     
     # Cache settings
     CACHE_TTL: int = 300  # 5 minutes
+    JUMPSERVER_CACHE_HARD_TTL: int = 3600  # serve stale (revalidando em background) ate este limite
     HUB_SNAPSHOT_TTL: int = 600  # 10 minutes
     HUB_SNAPSHOT_ALLOW_STALE: bool = os.getenv("HUB_SNAPSHOT_ALLOW_STALE", "true").lower() == "true"
+
+    SYNC_REPORT_INCREMENTAL: bool = os.getenv("SYNC_REPORT_INCREMENTAL", "true").lower() == "true"
+    SYNC_FUZZY_MATCH_ENABLED: bool = os.getenv("SYNC_FUZZY_MATCH_ENABLED", "true").lower() == "true"
+    SYNC_FUZZY_MATCH_THRESHOLD: float = 0.9  # aceita o tenant como match por nome a partir deste score
+    SYNC_FUZZY_MATCH_MIN_SCORE: float = 0.6  # candidatos abaixo disso nem sao listados na acao
+    SYNC_FUZZY_MATCH_CANDIDATES: int = 3
+    # Timeouts por fonte na coleta do relatorio Movidesk x NetBox x JumpServer
+    SYNC_REPORT_MOVIDESK_TIMEOUT: float = 60.0
+    SYNC_REPORT_NETBOX_TIMEOUT: float = 60.0
+    SYNC_REPORT_JUMPSERVER_TIMEOUT: float = 60.0
+
+    # HTTP client pool (um cliente por upstream, reaproveitado entre requests)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2_ENABLED: bool = True
+    JUMPSERVER_TIMEOUT: float = 10.0
+    MOVIDESK_TIMEOUT: float = 15.0
+    OXIDIZED_TIMEOUT: float = 10.0
     
     model_config = SettingsConfigDict(
         env_file=(".env", ".env.local"),
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import Optional
 
@@ -8,6 +9,8 @@ from backend.core.config import settings
 logger = logging.getLogger(__name__)
 
 _pool: Optional[asyncpg.Pool] = None
+# Serializa a criacao do pool: bootstrap, loops e requisicoes chamam get_pool() ao mesmo tempo
+_init_lock = asyncio.Lock()
 
 
 async def init_db() -> Optional[asyncpg.Pool]:
@@ -17,8 +20,10 @@ async def init_db() -> Optional[asyncpg.Pool]:
     if not settings.DATABASE_URL:
         logger.warning("DATABASE_URL nao configurado; persistencia local desabilitada.")
         return None
-    _pool = await asyncpg.create_pool(dsn=settings.DATABASE_URL, min_size=1, max_size=5)
-    logger.info("Conexao com banco local inicializada.")
+    async with _init_lock:
+        if _pool is None:
+            _pool = await asyncpg.create_pool(dsn=settings.DATABASE_URL, min_size=1, max_size=5)
+            logger.info("Conexao com banco local inicializada.")
     return _pool
 
 
@@ -29,6 +34,13 @@ async def get_pool() -> Optional[asyncpg.Pool]:
     return _pool
 
 
+async def open_connection() -> Optional[asyncpg.Connection]:
+    """Conexao avulsa, fora do pool, para sessoes longas (ex.: o lease do lider)."""
+    if not settings.DATABASE_URL:
+        return None
+    return await asyncpg.connect(dsn=settings.DATABASE_URL)
+
+
 async def close_db() -> None:
     global _pool
     if _pool is None:
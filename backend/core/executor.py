@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BoundedExecutor:
+    """
+    Run jobs concurrently under a global limit plus optional per-system limits
+    (e.g. "netbox", "jumpserver"), so one slow upstream cannot take every slot.
+
+    Jobs must not submit nested jobs to the same executor: a job holding a global
+    slot while waiting for another one could deadlock once the pool is full.
+    """
+
+    def __init__(self, name: str, limit: int, system_limits: Optional[Dict[str, int]] = None):
+        self.name = name
+        self.limit = max(1, limit)
+        self.system_limits = {k: max(1, v) for k, v in (system_limits or {}).items()}
+        self._global = asyncio.Semaphore(self.limit)
+        self._systems = {k: asyncio.Semaphore(v) for k, v in self.system_limits.items()}
+
+    def _semaphores(self, system: Optional[str]) -> List[asyncio.Semaphore]:
+        if system in self._systems:
+            # System slot first: waiting on a busy upstream must not hold a global slot
+            return [self._systems[system], self._global]
+        return [self._global]
+
+    @asynccontextmanager
+    async def slot(self, system: Optional[str] = None) -> AsyncIterator[None]:
+        async with AsyncExitStack() as stack:
+            for semaphore in self._semaphores(system):
+                await stack.enter_async_context(semaphore)
+            yield
+
+    async def run(self, system: Optional[str], fn: Callable[[], Awaitable[T]]) -> T:
+        async with self.slot(system):
+            return await fn()
+
+    async def map(
+        self,
+        items: Iterable[Any],
+        fn: Callable[[Any], Awaitable[T]],
+        system: Optional[str] = None,
+    ) -> List[Any]:
+        """
+        Run fn(item) for every item and return results in input order; a failed job
+        yields its exception instead of aborting the others. Cancelling the caller
+        cancels every job still queued or running.
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        async def job(item: Any) -> T:
+            async with self.slot(system):
+                return await fn(item)
+
+        return await asyncio.gather(*(job(item) for item in items), return_exceptions=True)
@@ -0,0 +1,75 @@
+import logging
+from typing import Dict
+
+import httpx
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+# Upstreams conhecidos: nome -> (atributo de timeout em settings, follow_redirects)
+UPSTREAMS: Dict[str, tuple] = {
+    "jumpserver": ("JUMPSERVER_TIMEOUT", True),
+    "netbox": ("NETBOX_TIMEOUT", True),
+    "movidesk": ("MOVIDESK_TIMEOUT", False),
+    "oxidized": ("OXIDIZED_TIMEOUT", False),
+}
+
+
+def _http2_available() -> bool:
+    if not settings.HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    timeout_attr, follow_redirects = UPSTREAMS.get(name, (None, False))
+    timeout = getattr(settings, timeout_attr, None) if timeout_attr else None
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=httpx.Timeout(timeout or 10.0),
+        http2=_http2_available(),
+        follow_redirects=follow_redirects,
+    )
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """Retorna o cliente compartilhado do upstream, criando-o sob demanda."""
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _build_client(name)
+        _clients[name] = client
+    return client
+
+
+async def init_http_clients() -> None:
+    for name in UPSTREAMS:
+        get_http_client(name)
+    logger.info(
+        "Clientes HTTP inicializados (%s, http2=%s).",
+        ", ".join(sorted(_clients)),
+        _http2_available(),
+    )
+
+
+async def close_http_clients() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception:
+            logger.exception("Falha ao encerrar cliente HTTP.")
+    if clients:
+        logger.info("Clientes HTTP encerrados.")
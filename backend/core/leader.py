@@ -0,0 +1,179 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Awaitable, Dict, Optional
+
+from backend.core.db import open_connection
+
+logger = logging.getLogger(__name__)
+
+
+def advisory_lock_key(name: str) -> int:
+    """Stable signed 64-bit key for pg_advisory_lock derived from a lease name."""
+    digest = hashlib.sha1(name.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+class LeaderLease:
+    """
+    Cluster-wide leadership held as a Postgres session-level advisory lock.
+
+    The lock lives on a dedicated connection opened outside the asyncpg pool (see
+    open_connection), so holding it never takes one of the pool's few connections
+    away from requests and sync loops; each replica therefore uses at most one
+    connection beyond its pool. The leader renews the lease by pinging that session
+    every `renew_interval`. Postgres drops the lock together with the session, so
+    when the leader dies or loses its connection a follower (retrying every
+    `retry_interval`) takes over within seconds. Without a database, or with
+    `enabled=False`, the process always leads (single-node behaviour).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        renew_interval: float = 10.0,
+        retry_interval: float = 5.0,
+        renew_timeout: float = 5.0,
+        enabled: bool = True,
+    ):
+        self.name = name
+        self.key = advisory_lock_key(name)
+        self.renew_interval = renew_interval
+        self.retry_interval = retry_interval
+        self.renew_timeout = renew_timeout
+        self.enabled = enabled
+        self.is_leader = False
+        self.standalone = False
+        self.leader_since: Optional[float] = None
+        self.transitions = 0
+        self._conn = None
+        self._changed = asyncio.Event()
+
+    def _set_leader(self, leader: bool) -> None:
+        if leader == self.is_leader:
+            return
+        self.is_leader = leader
+        self.leader_since = time.time() if leader else None
+        self.transitions += 1
+        logger.info(f"[{self.name}] {'lideranca assumida' if leader else 'lideranca perdida'}")
+        # Wake everyone waiting on a transition, then arm a fresh event for the next one
+        event = self._changed
+        self._changed = asyncio.Event()
+        event.set()
+
+    async def wait_for_change(self, timeout: float) -> bool:
+        """Sleep up to `timeout` seconds, returning early (True) on a leadership change."""
+        event = self._changed
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def run_as_leader(self, coro: Awaitable[Any]) -> Optional[Any]:
+        """
+        Run `coro` only while this process leads: it is cancelled as soon as leadership
+        is lost, so a scan or batch in progress stops instead of overlapping the one the
+        new leader starts. Returns its result, or None if it did not run to completion.
+        """
+        if not self.is_leader:
+            if asyncio.iscoroutine(coro):
+                coro.close()
+            return None
+        changed = self._changed
+        task = asyncio.ensure_future(coro)
+        lost = asyncio.ensure_future(changed.wait())
+        try:
+            await asyncio.wait({task, lost}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            lost.cancel()
+        if task.done():
+            return task.result()
+        logger.warning(f"[{self.name}] lideranca perdida; interrompendo tarefa em andamento")
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"[{self.name}] tarefa interrompida com erro: {e}")
+        return None
+
+    async def _try_acquire(self) -> bool:
+        conn = await open_connection() if self.enabled else None
+        if conn is None:
+            self.standalone = True
+            return True
+        self.standalone = False
+        try:
+            acquired = await conn.fetchval("SELECT pg_try_advisory_lock($1)", self.key)
+        except BaseException:
+            conn.terminate()
+            raise
+        if not acquired:
+            await conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    async def _renew(self) -> bool:
+        try:
+            await asyncio.wait_for(self._conn.fetchval("SELECT 1"), self.renew_timeout)
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"[{self.name}] falha ao renovar lease: {e}")
+            return False
+
+    async def _drop(self, unlock: bool) -> None:
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        if not unlock:
+            # A session we cannot talk to is cut off so the server frees the lock
+            conn.terminate()
+            return
+        try:
+            await asyncio.wait_for(conn.fetchval("SELECT pg_advisory_unlock($1)", self.key), self.renew_timeout)
+            await asyncio.wait_for(conn.close(), self.renew_timeout)
+        except Exception:
+            logger.debug(f"[{self.name}] conexao do lease descartada")
+            conn.terminate()
+
+    async def run(self) -> None:
+        """Campaign/renew loop; run it as a background task for the process lifetime."""
+        while True:
+            try:
+                if not self.is_leader:
+                    if await self._try_acquire():
+                        self._set_leader(True)
+                elif self._conn is not None and not await self._renew():
+                    await self._drop(unlock=False)
+                    self._set_leader(False)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[{self.name}] falha na eleicao de lider: {e}")
+                if self.is_leader and self._conn is not None:
+                    await self._drop(unlock=False)
+                    self._set_leader(False)
+            await asyncio.sleep(self.renew_interval if self.is_leader else self.retry_interval)
+
+    async def release(self) -> None:
+        """Give up leadership right away (shutdown) so a follower takes over without waiting."""
+        await self._drop(unlock=True)
+        self._set_leader(False)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "leader": self.is_leader,
+            "standalone": self.standalone,
+            "leader_since": self.leader_since,
+            "transitions": self.transitions,
+        }
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limiter for an upstream API.
+
+    The limit grows by one slot per "window" of healthy responses (additive
+    increase) and is cut by `backoff_ratio` when the upstream throttles/fails
+    or when latency climbs above `latency_tolerance` x the observed baseline
+    (multiplicative decrease).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        latency_tolerance: float = 2.0,
+        backoff_ratio: float = 0.7,
+    ):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial_limit)))
+        self.latency_tolerance = latency_tolerance
+        self.backoff_ratio = backoff_ratio
+        self.in_flight = 0
+        self._baseline_latency: Optional[float] = None
+        self._smoothed_latency: Optional[float] = None
+        self._last_decrease_at = 0.0
+        self._decreases = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            while self.in_flight >= int(self.limit):
+                await self._cond.wait()
+            self.in_flight += 1
+
+    async def release(self, latency: Optional[float], overloaded: bool = False) -> None:
+        async with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._update_limit(latency, overloaded)
+            self._cond.notify_all()
+
+    def _update_limit(self, latency: Optional[float], overloaded: bool) -> None:
+        if latency is not None and not overloaded:
+            if self._baseline_latency is None or latency < self._baseline_latency:
+                self._baseline_latency = latency
+            if self._smoothed_latency is None:
+                self._smoothed_latency = latency
+            else:
+                self._smoothed_latency = 0.8 * self._smoothed_latency + 0.2 * latency
+            # Let the baseline drift slowly so one lucky request does not pin it forever
+            self._baseline_latency = 0.99 * self._baseline_latency + 0.01 * self._smoothed_latency
+
+        slow = (
+            self._baseline_latency is not None
+            and self._smoothed_latency is not None
+            and self._smoothed_latency > self._baseline_latency * self.latency_tolerance
+        )
+        now = time.monotonic()
+        if overloaded or slow:
+            # At most one decrease per smoothed round-trip to avoid collapsing on a burst
+            window = self._smoothed_latency or 0.5
+            if now - self._last_decrease_at >= window:
+                previous = self.limit
+                self.limit = max(float(self.min_limit), self.limit * self.backoff_ratio)
+                self._last_decrease_at = now
+                self._decreases += 1
+                logger.debug(
+                    f"[{self.name}] concurrency {previous:.1f} -> {self.limit:.1f} "
+                    f"({'throttled' if overloaded else 'latency'})"
+                )
+            return
+        self.limit = min(float(self.max_limit), self.limit + 1.0 / max(self.limit, 1.0))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "baseline_latency": self._baseline_latency,
+            "smoothed_latency": self._smoothed_latency,
+            "decreases": self._decreases,
+        }
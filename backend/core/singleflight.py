@@ -0,0 +1,48 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one in-flight operation.
+
+    The first caller starts the work; callers arriving while it runs await the
+    same task and receive the same result (or the same exception). A caller being
+    cancelled does not cancel the shared work for the others.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+
+            def _forget(done: asyncio.Task, key: Hashable = key) -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+                # Consume the exception so an unawaited failure is not reported as lost
+                if not done.cancelled():
+                    done.exception()
+
+            task.add_done_callback(_forget)
+        else:
+            logger.debug(f"[{self.name}] joining in-flight call for {key!r}")
+        return await asyncio.shield(task)
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancel the in-flight call for `key` (for every caller awaiting it)."""
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    def inflight(self) -> int:
+        return len(self._inflight)
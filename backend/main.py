@@ -6,36 +6,91 @@ from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any, Optional
 from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from cachetools import TTLCache
 from pydantic import BaseModel
 
 from backend.core.config import settings
 from backend.core.db import init_db, close_db, get_pool
+from backend.core.http import init_http_clients, close_http_clients
+from backend.core.leader import LeaderLease
 from backend.services.netbox_service import netbox_svc
 from backend.services.jumpserver_service import jumpserver_svc
 from backend.services.movidesk_service import movidesk_svc
 from backend.services.oxidized_service import oxidized_svc
 from backend.services.sync_service import sync_svc
-from backend.services.snapshot_store import upsert_movidesk_companies, upsert_jumpserver_assets
+from backend.services.netbox_snapshot_sync import netbox_snapshot_sync
+from backend.services.snapshot_store import (
+    upsert_movidesk_companies,
+    upsert_jumpserver_assets,
+    load_jumpserver_snapshot_nodes,
+    replace_jumpserver_nodes,
+    upsert_jumpserver_nodes,
+    delete_jumpserver_nodes,
+    load_hub_state,
+    save_hub_state,
+)
 
 
 logger = logging.getLogger(__name__)
 sync_task: Optional[asyncio.Task] = None
+netbox_snapshot_task: Optional[asyncio.Task] = None
+bootstrap_task: Optional[asyncio.Task] = None
+leader_task: Optional[asyncio.Task] = None
+
+# Varreduras periodicas rodam apenas na replica lider; as demais leem os resultados do banco
+scheduler_lease = LeaderLease(
+    "netbox-ops-hub:scheduler",
+    renew_interval=settings.LEADER_RENEW_INTERVAL,
+    retry_interval=settings.LEADER_RETRY_INTERVAL,
+    enabled=settings.LEADER_ELECTION_ENABLED,
+)
 
 
 async def movidesk_sync_loop():
     interval = settings.MOVIDESK_SYNC_INTERVAL or 600
     while True:
         try:
+            if not scheduler_lease.is_leader:
+                # Seguidor: acorda assim que assumir a lideranca
+                await scheduler_lease.wait_for_change(interval)
+                continue
             if settings.MOVIDESK_SYNC_ENABLED:
                 app_row = await load_movidesk_application()
                 if app_row and app_row.get("autoSyncEnabled"):
-                    await run_movidesk_sync_task(app_row)
+                    # Interrompida se a lideranca cair no meio (outra replica assume a varredura)
+                    await scheduler_lease.run_as_leader(run_movidesk_sync_task(app_row))
         except asyncio.CancelledError:
             break
         except Exception:
             logger.exception("Falha ao executar varredura Movidesk periodica.")
-        await asyncio.sleep(interval)
+        await scheduler_lease.wait_for_change(interval)
+
+
+async def netbox_snapshot_loop():
+    interval = settings.NETBOX_SNAPSHOT_SYNC_INTERVAL or 300
+    while True:
+        try:
+            if not scheduler_lease.is_leader:
+                await scheduler_lease.wait_for_change(interval)
+                continue
+            await scheduler_lease.run_as_leader(run_netbox_snapshot_pass())
+        except asyncio.CancelledError:
+            break
+        except Exception:
+            logger.exception("Falha ao executar sincronizacao periodica do snapshot NetBox.")
+        await scheduler_lease.wait_for_change(interval)
+
+
+async def run_netbox_snapshot_pass():
+    try:
+        await netbox_snapshot_sync.run()
+    except asyncio.CancelledError:
+        # A passada e compartilhada (singleflight): cancela-la de fato, nao so esta espera
+        netbox_snapshot_sync.cancel()
+        raise
+
+
 logging.basicConfig(
     level=logging.DEBUG,
     format='%(levelname)s:%(name)s:%(message)s'
@@ -110,7 +165,10 @@ async def run_movidesk_sync_task(app_row: Dict[str, Any]):
 
         # Se autoSyncEnabled estiver true, executa as ações automaticamente
         auto_sync_enabled = bool(app_row.get("autoSyncEnabled"))
-        if auto_sync_enabled and report:
+        if auto_sync_enabled and report and not sync_svc.get_last_report_summary().get("stored"):
+            # Relatorio parcial (JumpServer indisponivel): nada foi liberado para execucao
+            note = "Relatório parcial (JumpServer indisponível); execução automática adiada"
+        elif auto_sync_enabled and report:
             # Filtra apenas ações pendentes (pending_create, pending_update)
             pending_actions = [
                 action["id"] for action in report
@@ -140,6 +198,9 @@ async def run_movidesk_sync_task(app_row: Dict[str, Any]):
                 note = "Sincronizado"
 
         success = True
+    except asyncio.CancelledError:
+        note = "Varredura interrompida (liderança perdida ou desligamento)"
+        raise
     except Exception as exc:
         note = str(exc)
         logger.exception("Falha ao executar varredura Movidesk periódica.")
@@ -202,10 +263,9 @@ async def load_netbox_snapshot_devices(limit: int, group_filter: str, ttl_second
         if not _is_snapshot_fresh(state["lastSuccessAt"], ttl_seconds) and not settings.HUB_SNAPSHOT_ALLOW_STALE:
             return None
 
-        last_seen = await conn.fetchval('SELECT MAX("lastSeenAt") FROM "NetboxDeviceSnapshot"')
-        if not last_seen:
-            return None
-        if not _is_snapshot_fresh(last_seen, ttl_seconds) and not settings.HUB_SNAPSHOT_ALLOW_STALE:
+        # Incremental syncs only touch changed rows; freshness comes from lastSuccessAt above
+        has_devices = await conn.fetchval('SELECT EXISTS (SELECT 1 FROM "NetboxDeviceSnapshot")')
+        if not has_devices:
             return None
 
         query = """
@@ -241,35 +301,131 @@ async def load_netbox_snapshot_devices(limit: int, group_filter: str, ttl_second
         })
     return devices
 
-@app.on_event("startup")
-async def startup_event():
-    logger.info("Starting Netbox Ops Center HUB...")
+async def warm_jumpserver_nodes() -> None:
+    """Hidrata o cache de nodes do JumpServer a partir do snapshot local."""
+    snapshot_ttl = settings.HUB_SNAPSHOT_TTL or settings.CACHE_TTL
+    snapshot = await load_jumpserver_snapshot_nodes(snapshot_ttl, allow_stale=settings.HUB_SNAPSHOT_ALLOW_STALE)
+    if not snapshot:
+        return
+    nodes, last_seen = snapshot
+    jumpserver_svc.hydrate_nodes(nodes, last_seen.timestamp())
+
+
+CUSTOM_FIELDS_STATE_KEY = "custom_fields"
+
+# Estado do bootstrap em background (exposto em /health/ready)
+startup_state: Dict[str, Any] = {
+    "database": "pending",
+    "jumpserver_nodes": "pending",
+    "netbox_custom_fields": "pending",
+}
+database_ready = asyncio.Event()
+
+
+async def init_database() -> None:
     try:
-        await netbox_svc.ensure_custom_fields()
+        pool = await init_db()
+        startup_state["database"] = "ok" if pool else "disabled"
     except Exception:
-        logger.exception("Falha ao inicializar integração com NetBox. HUB continuará carregando.")
+        startup_state["database"] = "error"
+        logger.exception("Falha ao inicializar banco local. Persistencia ficara desabilitada.")
+    finally:
+        database_ready.set()
     try:
-        await init_db()
+        await warm_jumpserver_nodes()
+        startup_state["jumpserver_nodes"] = "ok"
     except Exception:
-        logger.exception("Falha ao inicializar banco local. Persistencia ficara desabilitada.")
-    global sync_task
+        startup_state["jumpserver_nodes"] = "error"
+        logger.exception("Falha ao carregar snapshot de nodes do JumpServer.")
+
+
+async def bootstrap_netbox_custom_fields() -> None:
+    """
+    Garante os custom fields de Tenant no NetBox, pulando a verificacao quando o
+    fingerprint do schema (URL/versao do NetBox + campos exigidos) ja foi aplicado.
+    """
+    if not netbox_svc.enabled:
+        startup_state["netbox_custom_fields"] = "disabled"
+        return
+    try:
+        fingerprint = await netbox_svc.schema_fingerprint()
+        await database_ready.wait()
+        state = await load_hub_state(CUSTOM_FIELDS_STATE_KEY)
+        if state and state.get("fingerprint") == fingerprint:
+            startup_state["netbox_custom_fields"] = "cached"
+            logger.info("Custom fields do NetBox ja verificados para este schema; bootstrap ignorado.")
+            return
+        if not await netbox_svc.ensure_custom_fields():
+            startup_state["netbox_custom_fields"] = "incomplete"
+            return
+        await save_hub_state(CUSTOM_FIELDS_STATE_KEY, {"fingerprint": fingerprint})
+        startup_state["netbox_custom_fields"] = "ok"
+    except Exception:
+        startup_state["netbox_custom_fields"] = "error"
+        logger.exception("Falha ao inicializar integração com NetBox. HUB continuará carregando.")
+
+
+async def bootstrap() -> None:
+    await asyncio.gather(init_database(), bootstrap_netbox_custom_fields())
+
+
+def is_ready() -> bool:
+    return database_ready.is_set() and startup_state["jumpserver_nodes"] != "pending"
+
+
+@app.on_event("startup")
+async def startup_event():
+    logger.info("Starting Netbox Ops Center HUB...")
+    await init_http_clients()
+    jumpserver_svc.start_token_refresher()
+    jumpserver_svc.set_nodes_persister(
+        replace_jumpserver_nodes,
+        upsert=upsert_jumpserver_nodes,
+        delete=delete_jumpserver_nodes,
+    )
+    jumpserver_svc.set_assets_persister(upsert_jumpserver_assets)
+    global sync_task, netbox_snapshot_task, bootstrap_task, leader_task
+    # Banco e NetBox inicializam em background: o HUB aceita conexoes imediatamente
+    if bootstrap_task is None:
+        bootstrap_task = asyncio.create_task(bootstrap())
+    if leader_task is None:
+        leader_task = asyncio.create_task(scheduler_lease.run())
     if sync_task is None:
         sync_task = asyncio.create_task(movidesk_sync_loop())
+    if netbox_snapshot_task is None and settings.NETBOX_SNAPSHOT_SYNC_ENABLED and netbox_svc.enabled:
+        netbox_snapshot_task = asyncio.create_task(netbox_snapshot_loop())
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    global sync_task, netbox_snapshot_task, bootstrap_task, leader_task
+    for task in (bootstrap_task, sync_task, netbox_snapshot_task, leader_task):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    bootstrap_task = None
+    sync_task = None
+    netbox_snapshot_task = None
+    leader_task = None
+    try:
+        # Libera o lock ja no desligamento para outra replica assumir sem esperar
+        await scheduler_lease.release()
+    except Exception:
+        logger.exception("Falha ao liberar lideranca do agendador.")
     try:
         await close_db()
     except Exception:
         logger.exception("Falha ao encerrar banco local.")
-    global sync_task
-    if sync_task:
-        sync_task.cancel()
-        try:
-            await sync_task
-        except asyncio.CancelledError:
-            pass
-        sync_task = None
+    try:
+        await jumpserver_svc.stop_token_refresher()
+    except Exception:
+        logger.exception("Falha ao encerrar renovacao de token JumpServer.")
+    try:
+        await close_http_clients()
+    except Exception:
+        logger.exception("Falha ao encerrar clientes HTTP.")
 
 
 # Models
@@ -295,6 +451,21 @@ class DeviceRegistration(BaseModel):
 async def root():
     return {"status": "online", "app": settings.APP_NAME}
 
+@app.get("/health/live")
+async def health_live():
+    """Liveness: o processo esta de pe e respondendo."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: banco local inicializado e cache de nodes hidratado (NetBox nao bloqueia)."""
+    body = {
+        "status": "ready" if is_ready() else "starting",
+        "components": dict(startup_state),
+        "scheduler": scheduler_lease.snapshot(),
+    }
+    return JSONResponse(status_code=200 if is_ready() else 503, content=body)
+
 # Sincronia Comercial: Webhook Movidesk
 @app.post("/webhooks/movidesk")
 async def movidesk_webhook(payload: MovideskWebhook, background_tasks: BackgroundTasks):
@@ -320,7 +491,7 @@ async def movidesk_webhook(payload: MovideskWebhook, background_tasks: Backgroun
             slug=tenant_data["slug"],
             description=tenant_data["description"]
         )
-        return {"status": "success", "tenant_id": tenant.id if tenant else None}
+        return {"status": "success", "tenant_id": tenant.get("id") if tenant else None}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -331,16 +502,22 @@ async def audit_jumpserver(limit: int = 0):
     group_filter = (settings.NETBOX_TENANT_GROUP_FILTER or "").strip()
     nb_devices = await load_netbox_snapshot_devices(limit, group_filter, snapshot_ttl)
     using_nb_snapshot = nb_devices is not None
-    if not using_nb_snapshot:
+    # Flat rows (snapshot/GraphQL) already carry the tenant group: no per-tenant lookups needed
+    devices_have_groups = using_nb_snapshot
+    if not using_nb_snapshot and settings.NETBOX_GRAPHQL_ENABLED:
+        try:
+            nb_devices = await netbox_svc.get_devices_graphql()
+            devices_have_groups = True
+        except Exception as e:
+            logger.warning(f"Falha ao buscar devices via GraphQL; usando REST: {e}")
+            nb_devices = None
+    if nb_devices is None:
         nb_devices = await netbox_svc.get_devices()
 
     js_assets = await load_jumpserver_snapshot_assets(snapshot_ttl)
     if js_assets is None:
+        # Cada pagina recebida ja e persistida no snapshot local (persister registrado no startup)
         js_assets = await jumpserver_svc.get_assets()
-        try:
-            await upsert_jumpserver_assets(js_assets)
-        except Exception as e:
-            logger.warning(f"Falha ao persistir JumpServer localmente: {e}")
 
     group_filter_norm = group_filter.lower()
     tenant_group_cache: Dict[int, Optional[str]] = {}
@@ -364,19 +541,22 @@ async def audit_jumpserver(limit: int = 0):
 
     def extract_device_tenant(device):
         if isinstance(device, dict):
-            return device.get("tenantName") or device.get("tenant") or "N/A"
+            return device.get("tenantName") or extract_name(device.get("tenant")) or "N/A"
         tenant_obj = getattr(device, "tenant", None)
         return tenant_obj.name if tenant_obj else "N/A"
 
     def extract_device_site(device):
         if isinstance(device, dict):
-            return device.get("siteName") or "N/A"
+            return device.get("siteName") or extract_name(device.get("site")) or "N/A"
         site_obj = getattr(device, "site", None)
         return site_obj.name if site_obj else "N/A"
 
     def extract_device_ip(device):
         if isinstance(device, dict):
             ip_val = device.get("ipAddress") or device.get("ip")
+            if not ip_val:
+                primary_ip = device.get("primary_ip") or {}
+                ip_val = primary_ip.get("address") if isinstance(primary_ip, dict) else None
             if isinstance(ip_val, str):
                 return ip_val.split("/")[0]
             return None
@@ -385,18 +565,25 @@ async def audit_jumpserver(limit: int = 0):
             return str(primary_ip.address).split("/")[0]
         return None
 
+    def extract_group(tenant):
+        if not tenant:
+            return None
+        if isinstance(tenant, dict):
+            return tenant.get("group") or tenant.get("tenant_group")
+        return getattr(tenant, "group", None) or getattr(tenant, "tenant_group", None)
+
     async def resolve_tenant_group_name(tenant) -> Optional[str]:
         if not tenant:
             return None
         tenant_id = getattr(tenant, "id", None) or (tenant.get("id") if isinstance(tenant, dict) else None)
         if tenant_id and tenant_id in tenant_group_cache:
             return tenant_group_cache[tenant_id]
-        group_obj = getattr(tenant, "group", None) or getattr(tenant, "tenant_group", None)
+        group_obj = extract_group(tenant)
         group_name = extract_name(group_obj)
         if not group_name and tenant_id:
             try:
                 tenant_full = await netbox_svc.get_tenant_by_id(tenant_id)
-                group_obj = getattr(tenant_full, "group", None) or getattr(tenant_full, "tenant_group", None)
+                group_obj = extract_group(tenant_full)
                 group_name = extract_name(group_obj)
             except Exception:
                 group_name = None
@@ -410,10 +597,15 @@ async def audit_jumpserver(limit: int = 0):
     # Filter out CAIXA-PRETA variations
     nb_devices = [d for d in nb_devices if "CAIXA-PRETA" not in (extract_device_name(d) or "").upper()]
     
-    if group_filter and not using_nb_snapshot:
+    if group_filter and devices_have_groups and not using_nb_snapshot:
+        nb_devices = [
+            d for d in nb_devices
+            if (d.get("tenantGroup") or "").lower() == group_filter_norm
+        ]
+    elif group_filter and not using_nb_snapshot:
         filtered_devices = []
         for device in nb_devices:
-            tenant = getattr(device, "tenant", None)
+            tenant = device.get("tenant") if isinstance(device, dict) else getattr(device, "tenant", None)
             group_name = await resolve_tenant_group_name(tenant)
             if group_name and group_name.lower() == group_filter_norm:
                 filtered_devices.append(device)
@@ -504,8 +696,8 @@ async def debug_config():
     nb_status = "error"
     custom_fields = []
     try:
-        cf_list = await netbox_svc._run_async(netbox_svc.nb.extras.custom_fields.all)
-        custom_fields = [f.name for f in cf_list]
+        cf_list = await netbox_svc.get_custom_fields()
+        custom_fields = [f.get("name") for f in cf_list]
         nb_status = "connected"
     except Exception as e:
         nb_status = f"error: {str(e)}"
@@ -524,15 +716,35 @@ async def debug_config():
         }
     }
 
+@app.post("/debug/netbox/metadata/invalidate")
+async def invalidate_netbox_metadata(kind: Optional[str] = None):
+    """Limpa o cache de metadados do NetBox (tenant_group, content_type, custom_fields ou tudo)."""
+    return {"invalidated": netbox_svc.invalidate_metadata(kind)}
+
+
+@app.post("/sync/netbox/snapshot")
+async def run_netbox_snapshot_sync(full: bool = False):
+    """Sincroniza o snapshot local do NetBox (incremental, ou completo com full=true)."""
+    try:
+        return await netbox_snapshot_sync.run(full=full)
+    except Exception as exc:
+        raise HTTPException(status_code=502, detail=f"Falha ao sincronizar snapshot do NetBox: {exc}")
+
+
+@app.get("/sync/netbox/snapshot")
+async def get_netbox_snapshot_status():
+    return {"last_result": netbox_snapshot_sync.last_result}
+
+
 @app.get("/sync/movidesk/report")
-async def get_movidesk_sync_report():
-    """Gera relatório de pendências entre Movidesk e Sistemas Internos."""
+async def get_movidesk_sync_report(full: bool = False):
+    """Gera relatório de pendências entre Movidesk e Sistemas Internos (full=true reavalia todas as empresas)."""
     app_row = await load_movidesk_application()
     report = []
     success = False
     note = None
     try:
-        report = await sync_svc.generate_sync_report()
+        report = await sync_svc.generate_sync_report(full=full)
         success = True
     except Exception as exc:
         note = str(exc)
@@ -542,15 +754,27 @@ async def get_movidesk_sync_report():
             await update_movidesk_application_status(app_row["id"], success, note)
     return {
         "count": len(report),
-        "actions": report
+        "actions": report,
+        "delta": sync_svc.get_last_report_summary().get("last_delta"),
+        "cache": {"jumpserver": jumpserver_svc.get_cache_info()},
     }
 
 @app.get("/sync/movidesk/status")
 async def get_movidesk_sync_status():
     """Resumo do ultimo scan Movidesk/NetBox/JumpServer."""
     summary = sync_svc.get_last_report_summary()
-    if not summary.get("last_run"):
-        await sync_svc.generate_sync_report(store_pending=False)
+    if not scheduler_lease.is_leader:
+        # Seguidor: o ultimo relatorio gravado pela replica lider; nunca varre por conta propria
+        stored = await sync_svc.load_stored_report_summary()
+        if stored and (stored.get("last_run") or "") >= (summary.get("last_run") or ""):
+            summary = stored
+        elif not summary.get("last_run"):
+            summary = {**summary, "leader_pending": True}
+    elif not summary.get("last_run"):
+        try:
+            await sync_svc.generate_sync_report(store_pending=False)
+        except Exception:
+            logger.exception("Falha ao gerar resumo do relatório Movidesk.")
         summary = sync_svc.get_last_report_summary()
     app_row = await load_movidesk_application()
     response = {
@@ -620,18 +844,24 @@ async def get_movidesk_sync_logs(limit: int = 50):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/debug/jumpserver/nodes")
-async def debug_jumpserver_nodes():
-    """Lista todos os nodes do JumpServer para debug."""
+async def debug_jumpserver_nodes(prefix: Optional[str] = None):
+    """Lista todos os nodes do JumpServer para debug (opcionalmente filtrando por prefixo de path)."""
     try:
         nodes = await jumpserver_svc.get_nodes()
+        index = await jumpserver_svc.get_node_index()
+        if prefix:
+            nodes = index.descendants(prefix)
         return {
             "total": len(nodes),
+            "indexed": len(index),
+            "cache": jumpserver_svc.get_cache_info()["nodes"],
             "nodes": [
                 {
                     "id": n.get("id"),
                     "value": n.get("value"),
                     "full_value": n.get("full_value"),
-                    "key": n.get("key")
+                    "key": n.get("key"),
+                    "children": len(index.children_of(n.get("id"))) if n.get("id") else 0,
                 }
                 for n in nodes
             ]
@@ -639,6 +869,16 @@ async def debug_jumpserver_nodes():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/debug/jumpserver/token")
+async def debug_jumpserver_token():
+    """Metricas da renovacao de token JWT do JumpServer."""
+    return jumpserver_svc.get_token_metrics()
+
+@app.get("/debug/jumpserver/limiter")
+async def debug_jumpserver_limiter():
+    """Estado do limitador adaptativo de concorrencia do JumpServer."""
+    return jumpserver_svc.get_limiter_metrics()
+
 @app.post("/debug/jumpserver/test-path")
 async def debug_test_node_path(path: str):
     """Testa a criação de um path específico no JumpServer."""
@@ -647,12 +887,8 @@ async def debug_test_node_path(path: str):
         result_id = await jumpserver_svc.ensure_node_path(path)
 
         # Verify it was created
-        nodes = await jumpserver_svc.get_nodes()
-        created_node = None
-        for n in nodes:
-            if n.get("id") == result_id:
-                created_node = n
-                break
+        index = await jumpserver_svc.get_node_index()
+        created_node = index.get_by_id(result_id)
 
         return {
             "requested_path": path,
@@ -664,6 +900,21 @@ async def debug_test_node_path(path: str):
         logger.exception(f"Error testing path: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/jumpserver/nodes/ensure")
+async def ensure_jumpserver_node_paths(paths: List[str]):
+    """Garante (cria se necessario) varios paths de node no JumpServer em lote."""
+    try:
+        results = await jumpserver_svc.ensure_node_paths(paths)
+    except Exception as e:
+        logger.exception(f"Error ensuring node paths: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    failed = [p for p, r in results.items() if not r.get("id")]
+    return {
+        "total": len(results),
+        "failed": len(failed),
+        "results": results,
+    }
+
 # Status de Backup: Agregador Oxidized
 @app.get("/backup/status/{device_name}")
 async def get_backup_status(device_name: str):
@@ -0,0 +1,169 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def normalize_path(path: str) -> str:
+    """Normalize JumpServer paths to avoid false negatives (extra slashes/spaces)."""
+    clean_parts = [p.strip() for p in (path or "").split("/") if p and p.strip()]
+    return "/" + "/".join(clean_parts)
+
+
+def path_segments(path: str) -> List[str]:
+    return [p for p in normalize_path(path).split("/") if p]
+
+
+class _TrieNode:
+    __slots__ = ("node", "children")
+
+    def __init__(self):
+        self.node: Optional[Dict[str, Any]] = None
+        self.children: Dict[str, "_TrieNode"] = {}
+
+
+class NodeIndex:
+    """
+    In-memory index over the JumpServer node list.
+    Built once per get_nodes() refresh so path lookups are dict hits instead of
+    re-normalizing and scanning every node.
+    """
+
+    def __init__(self, nodes: Optional[Iterable[Dict[str, Any]]] = None):
+        self.by_path: Dict[str, Dict[str, Any]] = {}
+        self.by_path_folded: Dict[str, Dict[str, Any]] = {}
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.children: Dict[str, List[Dict[str, Any]]] = {}
+        self._paths_by_id: Dict[str, str] = {}
+        # Parent each node was linked under, so removal does not depend on the parent's current path
+        self._parent_by_id: Dict[str, str] = {}
+        self._trie = _TrieNode()
+        node_list = list(nodes or [])
+        for node in node_list:
+            self.add(node, link=False)
+        # Link children only after every parent is indexed (API order is not guaranteed)
+        for node in node_list:
+            self._link(node)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def _parent_id(self, path: str) -> Optional[str]:
+        segments = path_segments(path)
+        if len(segments) < 2:
+            return None
+        parent = self.get("/" + "/".join(segments[:-1]))
+        return parent.get("id") if parent else None
+
+    def _link(self, node: Dict[str, Any]) -> None:
+        node_id = node.get("id")
+        parent_id = self._parent_id(normalize_path(node.get("full_value") or ""))
+        if not parent_id or parent_id == node_id:
+            return
+        self.children.setdefault(parent_id, []).append(node)
+        if node_id:
+            self._parent_by_id[node_id] = parent_id
+
+    def _unlink(self, node_id: str, node: Dict[str, Any]) -> None:
+        parent_id = self._parent_by_id.pop(node_id, None)
+        siblings = self.children.get(parent_id) if parent_id else None
+        if siblings is None:
+            return
+        remaining = [c for c in siblings if c is not node and c.get("id") != node_id]
+        if remaining:
+            self.children[parent_id] = remaining
+        else:
+            del self.children[parent_id]
+
+    def add(self, node: Dict[str, Any], link: bool = True) -> None:
+        node_id = node.get("id")
+        if node_id and node_id in self.by_id:
+            self.remove(node_id)
+        path = normalize_path(node.get("full_value") or "")
+        folded = path.casefold()
+        # First occurrence wins, as in the original linear scans
+        self.by_path.setdefault(path, node)
+        self.by_path_folded.setdefault(folded, node)
+        if node_id:
+            self.by_id[node_id] = node
+            self._paths_by_id[node_id] = path
+        if link:
+            self._link(node)
+
+        trie = self._trie
+        for segment in path_segments(path):
+            trie = trie.children.setdefault(segment.casefold(), _TrieNode())
+        if trie.node is None:
+            trie.node = node
+
+    def remove(self, node_id: str) -> Optional[Dict[str, Any]]:
+        node = self.by_id.pop(node_id, None)
+        path = self._paths_by_id.pop(node_id, None)
+        if node is None or path is None:
+            return None
+        folded = path.casefold()
+        if self.by_path.get(path) is node:
+            del self.by_path[path]
+        if self.by_path_folded.get(folded) is node:
+            del self.by_path_folded[folded]
+        self._unlink(node_id, node)
+        trie = self._trie
+        for segment in path_segments(path):
+            trie = trie.children.get(segment.casefold())
+            if trie is None:
+                break
+        else:
+            if trie.node is node:
+                trie.node = None
+        return node
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        return self.by_path.get(normalize_path(path))
+
+    def get_folded(self, path: str) -> Optional[Dict[str, Any]]:
+        return self.by_path_folded.get(normalize_path(path).casefold())
+
+    def lookup(self, path: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Return (node, exact) using an exact match first, then a case-insensitive one."""
+        node = self.get(path)
+        if node:
+            return node, True
+        return self.get_folded(path), False
+
+    def get_by_id(self, node_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not node_id:
+            return None
+        return self.by_id.get(node_id)
+
+    def children_of(self, node_id: str) -> List[Dict[str, Any]]:
+        return list(self.children.get(node_id, []))
+
+    def deepest_existing(self, path: str) -> Tuple[Optional[Dict[str, Any]], int]:
+        """
+        Walk the prefix trie (case-insensitive) and return the deepest existing
+        node along `path` plus how many segments were matched.
+        """
+        trie = self._trie
+        deepest: Optional[Dict[str, Any]] = None
+        depth = 0
+        for idx, segment in enumerate(path_segments(path), start=1):
+            trie = trie.children.get(segment.casefold())
+            if trie is None:
+                break
+            if trie.node is not None:
+                deepest = trie.node
+                depth = idx
+        return deepest, depth
+
+    def descendants(self, prefix: str) -> List[Dict[str, Any]]:
+        """List every node at or below `prefix` (case-insensitive)."""
+        trie = self._trie
+        for segment in path_segments(prefix):
+            trie = trie.children.get(segment.casefold())
+            if trie is None:
+                return []
+        found: List[Dict[str, Any]] = []
+        stack = [trie]
+        while stack:
+            current = stack.pop()
+            if current.node is not None:
+                found.append(current.node)
+            stack.extend(current.children.values())
+        return found
@@ -6,10 +6,19 @@ import logging
 import random
 import time
 from backend.core.config import settings
-from typing import List, Dict, Any, Optional
+from backend.core.http import get_http_client
+from backend.core.limiter import AdaptiveConcurrencyLimiter
+from backend.core.singleflight import SingleFlight
+from backend.services.jumpserver_index import NodeIndex, normalize_path, path_segments
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Throttling / transient upstream failures worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
 class JumpServerService:
     def __init__(self):
         self.base_url = (settings.JUMPSERVER_URL or "").rstrip("/")
@@ -17,15 +26,44 @@ class JumpServerService:
         self._token_type = "Bearer" # N8N flow uses Bearer for JWT
         self._token_expires_at: Optional[float] = None
         self._login_lock = asyncio.Lock()
+        self._token_task: Optional[asyncio.Task] = None
+        self._limiter = AdaptiveConcurrencyLimiter(
+            "jumpserver",
+            initial_limit=settings.JUMPSERVER_CONCURRENCY_INITIAL,
+            min_limit=settings.JUMPSERVER_CONCURRENCY_MIN,
+            max_limit=settings.JUMPSERVER_CONCURRENCY_MAX,
+        )
+        self._token_metrics: Dict[str, Any] = {
+            "logins": 0,
+            "login_failures": 0,
+            "last_login_at": None,
+            "last_login_seconds": None,
+            "last_probe_attempts": None,
+            "next_refresh_at": None,
+            "history": deque(maxlen=20),
+        }
         self._nodes_cache: Optional[List[Dict[str, Any]]] = None
         self._nodes_cache_at: Optional[float] = None
+        self._node_index = NodeIndex()
         self._assets_cache: Optional[List[Dict[str, Any]]] = None
         self._assets_cache_at: Optional[float] = None
+        self._flight = SingleFlight("jumpserver")
+        self._revalidating: Dict[str, asyncio.Task] = {}
+        self._nodes_persister: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
+        self._nodes_upserter: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
+        self._nodes_deleter: Optional[Callable[[List[str]], Awaitable[None]]] = None
+        # In-place node changes: generation stamp, and the journal kept while refreshes run
+        self._node_generation = 0
+        self._node_refreshes = 0
+        self._node_journal: List[Tuple[int, str, Any]] = []
+        # Snapshot writes run in the background, one at a time and in the order issued
+        self._persist_lock = asyncio.Lock()
+        self._persist_tasks: Set[asyncio.Task] = set()
+        self._assets_persister: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
 
     def _normalize_path(self, path: str) -> str:
         """Normalize JumpServer paths to avoid false negatives (extra slashes/spaces)."""
-        clean_parts = [p.strip() for p in path.split("/") if p and p.strip()]
-        return "/" + "/".join(clean_parts)
+        return normalize_path(path)
 
     def _decode_jwt_exp(self, token: str) -> Optional[float]:
         try:
@@ -70,11 +108,141 @@ class JumpServerService:
         ttl = getattr(settings, "CACHE_TTL", 300) or 300
         return (time.time() - ts) <= ttl
 
-    async def _wait_for_token_ready(self) -> None:
-        await asyncio.sleep(random.uniform(3.0, 5.0))
+    def _cache_is_usable(self, ts: Optional[float]) -> bool:
+        """Stale entries may still be served (while revalidating) until the hard TTL."""
+        if not ts:
+            return False
+        hard_ttl = settings.JUMPSERVER_CACHE_HARD_TTL or 0
+        return (time.time() - ts) <= max(hard_ttl, getattr(settings, "CACHE_TTL", 300) or 300)
+
+    def _revalidate(self, key: str, fn: Callable[[], Awaitable[Any]]) -> None:
+        """Refresh a stale cache entry in the background (at most one refresh per key)."""
+        if key in self._revalidating:
+            return
+        task = asyncio.ensure_future(self._flight.do(key, fn))
+        self._revalidating[key] = task
+
+        def _done(done: asyncio.Task) -> None:
+            self._revalidating.pop(key, None)
+            if not done.cancelled() and done.exception():
+                logger.warning(f"Background refresh of JumpServer {key} failed: {done.exception()}")
+
+        task.add_done_callback(_done)
+        logger.debug(f"Serving stale JumpServer {key}; refreshing in background")
+
+    def _cache_entry_info(self, key: str, cache: Optional[List[Dict[str, Any]]], ts: Optional[float]) -> Dict[str, Any]:
+        age = (time.time() - ts) if ts else None
+        return {
+            "cached": cache is not None,
+            "size": len(cache) if cache is not None else 0,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "stale": cache is not None and not self._cache_is_fresh(ts),
+            "refreshing": key in self._revalidating,
+        }
+
+    def get_cache_info(self) -> Dict[str, Any]:
+        return {
+            "nodes": self._cache_entry_info("nodes", self._nodes_cache, self._nodes_cache_at),
+            "assets": self._cache_entry_info("assets", self._assets_cache, self._assets_cache_at),
+        }
+
+    def _uses_login(self) -> bool:
+        return bool(self.base_url and settings.JUMPSERVER_USERNAME and settings.JUMPSERVER_PASSWORD)
+
+    async def _wait_for_token_ready(self, token: str) -> int:
+        """
+        Probe a cheap authenticated endpoint until the new token is accepted.
+        JumpServer may take a moment to propagate a fresh JWT; short backoff instead of a blind sleep.
+        Returns the number of probe attempts.
+        """
+        client = get_http_client("jumpserver")
+        endpoint = f"{self.base_url}/api/v1/users/profile/"
+        headers = {"Accept": "application/json", "Authorization": f"Bearer {token}"}
+        deadline = time.monotonic() + settings.JUMPSERVER_TOKEN_READY_TIMEOUT
+        delay = 0.1
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                response = await client.get(endpoint, headers=headers)
+                if response.status_code != 401:
+                    return attempts
+            except Exception as e:
+                logger.debug(f"Token readiness probe failed: {e}")
+                return attempts
+            if time.monotonic() + delay > deadline:
+                logger.warning(f"JumpServer token not accepted after {attempts} probes; continuing anyway")
+                return attempts
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+    def _record_token_event(self, event: str, **extra: Any) -> None:
+        self._token_metrics["history"].append({"event": event, "at": time.time(), **extra})
+
+    def get_token_metrics(self) -> Dict[str, Any]:
+        metrics = dict(self._token_metrics)
+        metrics["history"] = list(self._token_metrics["history"])
+        metrics["expires_at"] = self._token_expires_at
+        metrics["expires_in"] = (self._token_expires_at - time.time()) if self._token_expires_at else None
+        metrics["token_valid"] = self._token_is_valid()
+        metrics["refresher_running"] = bool(self._token_task and not self._token_task.done())
+        return metrics
+
+    def get_limiter_metrics(self) -> Dict[str, Any]:
+        return self._limiter.snapshot()
+
+    def _next_refresh_delay(self) -> float:
+        if not self._cached_token:
+            return 0.0
+        if not self._token_expires_at:
+            return float(settings.JUMPSERVER_TOKEN_REFRESH_INTERVAL)
+        lifetime = self._token_expires_at - time.time()
+        delay = lifetime - settings.JUMPSERVER_TOKEN_REFRESH_MARGIN
+        if delay <= 0:
+            # Short-lived token (or already inside the margin): refresh halfway through
+            delay = max(1.0, lifetime / 2)
+        return delay
+
+    async def _token_refresh_loop(self) -> None:
+        failures = 0
+        while True:
+            try:
+                delay = self._next_refresh_delay() if failures == 0 else min(60.0, 5.0 * (2 ** (failures - 1)))
+                self._token_metrics["next_refresh_at"] = time.time() + delay
+                await asyncio.sleep(delay)
+                token = await self.login(force=True)
+                failures = 0 if token else failures + 1
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                failures += 1
+                logger.exception("JumpServer token refresh failed")
+
+    def start_token_refresher(self) -> None:
+        """Start the background task that renews the JWT before it expires."""
+        if not self._uses_login():
+            return
+        if self._token_task and not self._token_task.done():
+            return
+        self._token_task = asyncio.create_task(self._token_refresh_loop())
+        logger.info("JumpServer token refresher started")
+
+    async def stop_token_refresher(self) -> None:
+        if not self._token_task:
+            return
+        self._token_task.cancel()
+        try:
+            await self._token_task
+        except asyncio.CancelledError:
+            pass
+        self._token_task = None
 
-    async def login(self, force: bool = False) -> Optional[str]:
-        """Perform login to get a fresh JWT token."""
+    async def login(self, force: bool = False, stale_token: Optional[str] = None) -> Optional[str]:
+        """
+        Perform login to get a fresh JWT token.
+        With `stale_token` (the token a request was rejected with), the forced login is
+        skipped when another caller already replaced that token while we waited.
+        """
         if not self.base_url or not settings.JUMPSERVER_USERNAME or not settings.JUMPSERVER_PASSWORD:
             logger.warning("JumpServer base_url or credentials not configured")
             return None
@@ -85,37 +253,52 @@ class JumpServerService:
         async with self._login_lock:
             if not force and self._token_is_valid():
                 return self._cached_token
+            if stale_token is not None and self._cached_token != stale_token and self._token_is_valid():
+                return self._cached_token
 
-            async with httpx.AsyncClient(follow_redirects=True) as client:
-                endpoint = f"{self.base_url}/api/v1/authentication/auth/"
-                payload = {
-                    "username": settings.JUMPSERVER_USERNAME,
-                    "password": settings.JUMPSERVER_PASSWORD
-                }
-                try:
-                    logger.info(f"Attempting login to JumpServer as {settings.JUMPSERVER_USERNAME}")
-                    response = await client.post(endpoint, json=payload, timeout=10.0)
-                    response.raise_for_status()
-                    data = response.json()
-                    token = data.get("token")
-                    if token:
-                        self._cached_token = token
-                        self._token_expires_at = self._resolve_token_expiry(data, token)
-                        await self._wait_for_token_ready()
-                        logger.info("Successfully authenticated to JumpServer")
-                        return token
-                    logger.error("JumpServer login response did not include a token")
-                    self._cached_token = None
-                    self._token_expires_at = None
-                    return None
-                except httpx.HTTPStatusError as e:
-                    logger.error(f"Failed to login to JumpServer: {e}")
-                    logger.error(f"Response status: {e.response.status_code}")
-                    logger.error(f"Response body: {e.response.text}")
-                    return None
-                except Exception as e:
-                    logger.error(f"Failed to login to JumpServer: {e}")
-                    return None
+            client = get_http_client("jumpserver")
+            endpoint = f"{self.base_url}/api/v1/authentication/auth/"
+            payload = {
+                "username": settings.JUMPSERVER_USERNAME,
+                "password": settings.JUMPSERVER_PASSWORD
+            }
+            started = time.monotonic()
+            try:
+                logger.info(f"Attempting login to JumpServer as {settings.JUMPSERVER_USERNAME}")
+                response = await client.post(endpoint, json=payload)
+                response.raise_for_status()
+                data = response.json()
+                token = data.get("token")
+                if token:
+                    attempts = await self._wait_for_token_ready(token)
+                    self._cached_token = token
+                    self._token_expires_at = self._resolve_token_expiry(data, token)
+                    elapsed = time.monotonic() - started
+                    self._token_metrics["logins"] += 1
+                    self._token_metrics["last_login_at"] = time.time()
+                    self._token_metrics["last_login_seconds"] = elapsed
+                    self._token_metrics["last_probe_attempts"] = attempts
+                    self._record_token_event("login", seconds=round(elapsed, 3), expires_at=self._token_expires_at)
+                    logger.info("Successfully authenticated to JumpServer")
+                    return token
+                logger.error("JumpServer login response did not include a token")
+                self._cached_token = None
+                self._token_expires_at = None
+                self._token_metrics["login_failures"] += 1
+                self._record_token_event("login_failed", reason="missing token")
+                return None
+            except httpx.HTTPStatusError as e:
+                logger.error(f"Failed to login to JumpServer: {e}")
+                logger.error(f"Response status: {e.response.status_code}")
+                logger.error(f"Response body: {e.response.text}")
+                self._token_metrics["login_failures"] += 1
+                self._record_token_event("login_failed", reason=f"HTTP {e.response.status_code}")
+                return None
+            except Exception as e:
+                logger.error(f"Failed to login to JumpServer: {e}")
+                self._token_metrics["login_failures"] += 1
+                self._record_token_event("login_failed", reason=str(e))
+                return None
 
     async def get_headers(self) -> Dict[str, str]:
         # Prefer login token when credentials are available to avoid stale static tokens.
@@ -146,96 +329,392 @@ class JumpServerService:
             
         return headers
 
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Jittered exponential backoff, honoring Retry-After when JumpServer sends it."""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), settings.JUMPSERVER_RETRY_MAX_DELAY)
+                except ValueError:
+                    try:
+                        when = parsedate_to_datetime(retry_after)
+                        return min(max(0.0, when.timestamp() - time.time()), settings.JUMPSERVER_RETRY_MAX_DELAY)
+                    except (TypeError, ValueError):
+                        pass
+        ceiling = min(settings.JUMPSERVER_RETRY_MAX_DELAY, settings.JUMPSERVER_RETRY_BACKOFF * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        json_body: Optional[Any] = None,
+        org: Optional[str] = None,
+    ) -> httpx.Response:
+        """
+        Single request pipeline for the JumpServer API: auth headers (refreshing the
+        token once on 401), bounded retries with jittered exponential backoff on
+        429/5xx and transport errors, and the adaptive concurrency limiter.
+        Non-idempotent methods are only retried when the request was not processed
+        (429 or connection failures).
+        """
+        client = get_http_client("jumpserver")
+        idempotent = method.upper() in ("GET", "HEAD", "OPTIONS", "PUT", "DELETE", "PATCH")
+        max_retries = max(0, settings.JUMPSERVER_MAX_RETRIES)
+        auth_refreshed = False
+        attempt = 0
+        while True:
+            headers = await self.get_headers()
+            sent_token = self._cached_token
+            if org:
+                # Use org header when provided to avoid defaulting to root org
+                headers = {**headers, "X-JMS-ORG": org}
+            await self._limiter.acquire()
+            started = time.monotonic()
+            response: Optional[httpx.Response] = None
+            overloaded = False
+            try:
+                response = await client.request(method, url, headers=headers, params=params, json=json_body)
+                overloaded = response.status_code in RETRY_STATUSES
+            except httpx.TransportError as e:
+                overloaded = True
+                retryable = idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                if not retryable or attempt >= max_retries:
+                    raise
+                delay = self._retry_delay(attempt)
+                logger.warning(f"JumpServer {method} {url} failed ({e!r}); retry {attempt + 1}/{max_retries} in {delay:.2f}s")
+            finally:
+                await self._limiter.release(time.monotonic() - started, overloaded)
+
+            if response is not None:
+                if response.status_code == 401 and not auth_refreshed and self._uses_login():
+                    # Token might be expired, try login once; concurrent 401s for the
+                    # same token share one login and the rest retry with its result
+                    logger.warning("Token expired, refreshing...")
+                    auth_refreshed = True
+                    await self.login(force=True, stale_token=sent_token)
+                    continue
+                retryable = response.status_code == 429 or (idempotent and response.status_code in RETRY_STATUSES)
+                if not retryable or attempt >= max_retries:
+                    return response
+                delay = self._retry_delay(attempt, response)
+                logger.warning(
+                    f"JumpServer {method} {url} returned {response.status_code}; "
+                    f"retry {attempt + 1}/{max_retries} in {delay:.2f}s"
+                )
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _get_page(self, endpoint: str, params: Dict[str, Any]) -> Any:
+        response = await self._request("GET", endpoint, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    def _normalize_next(self, next_url: Optional[str]) -> Optional[str]:
+        if not next_url:
+            return None
+        if next_url.startswith("/"):
+            return f"{self.base_url}{next_url}"
+        if next_url.startswith("http://") and self.base_url.startswith("https://"):
+            return next_url.replace("http://", "https://", 1)
+        return next_url
+
+    async def _fetch_sequential(
+        self,
+        endpoint: str,
+        page_size: int,
+        on_page: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Fetch a list endpoint page by page, following the server's `next` links."""
+        url: Optional[str] = endpoint
+        params: Optional[Dict[str, Any]] = {"limit": page_size, "offset": 0}
+        items: List[Dict[str, Any]] = []
+        while url:
+            data = await self._get_page(url, params)
+            # JumpServer may return a paginated dict or a flat list
+            if isinstance(data, list):
+                items.extend(data)
+                if on_page:
+                    await self._emit_page(on_page, data)
+                break
+            page_results = data.get("results") or data.get("data") or []
+            items.extend(page_results)
+            if on_page:
+                await self._emit_page(on_page, page_results)
+            url = self._normalize_next(data.get("next"))
+            if url:
+                logger.debug(f"Following pagination to: {url}")
+            params = None  # the 'next' URL already contains paging info
+        return items
+
+    async def _fetch_all_pages(
+        self,
+        endpoint: str,
+        on_page: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch every page of a JumpServer list endpoint.
+        Reads the total count from the first page, then fetches the remaining
+        offsets concurrently (bounded by JUMPSERVER_FETCH_CONCURRENCY). The stride
+        is the size of the page the server actually returned, since JumpServer
+        caps `limit` (MAX_LIMIT_PER_PAGE); if the pages still do not add up to
+        `count`, the endpoint is re-read sequentially through its `next` links.
+        """
+        page_size = max(1, settings.JUMPSERVER_PAGE_SIZE)
+        first = await self._get_page(endpoint, {"limit": page_size, "offset": 0})
+
+        # JumpServer may return a paginated dict or a flat list
+        if isinstance(first, list):
+            if on_page:
+                await self._emit_page(on_page, first)
+            return first
+
+        first_results = first.get("results") or first.get("data") or []
+        total = first.get("count")
+        if not isinstance(total, int) or total <= len(first_results):
+            if on_page:
+                await self._emit_page(on_page, first_results)
+            return list(first_results)
+        if not first_results:
+            return await self._fetch_sequential(endpoint, page_size, on_page)
+        if on_page:
+            await self._emit_page(on_page, first_results)
+
+        stride = len(first_results)
+        offsets = list(range(stride, total, stride))
+        pages: Dict[int, List[Dict[str, Any]]] = {0: first_results}
+        semaphore = asyncio.Semaphore(max(1, settings.JUMPSERVER_FETCH_CONCURRENCY))
+
+        async def fetch(offset: int) -> None:
+            async with semaphore:
+                data = await self._get_page(endpoint, {"limit": stride, "offset": offset})
+            results = data if isinstance(data, list) else (data.get("results") or data.get("data") or [])
+            pages[offset] = results
+            if on_page:
+                await self._emit_page(on_page, results)
+
+        logger.debug(f"Fetching {len(offsets)} extra pages from {endpoint} (count={total}, page={stride})")
+        await asyncio.gather(*(fetch(offset) for offset in offsets))
+
+        items: List[Dict[str, Any]] = []
+        for offset in sorted(pages):
+            items.extend(pages[offset])
+        if len(items) != total:
+            logger.warning(
+                f"{endpoint}: pages add up to {len(items)} items but count={total}; re-reading via 'next' links"
+            )
+            items = await self._fetch_sequential(endpoint, stride, on_page)
+        return items
+
+    async def _emit_page(
+        self,
+        on_page: Callable[[List[Dict[str, Any]]], Awaitable[None]],
+        page: List[Dict[str, Any]],
+    ) -> None:
+        if not page:
+            return
+        try:
+            await on_page(page)
+        except Exception as e:
+            logger.warning(f"Page callback failed: {e}")
+
     async def get_assets(self) -> List[Dict[str, Any]]:
+        """
+        Return the full JumpServer asset inventory.
+        Concurrent misses share one crawl; each page it fetches is handed to the
+        registered assets persister (see set_assets_persister) exactly once.
+        """
         if not self.base_url:
             return []
 
         if self._assets_cache is not None and self._cache_is_fresh(self._assets_cache_at):
             return self._assets_cache
-        
-        headers = await self.get_headers()
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            endpoint = f"{self.base_url}/api/v1/assets/assets/"
-            try:
-                response = await client.get(endpoint, headers=headers, timeout=10.0)
-                if response.status_code == 401:
-                    # Token might be expired, try login once
-                    await self.login(force=True)
-                    headers = await self.get_headers()
-                    response = await client.get(endpoint, headers=headers, timeout=10.0)
-                
-                response.raise_for_status()
-                data = response.json()
-                if isinstance(data, list):
-                    self._assets_cache = data
-                    self._assets_cache_at = time.time()
-                    return data
-                results = data.get("results", [])
-                self._assets_cache = results
-                self._assets_cache_at = time.time()
-                return results
-            except Exception as e:
-                logger.error(f"Failed to fetch assets from JumpServer: {e}")
-                return self._assets_cache or []
+        if self._assets_cache is not None and self._cache_is_usable(self._assets_cache_at):
+            self._revalidate("assets", self._refresh_assets)
+            return self._assets_cache
+
+        return await self._flight.do("assets", self._refresh_assets)
+
+    async def _refresh_assets(self) -> List[Dict[str, Any]]:
+        endpoint = f"{self.base_url}/api/v1/assets/assets/"
+        try:
+            assets = await self._fetch_all_pages(endpoint, on_page=self._assets_persister)
+            logger.info(f"Loaded {len(assets)} assets from JumpServer")
+            self._assets_cache = assets
+            self._assets_cache_at = time.time()
+            return assets
+        except Exception as e:
+            logger.error(f"Failed to fetch assets from JumpServer: {e}")
+            return self._assets_cache or []
 
     async def get_nodes(self) -> List[Dict[str, Any]]:
         if not self.base_url:
             return []
         if self._nodes_cache is not None and self._cache_is_fresh(self._nodes_cache_at):
             return self._nodes_cache
-        headers = await self.get_headers()
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            endpoint = f"{self.base_url}/api/v1/assets/nodes/"
-            url = endpoint
-            params = {"limit": 100, "offset": 0}
-            nodes: List[Dict[str, Any]] = []
-            base_scheme = "https" if self.base_url.startswith("https://") else "http"
-
-            def normalize_next(next_url: Optional[str]) -> Optional[str]:
-                if not next_url:
-                    return None
-                if next_url.startswith("/"):
-                    return f"{self.base_url}{next_url}"
-                if next_url.startswith("http://") and base_scheme == "https":
-                    return next_url.replace("http://", "https://", 1)
-                return next_url
+        if self._nodes_cache is not None and self._cache_is_usable(self._nodes_cache_at):
+            self._revalidate("nodes", self._refresh_nodes)
+            return self._nodes_cache
+        return await self._flight.do("nodes", self._refresh_nodes)
 
-            try:
-                while url:
-                    response = await client.get(url, headers=headers, params=params, timeout=10.0)
-                    if response.status_code == 401:
-                        await self.login(force=True)
-                        headers = await self.get_headers()
-                        response = await client.get(url, headers=headers, params=params, timeout=10.0)
-
-                    response.raise_for_status()
-                    data = response.json()
-
-                    # JumpServer may return a paginated dict or a flat list
-                    if isinstance(data, list):
-                        nodes.extend(data)
-                        break
-
-                    page_results = data.get("results") or data.get("data") or []
-                    nodes.extend(page_results)
-
-                    next_url = normalize_next(data.get("next"))
-                    if not next_url:
-                        break
-
-                    url = next_url
-                    logger.debug(f"Following pagination to: {url}")
-                    params = None  # the 'next' URL already contains paging info
-
-                logger.info(f"Loaded {len(nodes)} nodes from JumpServer")
-                self._nodes_cache = nodes
-                self._nodes_cache_at = time.time()
-                return nodes
-            except Exception as e:
-                logger.error(f"Failed to fetch nodes: {e}")
-                if hasattr(e, 'response'):
-                    logger.error(f"Response body: {e.response.text if hasattr(e.response, 'text') else 'N/A'}")
-                return self._nodes_cache or []
+    async def _refresh_nodes(self) -> List[Dict[str, Any]]:
+        endpoint = f"{self.base_url}/api/v1/assets/nodes/"
+        started_generation = self._node_generation
+        self._node_refreshes += 1
+        try:
+            nodes = await self._fetch_sequential(endpoint, 100)
+            logger.info(f"Loaded {len(nodes)} nodes from JumpServer")
+            self._nodes_cache = nodes
+            self._nodes_cache_at = time.time()
+            self._node_index = NodeIndex(nodes)
+            # Nodes created/moved/deleted by the HUB during the crawl may be missing from it
+            replayed = [entry for entry in self._node_journal if entry[0] > started_generation]
+            for _, op, payload in replayed:
+                if op == "cache":
+                    self._apply_cache_node(dict(payload))
+                else:
+                    self._apply_uncache_node(payload)
+            if replayed:
+                logger.debug(f"Re-applied {len(replayed)} node changes made during the refresh")
+            self._persist_nodes(self._nodes_persister, list(self._nodes_cache))
+            return self._nodes_cache
+        except Exception as e:
+            logger.error(f"Failed to fetch nodes: {e}")
+            if hasattr(e, 'response'):
+                logger.error(f"Response body: {e.response.text if hasattr(e.response, 'text') else 'N/A'}")
+            return self._nodes_cache or []
+        finally:
+            self._node_refreshes -= 1
+            if not self._node_refreshes:
+                self._node_journal.clear()
+
+    def set_assets_persister(self, persister: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]]) -> None:
+        """Register a coroutine called with each page of assets fetched by a refresh."""
+        self._assets_persister = persister
+
+    def set_nodes_persister(
+        self,
+        persister: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]],
+        upsert: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+        delete: Optional[Callable[[List[str]], Awaitable[None]]] = None,
+    ) -> None:
+        """
+        Register the node snapshot writers: `persister` gets the full node list after
+        every successful refresh, `upsert`/`delete` the nodes the HUB itself created,
+        moved or deleted. All of them run in the background (see _persist_nodes).
+        """
+        self._nodes_persister = persister
+        self._nodes_upserter = upsert
+        self._nodes_deleter = delete
+
+    def _persist_nodes(self, write: Optional[Callable[[Any], Awaitable[None]]], payload: Any) -> None:
+        """Run a snapshot write off the request path; writes are applied in issue order."""
+        if write is None or not payload:
+            return
+
+        async def run() -> None:
+            async with self._persist_lock:
+                try:
+                    await write(payload)
+                except Exception as e:
+                    logger.warning(f"Failed to persist JumpServer node snapshot: {e}")
+
+        task = asyncio.create_task(run())
+        self._persist_tasks.add(task)
+        task.add_done_callback(self._persist_tasks.discard)
+
+    def hydrate_nodes(self, nodes: List[Dict[str, Any]], fetched_at: float) -> bool:
+        """
+        Seed the node cache and index from a persisted snapshot (warm start).
+        The snapshot keeps its real age: a stale one is served while a background
+        refresh runs, one past JUMPSERVER_CACHE_HARD_TTL is not used at all.
+        """
+        if self._nodes_cache is not None or not nodes:
+            return False
+        if not self._cache_is_usable(fetched_at):
+            logger.info(f"JumpServer node snapshot is past the hard TTL; not hydrating {len(nodes)} nodes")
+            return False
+        self._nodes_cache = list(nodes)
+        self._nodes_cache_at = fetched_at
+        self._node_index = NodeIndex(self._nodes_cache)
+        logger.info(f"Hydrated {len(nodes)} JumpServer nodes from snapshot")
+        if self.base_url and not self._cache_is_fresh(fetched_at):
+            self._revalidate("nodes", self._refresh_nodes)
+        return True
+
+    async def get_node_index(self) -> NodeIndex:
+        """Return the node index matching the current node cache (refreshing it if expired)."""
+        await self.get_nodes()
+        return self._node_index
+
+    def _cache_node(self, node: Optional[Dict[str, Any]]) -> None:
+        """Write a created/updated node straight into the node cache and index."""
+        if not node or not node.get("id") or self._nodes_cache is None:
+            return
+        self._journal_node_change("cache", dict(node))
+        changed = self._apply_cache_node(node)
+        self._persist_nodes(self._nodes_upserter, [dict(n) for n in changed])
+
+    def _uncache_node(self, node_id: str) -> None:
+        if self._nodes_cache is None:
+            return
+        self._journal_node_change("uncache", node_id)
+        removed_ids = self._apply_uncache_node(node_id)
+        self._persist_nodes(self._nodes_deleter, removed_ids)
+
+    def _journal_node_change(self, op: str, payload: Any) -> None:
+        """
+        Stamp an in-place node change with the next generation. While a refresh is in
+        flight the change is also journaled: that crawl may have read the tree before
+        the change, so _refresh_nodes re-applies it on top of what it fetched.
+        """
+        self._node_generation += 1
+        if self._node_refreshes:
+            self._node_journal.append((self._node_generation, op, payload))
+
+    def _apply_cache_node(self, node: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Insert or update `node` in the cache and index; returns every node whose entry changed."""
+        index = self._node_index
+        existing = index.get_by_id(node["id"])
+        if existing is None:
+            self._nodes_cache.append(node)
+            index.add(node)
+            return [node]
+        old_path = self._normalize_path(existing.get("full_value") or "")
+        descendants = [n for n in index.descendants(old_path) if n is not existing]
+        # Update in place so the cached list keeps pointing at the same dict
+        index.remove(node["id"])
+        existing.update(node)
+        index.add(existing)
+        new_path = self._normalize_path(existing.get("full_value") or "")
+        if new_path == old_path:
+            return [existing]
+        # Node moved/renamed: its descendants' full paths change with it
+        for child in descendants:
+            child_id = child.get("id")
+            child_path = self._normalize_path(child.get("full_value") or "")
+            if child_id:
+                index.remove(child_id)
+            child["full_value"] = new_path + child_path[len(old_path):]
+            index.add(child)
+        return [existing] + descendants
+
+    def _apply_uncache_node(self, node_id: str) -> List[str]:
+        """Drop a node and its subtree from the cache and index; returns the removed ids."""
+        index = self._node_index
+        node = index.get_by_id(node_id)
+        if node is None:
+            return []
+        removed = [node] + [n for n in index.descendants(node.get("full_value") or "") if n is not node]
+        for item in removed:
+            if item.get("id"):
+                index.remove(item["id"])
+        removed_ids = {id(item) for item in removed}
+        self._nodes_cache = [n for n in self._nodes_cache if id(n) not in removed_ids]
+        return [item["id"] for item in removed if item.get("id")]
 
     async def update_node(
         self,
@@ -248,71 +727,50 @@ class JumpServerService:
         """Move a node to a different parent."""
         if not self.base_url:
             return None
-        headers = await self.get_headers()
-        # Use org header when provided to avoid defaulting to root org
+        endpoint = f"{self.base_url}/api/v1/assets/nodes/{node_id}/"
+        payload: Dict[str, Any] = {}
+        if parent_id:
+            payload["parent"] = parent_id  # Use ID for parent
+            payload["parent_id"] = parent_id
         if parent_org:
-            headers = {**headers, "X-JMS-ORG": parent_org}
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            endpoint = f"{self.base_url}/api/v1/assets/nodes/{node_id}/"
-            payload: Dict[str, Any] = {}
-            if parent_id:
-                payload["parent"] = parent_id  # Use ID for parent
-                payload["parent_id"] = parent_id
-            if parent_org:
-                payload["org_id"] = parent_org
-            if key_override:
-                payload["key"] = key_override
-            # Include parent_key if needed, but 'parent' as ID is safer usually
-            if parent_key:
-                payload["parent_key"] = parent_key
-
-            logger.info(f"Moving node {node_id} to parent_id={parent_id} parent_key={parent_key} org={parent_org} payload={payload}")
-            try:
-                response = await client.patch(endpoint, headers=headers, json=payload, timeout=10.0)
-                if response.status_code == 401:
-                    # Token expired, refresh and retry
-                    logger.warning("Token expired, refreshing...")
-                    await self.login(force=True)
-                    headers = await self.get_headers()
-                    if parent_org:
-                        headers = {**headers, "X-JMS-ORG": parent_org}
-                    response = await client.patch(endpoint, headers=headers, json=payload, timeout=10.0)
-                
-                response.raise_for_status()
-                logger.info(f"[JS MOVE] status={response.status_code} parent={parent_id} body={response.text}")
-                result = response.json()
-                logger.info(f"Node moved successfully to: {result.get('full_value', 'N/A')}")
-                return result
-            except Exception as e:
-                logger.error(f"Failed to move node {node_id}: {e}")
-                if hasattr(e, 'response'):
-                    logger.error(f"[JS MOVE ERROR] status={e.response.status_code} body={e.response.text if hasattr(e.response, 'text') else 'N/A'}")
-                return None
+            payload["org_id"] = parent_org
+        if key_override:
+            payload["key"] = key_override
+        # Include parent_key if needed, but 'parent' as ID is safer usually
+        if parent_key:
+            payload["parent_key"] = parent_key
+
+        logger.info(f"Moving node {node_id} to parent_id={parent_id} parent_key={parent_key} org={parent_org} payload={payload}")
+        try:
+            response = await self._request("PATCH", endpoint, json_body=payload, org=parent_org)
+            response.raise_for_status()
+            logger.info(f"[JS MOVE] status={response.status_code} parent={parent_id} body={response.text}")
+            result = response.json()
+            logger.info(f"Node moved successfully to: {result.get('full_value', 'N/A')}")
+            self._cache_node(result)
+            return result
+        except Exception as e:
+            logger.error(f"Failed to move node {node_id}: {e}")
+            if hasattr(e, 'response'):
+                logger.error(f"[JS MOVE ERROR] status={e.response.status_code} body={e.response.text if hasattr(e.response, 'text') else 'N/A'}")
+            return None
 
     async def delete_node(self, node_id: str) -> bool:
         """Delete a node by ID. Best-effort, used to clean wrong placements."""
         if not self.base_url:
             return False
-        headers = await self.get_headers()
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            endpoint = f"{self.base_url}/api/v1/assets/nodes/{node_id}/"
-            try:
-                response = await client.delete(endpoint, headers=headers, timeout=10.0)
-                if response.status_code == 401:
-                    # Token expired, refresh and retry
-                    logger.warning("Token expired, refreshing...")
-                    await self.login(force=True)
-                    headers = await self.get_headers()
-                    response = await client.delete(endpoint, headers=headers, timeout=10.0)
-                
-                if response.status_code in (200, 204, 404):
-                    logger.info(f"Deleted node {node_id} (status={response.status_code})")
-                    return True
-                logger.error(f"Failed to delete node {node_id}, status={response.status_code}, body={response.text}")
-                return False
-            except Exception as e:
-                logger.error(f"Error deleting node {node_id}: {e}")
-                return False
+        endpoint = f"{self.base_url}/api/v1/assets/nodes/{node_id}/"
+        try:
+            response = await self._request("DELETE", endpoint)
+            if response.status_code in (200, 204, 404):
+                logger.info(f"Deleted node {node_id} (status={response.status_code})")
+                self._uncache_node(node_id)
+                return True
+            logger.error(f"Failed to delete node {node_id}, status={response.status_code}, body={response.text}")
+            return False
+        except Exception as e:
+            logger.error(f"Error deleting node {node_id}: {e}")
+            return False
 
     async def create_node(
         self,
@@ -328,59 +786,38 @@ class JumpServerService:
         if not parent_id:
             logger.error("Cannot create child node without parent_id.")
             return None
-        headers = await self.get_headers()
-        if parent_org:
-            headers = {**headers, "X-JMS-ORG": parent_org}
-
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            # Correct UI flow: create child under parent, then rename with PATCH
-            create_endpoint = f"{self.base_url}/api/v1/assets/nodes/{parent_id}/children/"
-            try:
-                logger.info(f"Creating child node under parent_id={parent_id} via {create_endpoint}")
-                resp = await client.post(create_endpoint, headers=headers, json={}, timeout=10.0)
-                if resp.status_code == 401:
-                    # Token expired, refresh and retry
-                    logger.warning("Token expired, refreshing...")
-                    await self.login(force=True)
-                    headers = await self.get_headers()
-                    if parent_org:
-                        headers = {**headers, "X-JMS-ORG": parent_org}
-                    resp = await client.post(create_endpoint, headers=headers, json={}, timeout=10.0)
-                
-                logger.info(f"[JS CREATE CHILD] status={resp.status_code} body={resp.text}")
-                resp.raise_for_status()
-                created = resp.json()
-                child_id = created.get("id")
-                if not child_id:
-                    logger.error("Create child response missing id.")
-                    return None
-
-                # Rename to requested value
-                rename_endpoint = f"{self.base_url}/api/v1/assets/nodes/{child_id}/"
-                rename_payload = {"value": name}
-                logger.info(f"Renaming child node {child_id} to '{name}'")
-                rename_resp = await client.patch(rename_endpoint, headers=headers, json=rename_payload, timeout=10.0)
-                if rename_resp.status_code == 401:
-                    # Token expired, refresh and retry
-                    logger.warning("Token expired during rename, refreshing...")
-                    await self.login(force=True)
-                    headers = await self.get_headers()
-                    if parent_org:
-                        headers = {**headers, "X-JMS-ORG": parent_org}
-                    rename_resp = await client.patch(rename_endpoint, headers=headers, json=rename_payload, timeout=10.0)
-                
-                logger.info(f"[JS RENAME] status={rename_resp.status_code} body={rename_resp.text}")
-                rename_resp.raise_for_status()
-                renamed = rename_resp.json()
-
-                if expected_path and renamed.get("full_value") != expected_path:
-                    logger.warning(f"Rename placed node at '{renamed.get('full_value')}', expected '{expected_path}'.")
-                return renamed
-            except Exception as e:
-                logger.error(f"Failed to create child node '{name}' under parent {parent_id}: {e}")
-                if hasattr(e, 'response'):
-                    logger.error(f"[JS CREATE CHILD ERROR] status={e.response.status_code} body={e.response.text if hasattr(e.response, 'text') else 'N/A'}")
+        # Correct UI flow: create child under parent, then rename with PATCH
+        create_endpoint = f"{self.base_url}/api/v1/assets/nodes/{parent_id}/children/"
+        try:
+            logger.info(f"Creating child node under parent_id={parent_id} via {create_endpoint}")
+            resp = await self._request("POST", create_endpoint, json_body={}, org=parent_org)
+            logger.info(f"[JS CREATE CHILD] status={resp.status_code} body={resp.text}")
+            resp.raise_for_status()
+            created = resp.json()
+            child_id = created.get("id")
+            if not child_id:
+                logger.error("Create child response missing id.")
                 return None
+            self._cache_node(created)
+
+            # Rename to requested value
+            rename_endpoint = f"{self.base_url}/api/v1/assets/nodes/{child_id}/"
+            rename_payload = {"value": name}
+            logger.info(f"Renaming child node {child_id} to '{name}'")
+            rename_resp = await self._request("PATCH", rename_endpoint, json_body=rename_payload, org=parent_org)
+            logger.info(f"[JS RENAME] status={rename_resp.status_code} body={rename_resp.text}")
+            rename_resp.raise_for_status()
+            renamed = rename_resp.json()
+
+            if expected_path and renamed.get("full_value") != expected_path:
+                logger.warning(f"Rename placed node at '{renamed.get('full_value')}', expected '{expected_path}'.")
+            self._cache_node(renamed)
+            return renamed
+        except Exception as e:
+            logger.error(f"Failed to create child node '{name}' under parent {parent_id}: {e}")
+            if hasattr(e, 'response'):
+                logger.error(f"[JS CREATE CHILD ERROR] status={e.response.status_code} body={e.response.text if hasattr(e.response, 'text') else 'N/A'}")
+            return None
 
     async def ensure_node_path(self, path: str) -> Optional[str]:
         """
@@ -390,43 +827,30 @@ class JumpServerService:
         if not self.base_url:
             return None
 
-        def build_maps(node_list: List[Dict[str, Any]]):
-            by_full_lower = {}
-            by_id_local = {}
-            for node in node_list:
-                full_val = node.get("full_value") or ""
-                norm_lower = self._normalize_path(full_val).lower()
-                if norm_lower not in by_full_lower:
-                    by_full_lower[norm_lower] = node
-                node_id = node.get("id")
-                if node_id:
-                    by_id_local[node_id] = node
-            return by_full_lower, by_id_local
-
         normalized_requested_path = self._normalize_path(path)
-        parts = [p for p in normalized_requested_path.split("/") if p]
+        parts = path_segments(normalized_requested_path)
 
         logger.info(f"Ensuring node path (case-insensitive): {normalized_requested_path}")
 
-        nodes = await self.get_nodes()
-        if not nodes:
+        index = await self.get_node_index()
+        if not len(index):
             logger.error("JumpServer returned no nodes; aborting.")
             return None
 
-        by_full_lower, by_id = build_maps(nodes)
-        current_parent_id: Optional[str] = None
+        # One trie walk finds the existing prefix; only the missing tail is created
+        deepest, depth = index.deepest_existing(normalized_requested_path)
+        current_parent_id: Optional[str] = deepest.get("id") if deepest else None
         current_actual_path = ""
+        if deepest:
+            current_actual_path = self._normalize_path(
+                deepest.get("full_value") or "/" + "/".join(parts[:depth])
+            )
+            logger.debug(f"✓ Found existing node '{current_actual_path}'")
 
-        for part in parts:
+        for part in parts[depth:]:
+            index = self._node_index
             expected_path = self._normalize_path(f"{current_actual_path}/{part}")
-            node = by_full_lower.get(expected_path.lower())
-            if node:
-                current_parent_id = node.get("id")
-                current_actual_path = self._normalize_path(node.get("full_value") or expected_path)
-                logger.debug(f"✓ Found existing node '{current_actual_path}'")
-                continue
-
-            parent_node = by_id.get(current_parent_id) if current_parent_id else None
+            parent_node = index.get_by_id(current_parent_id)
             parent_org = parent_node.get("org_id") if parent_node else None
             if not current_parent_id:
                 logger.error(f"Cannot create '{part}' without parent_id (path='{expected_path}').")
@@ -445,48 +869,116 @@ class JumpServerService:
             current_parent_id = new_node.get("id")
             current_actual_path = self._normalize_path(new_node.get("full_value") or expected_path)
             logger.info(f"✓ Created node '{current_actual_path}' (ID: {current_parent_id})")
-
-            nodes = await self.get_nodes()
-            by_full_lower, by_id = build_maps(nodes)
+            # create_node already wrote the new node into the cached index
 
         logger.info(f"=== Path ensure complete. Leaf ID: {current_parent_id} ===")
         return current_parent_id
 
+    async def ensure_node_paths(self, paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Ensure many node paths at once.
+        All paths are merged into a single tree (case-insensitive) so every shared
+        ancestor is resolved/created exactly once; missing nodes of the same depth
+        are then created concurrently, bounded by JUMPSERVER_CREATE_CONCURRENCY.
+        Returns {path: {"id": leaf_id or None, "error": message or None}}.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        if not self.base_url:
+            return {p: {"id": None, "error": "JumpServer não configurado."} for p in paths}
+
+        index = await self.get_node_index()
+        if not len(index):
+            logger.error("JumpServer returned no nodes; aborting batch ensure.")
+            return {p: {"id": None, "error": "Lista de nodes do JumpServer indisponível."} for p in paths}
+
+        def tree_key(segments: List[str]) -> str:
+            return ("/" + "/".join(segments)).casefold()
+
+        # tree key -> segments (casing of the first request that mentioned it)
+        tree: Dict[str, List[str]] = {}
+        leaves: Dict[str, List[str]] = {}
+        for path in paths:
+            segments = path_segments(path)
+            if not segments:
+                results[path] = {"id": None, "error": "Path vazio."}
+                continue
+            for depth in range(1, len(segments) + 1):
+                tree.setdefault(tree_key(segments[:depth]), segments[:depth])
+            leaves.setdefault(tree_key(segments), []).append(path)
+
+        resolved: Dict[str, str] = {}
+        actual_paths: Dict[str, str] = {}
+        failed: Dict[str, str] = {}
+        semaphore = asyncio.Semaphore(max(1, settings.JUMPSERVER_CREATE_CONCURRENCY))
+
+        async def resolve(key: str) -> None:
+            segments = tree[key]
+            name = segments[-1]
+            parent_key = tree_key(segments[:-1]) if len(segments) > 1 else None
+            if parent_key and parent_key in failed:
+                failed[key] = failed[parent_key]
+                return
+            parent_path = actual_paths.get(parent_key, "") if parent_key else ""
+            expected_path = self._normalize_path(f"{parent_path}/{name}")
+            node = self._node_index.get_folded(expected_path)
+            if node:
+                resolved[key] = node.get("id")
+                actual_paths[key] = self._normalize_path(node.get("full_value") or expected_path)
+                return
+            parent_id = resolved.get(parent_key) if parent_key else None
+            if not parent_id:
+                failed[key] = f"Não é possível criar '{name}' sem parent_id (path='{expected_path}')."
+                return
+            parent_node = self._node_index.get_by_id(parent_id)
+            async with semaphore:
+                new_node = await self.create_node(
+                    name,
+                    parent_id,
+                    parent_org=parent_node.get("org_id") if parent_node else None,
+                    expected_path=expected_path,
+                )
+            if not new_node:
+                failed[key] = f"Falha ao criar o segmento '{name}' em '{parent_path or '/'}'."
+                return
+            resolved[key] = new_node.get("id")
+            actual_paths[key] = self._normalize_path(new_node.get("full_value") or expected_path)
+            logger.info(f"✓ Created node '{actual_paths[key]}' (ID: {resolved[key]})")
+
+        max_depth = max((len(segments) for segments in tree.values()), default=0)
+        for depth in range(1, max_depth + 1):
+            level = [key for key, segments in tree.items() if len(segments) == depth]
+            await asyncio.gather(*(resolve(key) for key in level))
+
+        for key, requested in leaves.items():
+            for path in requested:
+                results[path] = {"id": resolved.get(key), "error": failed.get(key)}
+
+        created_ok = sum(1 for r in results.values() if r["id"])
+        logger.info(f"=== Batch path ensure complete: {created_ok}/{len(results)} paths resolved ===")
+        return results
+
     async def check_node_exists(self, path: str) -> bool:
         """Checks if a full node path exists without creating it."""
         if not self.base_url:
             return False
 
         normalized_path = self._normalize_path(path)
-        nodes = await self.get_nodes()
+        index = await self.get_node_index()
 
-        if not isinstance(nodes, list) or not nodes:
+        if not len(index):
             logger.error(f"JumpServer node list unavailable; cannot verify '{normalized_path}'.")
             return False
 
-        # Log para debug
-        logger.debug(f"Verificando path: '{path}' -> normalizado: '{normalized_path}'")
-        logger.debug(f"Total de nodes carregados: {len(nodes)}")
-
-        matches_exact = [n for n in nodes if self._normalize_path(n.get("full_value") or "") == normalized_path]
-        if matches_exact:
-            logger.debug(f"Node encontrado (match exato): {matches_exact[0].get('full_value')}")
+        node, exact = index.lookup(normalized_path)
+        if node and exact:
+            logger.debug(f"Node encontrado (match exato): {node.get('full_value')}")
+            return True
+        if node:
+            # Case-insensitive match avoids false negatives on casing
+            logger.warning(f"Node exists with different casing: stored '{node.get('full_value')}', requested '{normalized_path}'")
             return True
 
-        # Fallback: case-insensitive comparison to avoid false negatives on casing
-        normalized_lower = normalized_path.lower()
-        for n in nodes:
-            full_val = n.get("full_value") or ""
-            if self._normalize_path(full_val).lower() == normalized_lower:
-                logger.warning(f"Node exists with different casing: stored '{full_val}', requested '{normalized_path}'")
-                return True
-
-        # Debug: mostrar alguns nodes similares
-        similar = [n.get("full_value") for n in nodes if path.split("/")[-1].upper() in (n.get("full_value") or "").upper()][:5]
-        if similar:
-            logger.debug(f"Nodes similares encontrados: {similar}")
-
-        logger.warning(f"Node '{normalized_path}' not found among {len(nodes)} nodes.")
+        logger.warning(f"Node '{normalized_path}' not found among {len(index)} nodes.")
         return False
 
 
@@ -1,6 +1,6 @@
-import httpx
 import logging
 from backend.core.config import settings
+from backend.core.http import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -11,26 +11,34 @@ class MovideskService:
         self.api_url = settings.MOVIDESK_API_URL
         self.token = settings.MOVIDESK_TOKEN
 
+    async def fetch_active_companies(self) -> list[Dict[str, Any]]:
+        """Fetch active companies (personType 2) from Movidesk, raising on any failure."""
+        if not self.token:
+            raise RuntimeError("Movidesk token not configured")
+        client = get_http_client("movidesk")
+        # Filter for personType 2 (Company) and isActive true
+        filter_query = "personType eq 2 and isActive eq true"
+        endpoint = f"{self.api_url}/persons?token={self.token}&$filter={filter_query}"
+        logger.info(f"Fetching companies from Movidesk: {self.api_url}/persons (filter applied)")
+        response = await client.get(endpoint)
+        logger.debug(f"Movidesk response status: {response.status_code}")
+        response.raise_for_status()
+        data = response.json()
+        if not isinstance(data, list):
+            raise ValueError(f"Unexpected Movidesk response: {type(data).__name__}")
+        logger.info(f"Found {len(data)} active companies in Movidesk.")
+        return data
+
     async def get_active_companies(self) -> list[Dict[str, Any]]:
-        """Fetch active companies (personType 2) from Movidesk."""
+        """Like fetch_active_companies, but returns [] on failure."""
         if not self.token:
             logger.warning("Movidesk token not found. Skipping company fetch.")
             return []
-        async with httpx.AsyncClient() as client:
-            # Filter for personType 2 (Company) and isActive true
-            filter_query = "personType eq 2 and isActive eq true"
-            endpoint = f"{self.api_url}/persons?token={self.token}&$filter={filter_query}"
-            try:
-                logger.info(f"Fetching companies from Movidesk: {self.api_url}/persons (filter applied)")
-                response = await client.get(endpoint, timeout=15.0)
-                logger.debug(f"Movidesk response status: {response.status_code}")
-                response.raise_for_status()
-                data = response.json()
-                logger.info(f"Found {len(data)} active companies in Movidesk.")
-                return data
-            except Exception as e:
-                logger.error(f"Error fetching Movidesk companies: {e}")
-                return []
+        try:
+            return await self.fetch_active_companies()
+        except Exception as e:
+            logger.error(f"Error fetching Movidesk companies: {e}")
+            return []
 
     def parse_webhook_payload(self, payload: Dict[str, Any]):
         # Example Movidesk webhook parsing
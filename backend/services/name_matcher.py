@@ -0,0 +1,118 @@
+import math
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Sequence, Set, Tuple
+
+# Blocking keys shared by more entries than this are too common to narrow anything down
+MAX_BLOCK_SIZE = 200
+# Hard cap on entries scored per query name, whatever the blocks look like
+MAX_CANDIDATES = 50
+PREFIX_LENGTH = 4
+
+
+def numeric_tokens(tokens: Iterable[str]) -> FrozenSet[str]:
+    """Tokens carrying digits ("02", "3", "NET2"): they tell apart otherwise identical names."""
+    return frozenset(token for token in tokens if any(ch.isdigit() for ch in token))
+
+
+class NameMatcher:
+    """
+    Fuzzy tenant-name matcher backed by a token inverted index.
+
+    Each entry is indexed under blocking keys (its normalized tokens and their
+    prefixes). A query only scores entries sharing a selective key (a block of at
+    most `max_block_size` entries) with it, keeping the `max_candidates` entries that
+    share the most keys; a query whose keys are all too common scores nothing.
+    Work per query is therefore bounded by the caps, not by the number of entries.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[Tuple[Any, str]],
+        tokenize: Callable[[str], Sequence[str]],
+        max_block_size: int = MAX_BLOCK_SIZE,
+        max_candidates: int = MAX_CANDIDATES,
+    ):
+        self._tokenize = tokenize
+        self._max_block_size = max_block_size
+        self._max_candidates = max_candidates
+        self._entries: List[Tuple[Any, str, Sequence[str]]] = []
+        self._blocks: Dict[str, List[int]] = {}
+        self._doc_freq: Dict[str, int] = {}
+        for value, name in entries:
+            tokens = tokenize(name)
+            if not tokens:
+                continue
+            position = len(self._entries)
+            self._entries.append((value, name, tokens))
+            for token in set(tokens):
+                self._doc_freq[token] = self._doc_freq.get(token, 0) + 1
+            for key in self._blocking_keys(tokens):
+                self._blocks.setdefault(key, []).append(position)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _blocking_keys(tokens: Sequence[str]) -> Set[str]:
+        keys = set()
+        for token in tokens:
+            keys.add(f"t:{token}")
+            if len(token) >= PREFIX_LENGTH:
+                keys.add(f"p:{token[:PREFIX_LENGTH]}")
+        return keys
+
+    def _weight(self, token: str) -> float:
+        # Rare tokens say more about identity than common ones
+        return math.log(1 + len(self._entries) / (1 + self._doc_freq.get(token, 0))) + 1.0
+
+    def _token_score(self, query_tokens: Sequence[str], tokens: Sequence[str]) -> float:
+        """IDF-weighted Dice over the token sets."""
+        query_set, entry_set = set(query_tokens), set(tokens)
+        common = sum(self._weight(t) for t in query_set & entry_set)
+        total = sum(self._weight(t) for t in query_set) + sum(self._weight(t) for t in entry_set)
+        return 2 * common / total if total else 0.0
+
+    def _candidates(self, query_tokens: Sequence[str]) -> List[int]:
+        shared: Counter = Counter()
+        for key in self._blocking_keys(query_tokens):
+            block = self._blocks.get(key)
+            if block and len(block) <= self._max_block_size:
+                shared.update(block)
+        # Most shared keys first; position breaks ties so the cut is deterministic
+        ranked = sorted(shared.items(), key=lambda item: (-item[1], item[0]))
+        return [position for position, _ in ranked[: self._max_candidates]]
+
+    def rank(self, names: Iterable[str], limit: int = 3, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Best entries for any of `names`, highest score first, at most `limit` items
+        with score >= min_score: [{"value", "name", "score", "token_score"}].
+        `score` also counts character similarity (typos, truncated words);
+        `token_score` only counts shared tokens.
+        """
+        best: Dict[int, Tuple[float, float]] = {}
+        for name in names:
+            query_tokens = self._tokenize(name)
+            if not query_tokens:
+                continue
+            for position in self._candidates(query_tokens):
+                tokens = self._entries[position][2]
+                if list(query_tokens) == list(tokens):
+                    token_score = score = 1.0
+                else:
+                    token_score = self._token_score(query_tokens, tokens)
+                    char_ratio = SequenceMatcher(None, " ".join(query_tokens), " ".join(tokens)).ratio()
+                    score = max(token_score, char_ratio)
+                if score >= min_score and score > best.get(position, (-1.0, 0.0))[0]:
+                    best[position] = (score, token_score)
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], self._entries[item[0]][1]))[:limit]
+        return [
+            {
+                "value": self._entries[position][0],
+                "name": self._entries[position][1],
+                "tokens": tuple(self._entries[position][2]),
+                "score": round(score, 3),
+                "token_score": round(token_score, 3),
+            }
+            for position, (score, token_score) in ranked
+        ]
@@ -0,0 +1,49 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+# Enough for every Movidesk company and NetBox tenant name (plus alternates) of a report
+NORMALIZE_CACHE_SIZE = 16384
+
+LEGAL_SUFFIXES = frozenset(
+    {"LTDA", "ME", "EPP", "EIRELI", "SA", "TELECOM", "TELECOMUNICACAO", "TELECOMUNICACOES"}
+)
+
+_SA_PATTERN = re.compile(r"S/A|S\.A\.?")
+_NON_ALNUM_PATTERN = re.compile(r"[^A-Z0-9]+")
+
+
+def fold_accents(text: str) -> str:
+    """Strip diacritics so 'PRODUÇÃO' and 'PRODUCAO' compare equal."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize(name: Optional[str]) -> Tuple[str, ...]:
+    """
+    Comparison key of a company/tenant name: upper-cased, accent-folded tokens with
+    punctuation dropped and trailing legal suffixes (LTDA, S/A, TELECOM...) removed.
+    """
+    if not name:
+        return ()
+    cleaned = fold_accents(name.upper().strip())
+    cleaned = _SA_PATTERN.sub("SA", cleaned)
+    tokens = _NON_ALNUM_PATTERN.sub(" ", cleaned).split()
+    while tokens and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    return tuple(tokens)
+
+
+def names_equivalent(name_a: Optional[str], name_b: Optional[str]) -> bool:
+    if not name_a or not name_b:
+        return False
+    return normalize(name_a) == normalize(name_b)
+
+
+def key_in(name: Optional[str], keys: Iterable[Tuple[str, ...]]) -> bool:
+    """Whether `name` normalizes to one of the precomputed `keys`."""
+    if not name:
+        return False
+    return normalize(name) in keys
@@ -1,46 +1,253 @@
-import pynetbox
 import asyncio
+import hashlib
+import json
 import logging
-from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+import httpx
+from cachetools import TTLCache
 
 logger = logging.getLogger(__name__)
 
 from backend.core.config import settings
+from backend.core.http import get_http_client
+from backend.core.singleflight import SingleFlight
+
+# Devices with tenant/group, site and primary IPv4 in one round-trip per batch (NetBox 4.x GraphQL)
+DEVICES_GRAPHQL_QUERY = """
+query Devices($offset: Int!, $limit: Int!) {
+  device_list(pagination: {offset: $offset, limit: $limit}) {
+    id
+    name
+    tenant { id name group { name } }
+    site { name }
+    primary_ip4 { address }
+  }
+}
+"""
+
+REQUIRED_TENANT_CUSTOM_FIELDS = [
+    {"name": "ERP_ID", "label": "ERP_ID", "type": "text"},
+    {"name": "CNPJ", "label": "CNPJ", "type": "text"},
+]
+
 
 class NetBoxService:
+    """
+    Async NetBox REST client built on the shared httpx pool.
+    Every method returns plain dicts (or lists of dicts), as delivered by the API.
+    """
+
     def __init__(self):
-        self.nb = None
+        self.base_url: Optional[str] = None
+        self.graphql_url: Optional[str] = None
+        self.token: Optional[str] = settings.NETBOX_TOKEN or None
         if settings.NETBOX_URL and settings.NETBOX_TOKEN:
-            self.nb = pynetbox.api(settings.NETBOX_URL, token=settings.NETBOX_TOKEN)
+            self.base_url = f"{settings.NETBOX_URL.rstrip('/')}/api"
+            self.graphql_url = f"{settings.NETBOX_URL.rstrip('/')}/graphql/"
         else:
             logger.warning("NETBOX_URL/NETBOX_TOKEN não configurados. Integração NetBox desabilitada.")
-        self.executor = ThreadPoolExecutor(max_workers=10)
+        self._flight = SingleFlight("netbox")
+        # Tenant groups, content types and custom-field definitions rarely change
+        self._metadata: TTLCache = TTLCache(maxsize=256, ttl=settings.NETBOX_METADATA_TTL)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.base_url)
 
     def _require_client(self):
-        if not self.nb:
+        if not self.enabled:
             raise RuntimeError("NetBox não configurado (defina NETBOX_URL e NETBOX_TOKEN).")
 
-    async def _run_async(self, func, *args, **kwargs):
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
-    async def get_devices(self):
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Token {self.token}",
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        }
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json_body: Optional[Any] = None,
+    ) -> httpx.Response:
+        client = get_http_client("netbox")
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        return await client.request(method, url, headers=self._headers(), params=params, json=json_body)
+
+    async def _get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        response = await self._request("GET", path, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def _collect_pages(
+        self,
+        fetch: Callable[[int, int], Awaitable[List[Dict[str, Any]]]],
+        first: List[Dict[str, Any]],
+        total: int,
+        what: str,
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch the pages after `first` concurrently with `fetch(offset, limit)`.
+        NetBox clamps `limit` to MAX_PAGE_SIZE, so the stride is the size of the first
+        page as served; when the pages still do not add up to `total` they are re-read
+        one after another, each offset advancing by what the server actually returned.
+        """
+        results: List[Dict[str, Any]] = list(first)
+        if total <= len(results):
+            return results
+        if not results:
+            raise RuntimeError(f"NetBox returned an empty first page for {what} (count={total})")
+
+        stride = len(results)
+        semaphore = asyncio.Semaphore(max(1, settings.NETBOX_FETCH_CONCURRENCY))
+
+        async def fetch_bounded(offset: int) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await fetch(offset, stride)
+
+        pages = await asyncio.gather(*(fetch_bounded(offset) for offset in range(stride, total, stride)))
+        for page in pages:
+            results.extend(page)
+        if len(results) == total:
+            return results
+
+        logger.warning(f"{what}: pages add up to {len(results)} objects but count={total}; re-reading sequentially")
+        results = list(first)
+        while len(results) < total:
+            page = await fetch(len(results), stride)
+            if not page:
+                break
+            results.extend(page)
+        return results
+
+    async def _list(self, path: str, **filters) -> List[Dict[str, Any]]:
+        """
+        Fetch every object of a list endpoint.
+        The first page gives the total count; remaining offsets are fetched concurrently.
+        """
+        page_size = max(1, settings.NETBOX_PAGE_SIZE)
+        first = await self._get_json(path, {**filters, "limit": page_size, "offset": 0})
+
+        async def fetch(offset: int, limit: int) -> List[Dict[str, Any]]:
+            data = await self._get_json(path, {**filters, "limit": limit, "offset": offset})
+            return data.get("results") or []
+
+        return await self._collect_pages(fetch, first.get("results") or [], first.get("count") or 0, path)
+
+    async def _get_one(self, path: str, **filters) -> Optional[Dict[str, Any]]:
+        """Filter a list endpoint expecting at most one match (pynetbox .get() semantics)."""
+        data = await self._get_json(path, {**filters, "limit": 2})
+        results = data.get("results") or []
+        if len(results) > 1:
+            raise ValueError(f"get() returned more than one result for {path} {filters}")
+        return results[0] if results else None
+
+    async def _get_by_id(self, path: str, object_id: Any) -> Optional[Dict[str, Any]]:
+        response = await self._request("GET", f"{path.rstrip('/')}/{object_id}/")
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    async def _cached_metadata(self, kind: str, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Memoize a metadata lookup for NETBOX_METADATA_TTL seconds.
+        Misses (None) are not cached so an object created later is found on the next call.
+        """
+        cache_key = (kind, key)
+        if cache_key in self._metadata:
+            return self._metadata[cache_key]
+        value = await self._flight.do(("metadata", kind, key), loader)
+        if value is not None:
+            self._metadata[cache_key] = value
+        return value
+
+    def invalidate_metadata(self, kind: Optional[str] = None) -> int:
+        """Drop cached metadata ("tenant_group", "content_type", "custom_fields") or all of it."""
+        keys = [k for k in list(self._metadata.keys()) if kind is None or k[0] == kind]
+        for key in keys:
+            self._metadata.pop(key, None)
+        return len(keys)
+
+    async def get_devices(self, **filters) -> List[Dict[str, Any]]:
+        self._require_client()
+        return await self._list("dcim/devices/", **filters)
+
+    async def _graphql(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        client = get_http_client("netbox")
+        response = await client.post(
+            self.graphql_url,
+            headers=self._headers(),
+            json={"query": query, "variables": variables or {}},
+        )
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get("errors"):
+            messages = "; ".join(str(err.get("message", err)) for err in payload["errors"])
+            raise RuntimeError(f"NetBox GraphQL error: {messages}")
+        return payload.get("data") or {}
+
+    async def get_devices_graphql(self) -> List[Dict[str, Any]]:
+        """
+        Fetch every device with tenant, tenant group, site and primary IPv4 via GraphQL.
+        The total comes from a 1-item REST call; GraphQL batches are then fetched concurrently
+        (see _collect_pages).
+        Returns the same flat shape as the NetBox device snapshot
+        (netboxId, name, ipAddress, tenantName, tenantGroup, siteName).
+        """
+        self._require_client()
+        count_data = await self._get_json("dcim/devices/", {"limit": 1, "brief": 1})
+        total = count_data.get("count") or 0
+        batch_size = max(1, settings.NETBOX_GRAPHQL_PAGE_SIZE)
+
+        async def fetch(offset: int, limit: int) -> List[Dict[str, Any]]:
+            data = await self._graphql(DEVICES_GRAPHQL_QUERY, {"offset": offset, "limit": limit})
+            return data.get("device_list") or []
+
+        first = await fetch(0, batch_size) if total else []
+        raw_devices = await self._collect_pages(fetch, first, total, "device_list")
+        devices: List[Dict[str, Any]] = []
+        for device in raw_devices:
+            tenant = device.get("tenant") or {}
+            group = tenant.get("group") or {}
+            site = device.get("site") or {}
+            primary_ip = device.get("primary_ip4") or {}
+            devices.append({
+                "netboxId": int(device["id"]) if str(device.get("id", "")).isdigit() else device.get("id"),
+                "name": device.get("name"),
+                "ipAddress": primary_ip.get("address"),
+                "tenantName": tenant.get("name"),
+                "tenantGroup": group.get("name"),
+                "siteName": site.get("name"),
+            })
+        logger.info(f"Loaded {len(devices)} devices from NetBox GraphQL")
+        return devices
+
+    async def get_sites(self, **filters) -> List[Dict[str, Any]]:
+        self._require_client()
+        return await self._list("dcim/sites/", **filters)
+
+    async def get_object_ids(self, path: str) -> List[int]:
+        """List only the ids of an endpoint (brief mode), used to detect deletions."""
         self._require_client()
-        return await self._run_async(self.nb.dcim.devices.all)
+        return [obj["id"] for obj in await self._list(path, brief=1) if obj.get("id") is not None]
 
     async def get_device_by_name(self, name: str):
         self._require_client()
-        return await self._run_async(self.nb.dcim.devices.get, name=name)
+        return await self._get_one("dcim/devices/", name=name)
 
     async def get_tenant_by_id(self, tenant_id: int):
         self._require_client()
-        return await self._run_async(self.nb.tenancy.tenants.get, tenant_id)
+        return await self._get_by_id("tenancy/tenants/", tenant_id)
 
 
     async def get_tenants(self, **kwargs):
         self._require_client()
-        if kwargs:
-            return await self._run_async(self.nb.tenancy.tenants.filter, **kwargs)
-        return await self._run_async(self.nb.tenancy.tenants.all)
+        key = ("tenants", tuple(sorted((k, str(v)) for k, v in kwargs.items())))
+        return await self._flight.do(key, lambda: self._list("tenancy/tenants/", **kwargs))
 
     async def get_tenant_by_custom_field(self, field_name: str, value: str):
         self._require_client()
@@ -48,13 +255,22 @@ class NetBoxService:
             return None
         # Try both variants (the one passed and common fallbacks)
         try:
-            return await self._run_async(self.nb.tenancy.tenants.get, **{f"cf_{field_name}": value})
-        except:
+            return await self._get_one("tenancy/tenants/", **{f"cf_{field_name}": value})
+        except Exception:
             return None
 
     async def get_tenant_group_by_name(self, name: str):
         self._require_client()
-        return await self._run_async(self.nb.tenancy.tenant_groups.get, name=name)
+        return await self._cached_metadata(
+            "tenant_group", name, lambda: self._get_one("tenancy/tenant-groups/", name=name)
+        )
+
+    async def get_custom_fields(self, **filters) -> List[Dict[str, Any]]:
+        self._require_client()
+        key = tuple(sorted((k, str(v)) for k, v in filters.items()))
+        return await self._cached_metadata(
+            "custom_fields", key, lambda: self._list("extras/custom-fields/", **filters)
+        )
 
     async def create_tenant(self, name: str, slug: str, description: str = "", custom_fields: dict = None, group_id: int = None):
         self._require_client()
@@ -67,76 +283,130 @@ class NetBoxService:
             payload["custom_fields"] = custom_fields
         if group_id:
             payload["group"] = group_id
-            
-        return await self._run_async(self.nb.tenancy.tenants.create, payload)
+
+        response = await self._request("POST", "tenancy/tenants/", json_body=payload)
+        response.raise_for_status()
+        return response.json()
 
     async def update_tenant(self, tenant_id: int, data: dict):
+        """PATCH the tenant directly (no read-before-write). Returns None if it does not exist."""
         self._require_client()
-        tenant = await self._run_async(self.nb.tenancy.tenants.get, tenant_id)
-        if tenant:
-            tenant.update(data)
-            return await self._run_async(tenant.save)
+        response = await self._request("PATCH", f"tenancy/tenants/{tenant_id}/", json_body=data)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    async def get_tenants_by_ids(self, tenant_ids: List[Any]) -> List[Dict[str, Any]]:
+        """Fetch many tenants with `?id=` filters, chunked to keep URLs short."""
+        self._require_client()
+        ids = list(dict.fromkeys(str(i) for i in tenant_ids if i is not None))
+        chunk = max(1, settings.NETBOX_BULK_CHUNK_SIZE)
+        tenants: List[Dict[str, Any]] = []
+        for start in range(0, len(ids), chunk):
+            tenants.extend(await self._list("tenancy/tenants/", id=ids[start:start + chunk]))
+        return tenants
+
+    async def _bulk_write(self, method: str, path: str, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # NetBox list endpoints accept a JSON array; the whole request is applied atomically
+        response = await self._request(method, path, json_body=items)
+        response.raise_for_status()
+        data = response.json()
+        return data if isinstance(data, list) else [data]
+
+    async def bulk_create_tenants(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self._require_client()
+        return await self._bulk_write("POST", "tenancy/tenants/", payloads)
+
+    async def bulk_update_tenants(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """PATCH many tenants in one call; every payload must carry its `id`."""
+        self._require_client()
+        return await self._bulk_write("PATCH", "tenancy/tenants/", payloads)
+
+    async def get_tenant_content_type(self) -> Optional[Dict[str, Any]]:
+        self._require_client()
+        return await self._cached_metadata("content_type", "tenancy.tenant", self._find_tenant_content_type)
+
+    async def _find_tenant_content_type(self) -> Optional[Dict[str, Any]]:
+        # NetBox < 4.0 exposes extras/content-types; 4.x moved it to core/object-types
+        potential_paths = [
+            ("extras/content-types/", {"app_label": "tenancy", "model": "tenant"}),
+            ("extras/content-types/", {"app_label": "tenancy", "model": "Tenant"}),
+            ("core/content-types/", {"app_label": "tenancy", "model": "tenant"}),
+            ("core/object-types/", {"app_label": "tenancy", "model": "tenant"}),
+        ]
+        for path, params in potential_paths:
+            try:
+                content_type = await self._get_one(path, **params)
+                if content_type:
+                    logger.info(f"Found Content Type for Tenant using {path} {params}")
+                    return {**content_type, "_endpoint": path}
+            except Exception as e:
+                logger.debug(f"Failed to find content type with {path} {params}: {e}")
+
+        # Last resort: search all content types
+        for path in ("extras/content-types/", "core/object-types/"):
+            try:
+                for ct in await self._list(path):
+                    if ct.get("app_label") == "tenancy" and str(ct.get("model", "")).lower() == "tenant":
+                        logger.info(f"Found Content Type via search: {ct.get('app_label')}.{ct.get('model')}")
+                        return {**ct, "_endpoint": path}
+            except Exception:
+                pass
         return None
 
-    async def ensure_custom_fields(self):
-        if not self.nb:
+    async def schema_fingerprint(self) -> Optional[str]:
+        """
+        Fingerprint of what ensure_custom_fields() depends on: NetBox URL/version and
+        the required field definitions. A changed fingerprint means the bootstrap must run again.
+        """
+        if not self.enabled:
+            return None
+        status = await self._get_json("status/")
+        material = json.dumps(
+            {
+                "url": self.base_url,
+                "version": status.get("netbox-version"),
+                "fields": REQUIRED_TENANT_CUSTOM_FIELDS,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    async def ensure_custom_fields(self) -> bool:
+        """Ensure required custom fields exist for Tenants. Returns True when all of them are in place."""
+        if not self.enabled:
             logger.warning("NetBox não configurado. Pulando ensure_custom_fields().")
-            return
-        """Ensure required custom fields exist for Tenants."""
-        required = [
-            {"name": "ERP_ID", "label": "ERP_ID", "type": "text"},
-            {"name": "CNPJ", "label": "CNPJ", "type": "text"}
-        ]
-        
-        try:
-            # Try to get content type for tenancy.tenant
-            # In some versions it might be in 'extras', in others 'core'
-            content_type = None
-            potential_paths = [
-                (self.nb.extras.content_types, {"app_label": "tenancy", "model": "tenant"}),
-                (self.nb.extras.content_types, {"app_label": "tenancy", "model": "Tenant"}),
-                (self.nb.core.content_types, {"app_label": "tenancy", "model": "tenant"}),
-            ]
-            
-            for api_path, params in potential_paths:
-                try:
-                    content_type = await self._run_async(api_path.get, **params)
-                    if content_type:
-                        logger.info(f"Found Content Type for Tenant using {params}")
-                        break
-                except Exception as e:
-                    logger.debug(f"Failed to find content type with {params}: {e}")
-            
-            if not content_type:
-                # Last resort: search all content types
-                try:
-                    all_cts = await self._run_async(self.nb.extras.content_types.all)
-                    for ct in all_cts:
-                        if ct.app_label == "tenancy" and ct.model.lower() == "tenant":
-                            content_type = ct
-                            logger.info(f"Found Content Type via search: {ct.app_label}.{ct.model}")
-                            break
-                except:
-                    pass
+            return False
 
+        try:
+            content_type = await self.get_tenant_content_type()
             if not content_type:
                 logger.warning("Could not find Content Type for Tenancy.Tenant. Custom fields might not be created.")
-                return
-            
-            for field in required:
+                return False
+
+            # NetBox 4.x renamed custom field "content_types" to "object_types"
+            types_key = "object_types" if content_type["_endpoint"].startswith("core/object-types") else "content_types"
+            ok = True
+            existing_names = {cf.get("name") for cf in await self.get_custom_fields()}
+            for field in REQUIRED_TENANT_CUSTOM_FIELDS:
                 try:
-                    existing = await self._run_async(self.nb.extras.custom_fields.get, name=field["name"])
-                    if not existing:
-                        await self._run_async(self.nb.extras.custom_fields.create, {
+                    if field["name"] not in existing_names:
+                        response = await self._request("POST", "extras/custom-fields/", json_body={
                             "name": field["name"],
                             "label": field["label"],
                             "type": field["type"],
-                            "content_types": [content_type.id]
+                            types_key: ["tenancy.tenant"],
                         })
+                        response.raise_for_status()
+                        self.invalidate_metadata("custom_fields")
                 except Exception as e:
+                    ok = False
                     logger.warning(f"Failed to ensure custom field {field['name']}: {e}")
+            return ok
         except Exception as e:
             logger.debug(f"Generic failure in ensure_custom_fields: {e}")
+            return False
 
 
 
@@ -0,0 +1,162 @@
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from backend.core.config import settings
+from backend.core.singleflight import SingleFlight
+from backend.services.netbox_service import netbox_svc
+from backend.services.snapshot_store import (
+    NETBOX_SNAPSHOT_STATE_KEY,
+    load_netbox_sync_state,
+    reconcile_netbox_snapshot,
+    save_netbox_sync_state,
+    upsert_netbox_devices,
+    upsert_netbox_sites,
+    upsert_netbox_tenants,
+)
+
+logger = logging.getLogger(__name__)
+
+# Same state row the server-side sync uses, so both agree on the device watermark
+SYNC_STATE_KEY = NETBOX_SNAPSHOT_STATE_KEY
+
+# Order matters: sites/devices reference tenants (and devices reference sites) in the snapshot
+RESOURCES = ("tenants", "sites", "devices")
+RESOURCE_PATHS = {
+    "tenants": "tenancy/tenants/",
+    "sites": "dcim/sites/",
+    "devices": "dcim/devices/",
+}
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _max_last_updated(objects: List[Dict[str, Any]], current: Optional[str]) -> Optional[str]:
+    newest = _parse_timestamp(current)
+    for obj in objects:
+        updated = _parse_timestamp(obj.get("last_updated"))
+        if updated and (newest is None or updated > newest):
+            newest = updated
+    return newest.isoformat() if newest else current
+
+
+class NetboxSnapshotSync:
+    """
+    Keeps NetboxTenantSnapshot/NetboxSiteSnapshot/NetboxDeviceSnapshot current.
+
+    The first run (or a forced one) loads everything. Later runs only pull objects
+    with last_updated >= the stored per-resource watermark; deletions are picked up
+    by a periodic id-set reconciliation.
+    """
+
+    def __init__(self):
+        self._flight = SingleFlight("netbox-snapshot")
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    async def run(self, full: bool = False) -> Dict[str, Any]:
+        return await self._flight.do(("run", full), lambda: self._run(full))
+
+    def cancel(self, full: bool = False) -> bool:
+        """Stop the running pass; its cursors are not saved, so the next one resumes from the last success."""
+        return self._flight.cancel(("run", full))
+
+    def _fetchers(self) -> Dict[str, Callable[..., Awaitable[List[Dict[str, Any]]]]]:
+        return {
+            "tenants": lambda **filters: netbox_svc.get_tenants(**filters),
+            "sites": lambda **filters: netbox_svc.get_sites(**filters),
+            "devices": lambda **filters: netbox_svc.get_devices(**filters),
+        }
+
+    async def _run(self, full: bool) -> Dict[str, Any]:
+        if not netbox_svc.enabled:
+            return {"status": "disabled"}
+
+        state = await load_netbox_sync_state(SYNC_STATE_KEY)
+        metadata: Dict[str, Any] = dict((state or {}).get("metadata") or {})
+        cursors: Dict[str, Optional[str]] = dict(metadata.get("cursors") or {})
+        if state and state.get("lastCursor") and not cursors.get("devices"):
+            cursors["devices"] = state["lastCursor"]
+
+        full_load = full or not (metadata.get("fullSyncCompleted") or metadata.get("fullSync"))
+        last_reconcile = _parse_timestamp(metadata.get("lastReconcileAt"))
+        reconcile_due = full_load or last_reconcile is None or (
+            datetime.now(timezone.utc) - last_reconcile
+        ).total_seconds() >= settings.NETBOX_SNAPSHOT_RECONCILE_INTERVAL
+
+        started = time.monotonic()
+        summary: Dict[str, Any] = {"mode": "full" if full_load else "incremental", "reconciled": reconcile_due}
+        upserts = {
+            "tenants": upsert_netbox_tenants,
+            "sites": upsert_netbox_sites,
+            "devices": upsert_netbox_devices,
+        }
+        fetchers = self._fetchers()
+        try:
+            for resource in RESOURCES:
+                filters: Dict[str, Any] = {}
+                if not full_load and cursors.get(resource):
+                    filters["last_updated__gte"] = cursors[resource]
+                objects = await fetchers[resource](**filters)
+                written = await upserts[resource](objects)
+                cursors[resource] = _max_last_updated(objects, cursors.get(resource))
+
+                removed = 0
+                if reconcile_due:
+                    if filters:
+                        live_ids = await netbox_svc.get_object_ids(RESOURCE_PATHS[resource])
+                    else:
+                        live_ids = [obj["id"] for obj in objects if obj.get("id") is not None]
+                    removed = await reconcile_netbox_snapshot(resource, live_ids)
+                summary[resource] = {"fetched": len(objects), "upserted": written, "removed": removed}
+
+            now = datetime.now(timezone.utc)
+            metadata.update({
+                "source": "hub",
+                "fullSync": full_load,
+                "fullSyncCompleted": True,
+                "cursors": cursors,
+                "devices": summary["devices"]["fetched"],
+                "lastReconcileAt": now.isoformat() if reconcile_due else metadata.get("lastReconcileAt"),
+            })
+            await save_netbox_sync_state(
+                SYNC_STATE_KEY,
+                success=True,
+                last_cursor=cursors.get("devices"),
+                metadata=metadata,
+            )
+        except Exception as exc:
+            logger.exception("Falha ao sincronizar snapshot do NetBox.")
+            try:
+                await save_netbox_sync_state(SYNC_STATE_KEY, success=False, error=str(exc))
+            except Exception:
+                logger.exception("Falha ao registrar erro no estado de sincronizacao do NetBox.")
+            summary.update({"status": "error", "error": str(exc)})
+            self.last_result = summary
+            raise
+
+        summary["status"] = "ok"
+        summary["duration"] = round(time.monotonic() - started, 3)
+        self.last_result = summary
+        logger.info(
+            "Snapshot NetBox (%s): tenants=%s sites=%s devices=%s em %.1fs",
+            summary["mode"],
+            summary["tenants"],
+            summary["sites"],
+            summary["devices"],
+            summary["duration"],
+        )
+        return summary
+
+
+netbox_snapshot_sync = NetboxSnapshotSync()
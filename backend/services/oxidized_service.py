@@ -1,6 +1,7 @@
-import httpx
 import logging
 from backend.core.config import settings
+from backend.core.http import get_http_client
+from backend.core.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -9,13 +10,18 @@ from typing import List, Dict, Any
 class OxidizedService:
     def __init__(self):
         self.base_url = settings.OXIDIZED_API_URL.rstrip("/")
+        self._flight = SingleFlight("oxidized")
 
     async def get_nodes(self) -> List[Dict[str, Any]]:
-        async with httpx.AsyncClient() as client:
-            endpoint = f"{self.base_url}/nodes.json"
-            response = await client.get(endpoint, timeout=10.0)
-            response.raise_for_status()
-            return response.json()
+        # Concurrent callers (e.g. several backup status lookups) share one request
+        return await self._flight.do("nodes", self._fetch_nodes)
+
+    async def _fetch_nodes(self) -> List[Dict[str, Any]]:
+        client = get_http_client("oxidized")
+        endpoint = f"{self.base_url}/nodes.json"
+        response = await client.get(endpoint)
+        response.raise_for_status()
+        return response.json()
 
     async def get_node_status(self, node_name: str) -> Dict[str, Any]:
         nodes = await self.get_nodes()
@@ -25,10 +31,10 @@ class OxidizedService:
         return {}
 
     async def get_node_version(self, node_name: str) -> List[Dict[str, Any]]:
-        async with httpx.AsyncClient() as client:
-            endpoint = f"{self.base_url}/node/version.json?node_full={node_name}"
-            response = await client.get(endpoint, timeout=10.0)
-            response.raise_for_status()
-            return response.json()
+        client = get_http_client("oxidized")
+        endpoint = f"{self.base_url}/node/version.json?node_full={node_name}"
+        response = await client.get(endpoint)
+        response.raise_for_status()
+        return response.json()
 
 oxidized_svc = OxidizedService()
@@ -1,9 +1,12 @@
 import json
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 from backend.core.db import get_pool
 
+# NetboxSyncState row written by each NetBox snapshot pass (tenants, sites and devices)
+NETBOX_SNAPSHOT_STATE_KEY = "devices"
+
 
 def _first_name(company: Dict[str, Any]) -> Optional[str]:
     for key in ("businessName", "companyName", "tradeName", "fantasyName", "name", "userName"):
@@ -103,16 +106,65 @@ async def load_jumpserver_snapshot_assets(ttl_seconds: int, allow_stale: bool =
     return assets
 
 
-async def load_netbox_snapshot_tenants(group_filter: str, ttl_seconds: int, allow_stale: bool = False) -> Optional[List[Dict[str, Any]]]:
+async def load_jumpserver_snapshot_nodes(ttl_seconds: int, allow_stale: bool = False) -> Optional[Tuple[List[Dict[str, Any]], datetime]]:
+    """Return (nodes, lastSeenAt) from the persisted JumpServer node tree, or None."""
     pool = await get_pool()
     if not pool:
         return None
     async with pool.acquire() as conn:
-        last_seen = await conn.fetchval('SELECT MAX("lastSeenAt") FROM "NetboxTenantSnapshot"')
+        last_seen = await conn.fetchval('SELECT MAX("lastSeenAt") FROM "JumpserverNodeSnapshot"')
         if not last_seen:
             return None
         if not _is_snapshot_fresh(last_seen, ttl_seconds) and not allow_stale:
             return None
+        rows = await conn.fetch(
+            'SELECT "jumpserverId", "key", "value", "fullValue", "orgId", "rawData" FROM "JumpserverNodeSnapshot"'
+        )
+    nodes: List[Dict[str, Any]] = []
+    for row in rows:
+        payload: Dict[str, Any] = {}
+        if row["rawData"]:
+            try:
+                payload = json.loads(row["rawData"])
+            except Exception:
+                payload = {}
+        payload.update({
+            "id": row["jumpserverId"],
+            "key": row["key"],
+            "value": row["value"],
+            "full_value": row["fullValue"],
+            "org_id": row["orgId"],
+        })
+        nodes.append(payload)
+    if last_seen.tzinfo is None:
+        last_seen = last_seen.replace(tzinfo=timezone.utc)
+    return nodes, last_seen
+
+
+async def load_netbox_snapshot_tenants(group_filter: str, ttl_seconds: int, allow_stale: bool = False) -> Optional[List[Dict[str, Any]]]:
+    pool = await get_pool()
+    if not pool:
+        return None
+    async with pool.acquire() as conn:
+        # Incremental passes only touch changed rows, so freshness comes from the last
+        # successful pass (lastSuccessAt), not from the rows' lastSeenAt
+        state = await conn.fetchrow(
+            'SELECT "metadata", "lastSuccessAt" FROM "NetboxSyncState" WHERE "key" = $1 AND "tenantId" IS NULL',
+            NETBOX_SNAPSHOT_STATE_KEY,
+        )
+        if not state or not state["lastSuccessAt"]:
+            return None
+        try:
+            metadata = json.loads(state["metadata"]) if state["metadata"] else {}
+        except Exception:
+            metadata = {}
+        full_sync_completed = bool(metadata.get("fullSyncCompleted") or metadata.get("fullSync"))
+        if not full_sync_completed and not allow_stale:
+            return None
+        if not _is_snapshot_fresh(state["lastSuccessAt"], ttl_seconds) and not allow_stale:
+            return None
+        if not await conn.fetchval('SELECT EXISTS (SELECT 1 FROM "NetboxTenantSnapshot")'):
+            return None
         query = 'SELECT "netboxId", "name", "groupName", "erpId", "cnpj", "rawData" FROM "NetboxTenantSnapshot"'
         params: List[Any] = []
         if group_filter:
@@ -289,21 +341,141 @@ async def upsert_jumpserver_assets(assets: Iterable[Dict[str, Any]]) -> None:
     """
 
     async with pool.acquire() as conn:
-        for row in rows:
+        await conn.executemany(
+            query,
+            [
+                (
+                    row["jumpserverId"],
+                    row["name"],
+                    row["hostname"],
+                    row["ipAddress"],
+                    row["assetId"],
+                    row["hostId"],
+                    row["nodePath"],
+                    row["platform"],
+                    row["rawData"],
+                )
+                for row in rows
+            ],
+        )
+
+
+def _jumpserver_node_rows(nodes: Iterable[Dict[str, Any]]) -> List[Tuple[Any, ...]]:
+    rows = []
+    for node in nodes:
+        jumpserver_id = node.get("id")
+        if not jumpserver_id:
+            continue
+        rows.append((
+            str(jumpserver_id),
+            node.get("key"),
+            node.get("value"),
+            node.get("full_value"),
+            node.get("org_id"),
+            json.dumps(node, ensure_ascii=True),
+        ))
+    return rows
+
+
+async def replace_jumpserver_nodes(nodes: Iterable[Dict[str, Any]]) -> None:
+    """Bulk upsert the full node tree and drop nodes that no longer exist in JumpServer."""
+    pool = await get_pool()
+    if not pool:
+        return
+
+    rows = _jumpserver_node_rows(nodes)
+    if not rows:
+        return
+
+    query = """
+        INSERT INTO "JumpserverNodeSnapshot" (
+            "jumpserverId",
+            "key",
+            "value",
+            "fullValue",
+            "orgId",
+            "rawData",
+            "lastSeenAt",
+            "createdAt",
+            "updatedAt"
+        )
+        VALUES (
+            $1, $2, $3, $4, $5, $6,
+            CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        )
+        ON CONFLICT ("jumpserverId") DO UPDATE SET
+            "key" = EXCLUDED."key",
+            "value" = EXCLUDED."value",
+            "fullValue" = EXCLUDED."fullValue",
+            "orgId" = EXCLUDED."orgId",
+            "rawData" = EXCLUDED."rawData",
+            "lastSeenAt" = CURRENT_TIMESTAMP,
+            "updatedAt" = CURRENT_TIMESTAMP
+    """
+
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.executemany(query, rows)
             await conn.execute(
-                query,
-                row["jumpserverId"],
-                row["name"],
-                row["hostname"],
-                row["ipAddress"],
-                row["assetId"],
-                row["hostId"],
-                row["nodePath"],
-                row["platform"],
-                row["rawData"],
+                'DELETE FROM "JumpserverNodeSnapshot" WHERE NOT ("jumpserverId" = ANY($1::text[]))',
+                [row[0] for row in rows],
             )
 
 
+async def upsert_jumpserver_nodes(nodes: Iterable[Dict[str, Any]]) -> None:
+    """
+    Write nodes the HUB created, renamed or moved into the persisted tree.
+    lastSeenAt stays the time of the last full crawl (new rows take it too), so
+    these writes never make the snapshot look fresher than it is.
+    """
+    pool = await get_pool()
+    if not pool:
+        return
+
+    rows = _jumpserver_node_rows(nodes)
+    if not rows:
+        return
+
+    query = """
+        INSERT INTO "JumpserverNodeSnapshot" (
+            "jumpserverId",
+            "key",
+            "value",
+            "fullValue",
+            "orgId",
+            "rawData",
+            "lastSeenAt",
+            "createdAt",
+            "updatedAt"
+        )
+        VALUES (
+            $1, $2, $3, $4, $5, $6,
+            COALESCE((SELECT MAX("lastSeenAt") FROM "JumpserverNodeSnapshot"), 'epoch'::timestamp),
+            CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        )
+        ON CONFLICT ("jumpserverId") DO UPDATE SET
+            "key" = EXCLUDED."key",
+            "value" = EXCLUDED."value",
+            "fullValue" = EXCLUDED."fullValue",
+            "orgId" = EXCLUDED."orgId",
+            "rawData" = EXCLUDED."rawData",
+            "updatedAt" = CURRENT_TIMESTAMP
+    """
+
+    async with pool.acquire() as conn:
+        await conn.executemany(query, rows)
+
+
+async def delete_jumpserver_nodes(node_ids: Iterable[str]) -> None:
+    pool = await get_pool()
+    if not pool:
+        return
+    ids = [str(node_id) for node_id in node_ids if node_id]
+    if not ids:
+        return
+    await pool.execute('DELETE FROM "JumpserverNodeSnapshot" WHERE "jumpserverId" = ANY($1::text[])', ids)
+
+
 async def upsert_sync_actions(actions: Iterable[Dict[str, Any]]) -> None:
     pool = await get_pool()
     if not pool:
@@ -358,6 +530,7 @@ async def upsert_sync_actions(actions: Iterable[Dict[str, Any]]) -> None:
             "details" = EXCLUDED."details",
             "payload" = EXCLUDED."payload",
             "updatedAt" = CURRENT_TIMESTAMP
+        WHERE "MovideskSyncAction"."status" <> 'executing'
     """
 
     async with pool.acquire() as conn:
@@ -384,10 +557,27 @@ async def upsert_sync_actions(actions: Iterable[Dict[str, Any]]) -> None:
             )
 
 
-async def update_sync_action_status(action_id: str, status: str, message: Optional[str] = None) -> None:
+# Statuses an approval may pick up ('error' keeps failed executions retryable)
+SYNC_ACTION_CLAIMABLE_STATUSES = ("pending_create", "pending_update", "error")
+
+
+async def update_sync_action_status(
+    action_id: str,
+    status: str,
+    message: Optional[str] = None,
+    expected_status: Union[str, Iterable[str], None] = None,
+) -> bool:
+    """
+    Set the status of one action. With `expected_status` (one status or several) the
+    write only applies if the row is still in it (compare-and-set); returns whether a
+    row changed.
+    """
     pool = await get_pool()
     if not pool:
-        return
+        return False
+    if isinstance(expected_status, str):
+        expected_status = [expected_status]
+    expected = list(expected_status) if expected_status is not None else None
 
     query = """
         UPDATE "MovideskSyncAction"
@@ -395,7 +585,455 @@ async def update_sync_action_status(action_id: str, status: str, message: Option
             "details" = COALESCE($3, "details"),
             "updatedAt" = CURRENT_TIMESTAMP
         WHERE "id" = $1
+          AND ($4::text[] IS NULL OR "status" = ANY($4::text[]))
+    """
+
+    async with pool.acquire() as conn:
+        result = await conn.execute(query, str(action_id), status, message, expected)
+    return result != "UPDATE 0"
+
+
+async def claim_sync_actions(
+    action_ids: Iterable[str],
+    stale_after_seconds: int,
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Atomically move approvable actions to 'executing' and return {id: action payload}
+    for the ones this caller won. Ids already claimed by another worker (or no longer
+    pending) are left out; an 'executing' claim older than `stale_after_seconds` is
+    considered abandoned and can be taken over. Returns None without a database.
+    """
+    pool = await get_pool()
+    if not pool:
+        return None
+
+    ids = [str(aid) for aid in action_ids]
+    if not ids:
+        return {}
+
+    query = """
+        UPDATE "MovideskSyncAction"
+        SET "status" = 'executing',
+            "updatedAt" = CURRENT_TIMESTAMP
+        WHERE "id" = ANY($1)
+          AND (
+            "status" = ANY($2)
+            OR ("status" = 'executing' AND "updatedAt" < CURRENT_TIMESTAMP - make_interval(secs => $3))
+          )
+        RETURNING "id", "payload"
+    """
+
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            query,
+            ids,
+            list(SYNC_ACTION_CLAIMABLE_STATUSES),
+            float(stale_after_seconds),
+        )
+
+    claimed: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        try:
+            payload = json.loads(row["payload"]) if row["payload"] else None
+        except (TypeError, ValueError):
+            payload = None
+        claimed[row["id"]] = payload if isinstance(payload, dict) else {}
+    return claimed
+
+
+async def supersede_sync_actions(keep_ids: Iterable[str]) -> int:
+    """
+    Make the stored pending set match the current report: retire approvable actions
+    not in `keep_ids` and bring back ids of the report that another replica's report
+    had retired (their pending status is taken from the payload).
+    """
+    pool = await get_pool()
+    if not pool:
+        return 0
+
+    query = """
+        UPDATE "MovideskSyncAction"
+        SET "status" = CASE
+                WHEN "id" = ANY($2) THEN COALESCE("payload"::json ->> 'status', 'superseded')
+                ELSE 'superseded'
+            END,
+            "updatedAt" = CURRENT_TIMESTAMP
+        WHERE ("status" = ANY($1) AND NOT ("id" = ANY($2)))
+           OR ("status" = 'superseded' AND "id" = ANY($2))
+    """
+
+    async with pool.acquire() as conn:
+        result = await conn.execute(
+            query,
+            list(SYNC_ACTION_CLAIMABLE_STATUSES),
+            [str(aid) for aid in keep_ids],
+        )
+    try:
+        return int(result.split()[-1])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+
+def _netbox_id(obj: Optional[Dict[str, Any]]) -> Optional[int]:
+    if not isinstance(obj, dict):
+        return None
+    value = obj.get("id")
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _choice_value(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get("value") or value.get("label")
+    return str(value) if value else None
+
+
+def _strip_prefix_length(address: Optional[str]) -> Optional[str]:
+    if not address:
+        return None
+    return address.split("/")[0] or None
+
+
+async def upsert_netbox_tenants(tenants: Iterable[Dict[str, Any]]) -> int:
+    pool = await get_pool()
+    if not pool:
+        return 0
+
+    rows = []
+    for tenant in tenants:
+        netbox_id = _netbox_id(tenant)
+        if netbox_id is None or not tenant.get("name"):
+            continue
+        group = tenant.get("group") or tenant.get("tenant_group") or {}
+        cf = tenant.get("custom_fields") or {}
+        erp_id = cf.get("ERP_ID") or cf.get("erp_id") or cf.get("movidesk_id")
+        cnpj = cf.get("CNPJ") or cf.get("cnpj")
+        rows.append((
+            netbox_id,
+            tenant.get("name"),
+            tenant.get("slug"),
+            group.get("name") if isinstance(group, dict) else None,
+            str(erp_id) if erp_id else None,
+            str(cnpj) if cnpj else None,
+            tenant.get("description") or None,
+            json.dumps(tenant, ensure_ascii=True),
+        ))
+
+    if not rows:
+        return 0
+
+    query = """
+        INSERT INTO "NetboxTenantSnapshot" (
+            "netboxId",
+            "name",
+            "slug",
+            "groupName",
+            "erpId",
+            "cnpj",
+            "description",
+            "rawData",
+            "lastSeenAt",
+            "createdAt",
+            "updatedAt"
+        )
+        VALUES (
+            $1, $2, $3, $4, $5, $6, $7, $8,
+            CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        )
+        ON CONFLICT ("netboxId") DO UPDATE SET
+            "name" = EXCLUDED."name",
+            "slug" = EXCLUDED."slug",
+            "groupName" = EXCLUDED."groupName",
+            "erpId" = EXCLUDED."erpId",
+            "cnpj" = EXCLUDED."cnpj",
+            "description" = EXCLUDED."description",
+            "rawData" = EXCLUDED."rawData",
+            "lastSeenAt" = CURRENT_TIMESTAMP,
+            "updatedAt" = CURRENT_TIMESTAMP
     """
 
     async with pool.acquire() as conn:
-        await conn.execute(query, str(action_id), status, message)
+        await conn.executemany(query, rows)
+    return len(rows)
+
+
+async def upsert_netbox_sites(sites: Iterable[Dict[str, Any]]) -> int:
+    pool = await get_pool()
+    if not pool:
+        return 0
+
+    rows = []
+    for site in sites:
+        netbox_id = _netbox_id(site)
+        if netbox_id is None or not site.get("name"):
+            continue
+        rows.append((
+            netbox_id,
+            site.get("name"),
+            site.get("slug"),
+            _choice_value(site.get("status")),
+            _netbox_id(site.get("tenant")),
+            json.dumps(site, ensure_ascii=True),
+        ))
+
+    if not rows:
+        return 0
+
+    # Tenant references are only kept when the tenant is already in the snapshot (FK)
+    query = """
+        INSERT INTO "NetboxSiteSnapshot" (
+            "netboxId",
+            "name",
+            "slug",
+            "status",
+            "tenantNetboxId",
+            "rawData",
+            "lastSeenAt",
+            "createdAt",
+            "updatedAt"
+        )
+        VALUES (
+            $1, $2, $3, $4,
+            (SELECT "netboxId" FROM "NetboxTenantSnapshot" WHERE "netboxId" = $5),
+            $6,
+            CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        )
+        ON CONFLICT ("netboxId") DO UPDATE SET
+            "name" = EXCLUDED."name",
+            "slug" = EXCLUDED."slug",
+            "status" = EXCLUDED."status",
+            "tenantNetboxId" = EXCLUDED."tenantNetboxId",
+            "rawData" = EXCLUDED."rawData",
+            "lastSeenAt" = CURRENT_TIMESTAMP,
+            "updatedAt" = CURRENT_TIMESTAMP
+    """
+
+    async with pool.acquire() as conn:
+        await conn.executemany(query, rows)
+    return len(rows)
+
+
+async def upsert_netbox_devices(devices: Iterable[Dict[str, Any]]) -> int:
+    """
+    Bulk upsert devices into NetboxDeviceSnapshot.
+    Access/SNMP columns (credentials, services) are owned by the server-side sync and left untouched.
+    """
+    pool = await get_pool()
+    if not pool:
+        return 0
+
+    rows = []
+    for device in devices:
+        netbox_id = _netbox_id(device)
+        if netbox_id is None:
+            continue
+        primary_ip = device.get("primary_ip") or device.get("primary_ip4") or {}
+        platform = device.get("platform") or {}
+        rows.append((
+            netbox_id,
+            device.get("name") or device.get("display") or f"Device-{netbox_id}",
+            _strip_prefix_length(primary_ip.get("address") if isinstance(primary_ip, dict) else None),
+            _netbox_id(device.get("tenant")),
+            _netbox_id(device.get("site")),
+            platform.get("name") if isinstance(platform, dict) else None,
+            json.dumps(device, ensure_ascii=True),
+        ))
+
+    if not rows:
+        return 0
+
+    query = """
+        INSERT INTO "NetboxDeviceSnapshot" (
+            "netboxId",
+            "name",
+            "ipAddress",
+            "tenantNetboxId",
+            "siteNetboxId",
+            "platform",
+            "rawData",
+            "lastSeenAt",
+            "createdAt",
+            "updatedAt"
+        )
+        VALUES (
+            $1, $2, $3,
+            (SELECT "netboxId" FROM "NetboxTenantSnapshot" WHERE "netboxId" = $4),
+            (SELECT "netboxId" FROM "NetboxSiteSnapshot" WHERE "netboxId" = $5),
+            $6, $7,
+            CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        )
+        ON CONFLICT ("netboxId") DO UPDATE SET
+            "name" = EXCLUDED."name",
+            "ipAddress" = EXCLUDED."ipAddress",
+            "tenantNetboxId" = EXCLUDED."tenantNetboxId",
+            "siteNetboxId" = EXCLUDED."siteNetboxId",
+            "platform" = EXCLUDED."platform",
+            "rawData" = EXCLUDED."rawData",
+            "lastSeenAt" = CURRENT_TIMESTAMP,
+            "updatedAt" = CURRENT_TIMESTAMP
+    """
+
+    async with pool.acquire() as conn:
+        await conn.executemany(query, rows)
+    return len(rows)
+
+
+NETBOX_SNAPSHOT_TABLES = {
+    "tenants": "NetboxTenantSnapshot",
+    "sites": "NetboxSiteSnapshot",
+    "devices": "NetboxDeviceSnapshot",
+}
+
+
+async def reconcile_netbox_snapshot(resource: str, live_ids: Iterable[int]) -> int:
+    """
+    Drop snapshot rows whose id no longer exists in NetBox and mark the rest as seen.
+    Returns how many rows were removed.
+    """
+    pool = await get_pool()
+    if not pool:
+        return 0
+    table = NETBOX_SNAPSHOT_TABLES[resource]
+    ids = [int(i) for i in live_ids]
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            status = await conn.execute(
+                f'DELETE FROM "{table}" WHERE NOT ("netboxId" = ANY($1::int[]))',
+                ids,
+            )
+            await conn.execute(
+                f'UPDATE "{table}" SET "lastSeenAt" = CURRENT_TIMESTAMP WHERE "netboxId" = ANY($1::int[])',
+                ids,
+            )
+    try:
+        return int(status.split()[-1])
+    except (AttributeError, ValueError, IndexError):
+        return 0
+
+
+async def load_netbox_sync_state(key: str) -> Optional[Dict[str, Any]]:
+    pool = await get_pool()
+    if not pool:
+        return None
+    row = await pool.fetchrow(
+        'SELECT "lastCursor", "lastSuccessAt", "lastRunAt", "lastError", "metadata" FROM "NetboxSyncState" WHERE "key" = $1 AND "tenantId" IS NULL',
+        key,
+    )
+    if not row:
+        return None
+    try:
+        metadata = json.loads(row["metadata"]) if row["metadata"] else {}
+    except Exception:
+        metadata = {}
+    return {
+        "lastCursor": row["lastCursor"],
+        "lastSuccessAt": row["lastSuccessAt"],
+        "lastRunAt": row["lastRunAt"],
+        "lastError": row["lastError"],
+        "metadata": metadata,
+    }
+
+
+async def save_netbox_sync_state(
+    key: str,
+    *,
+    success: bool,
+    last_cursor: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    error: Optional[str] = None,
+) -> None:
+    """
+    Record a sync run in NetboxSyncState (global scope, tenantId NULL).
+    On failure only lastRunAt/lastError change, keeping the previous watermark.
+    """
+    pool = await get_pool()
+    if not pool:
+        return
+    now = datetime.now(timezone.utc)
+    metadata_json = json.dumps(metadata, ensure_ascii=True) if metadata is not None else None
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            # (key, NULL) never conflicts on the unique index, so look the row up explicitly
+            state_id = await conn.fetchval(
+                'SELECT "id" FROM "NetboxSyncState" WHERE "key" = $1 AND "tenantId" IS NULL ORDER BY "id" LIMIT 1 FOR UPDATE',
+                key,
+            )
+            if state_id is None:
+                await conn.execute(
+                    """
+                    INSERT INTO "NetboxSyncState" (
+                        "key", "tenantId", "lastCursor", "lastSuccessAt", "lastRunAt", "lastError", "metadata",
+                        "createdAt", "updatedAt"
+                    )
+                    VALUES ($1, NULL, $2, $3, $4, $5, $6, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+                    """,
+                    key,
+                    last_cursor,
+                    now if success else None,
+                    now,
+                    error,
+                    metadata_json,
+                )
+            elif success:
+                await conn.execute(
+                    """
+                    UPDATE "NetboxSyncState"
+                    SET "lastCursor" = COALESCE($2, "lastCursor"),
+                        "lastSuccessAt" = $3,
+                        "lastRunAt" = $3,
+                        "lastError" = NULL,
+                        "metadata" = COALESCE($4, "metadata"),
+                        "updatedAt" = CURRENT_TIMESTAMP
+                    WHERE "id" = $1
+                    """,
+                    state_id,
+                    last_cursor,
+                    now,
+                    metadata_json,
+                )
+            else:
+                await conn.execute(
+                    """
+                    UPDATE "NetboxSyncState"
+                    SET "lastRunAt" = $2,
+                        "lastError" = $3,
+                        "updatedAt" = CURRENT_TIMESTAMP
+                    WHERE "id" = $1
+                    """,
+                    state_id,
+                    now,
+                    error,
+                )
+
+
+async def load_hub_state(key: str) -> Optional[Dict[str, Any]]:
+    """Value stored under `key` in HubState, the HUB's own key/value table."""
+    pool = await get_pool()
+    if not pool:
+        return None
+    value = await pool.fetchval('SELECT "value" FROM "HubState" WHERE "key" = $1', key)
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except Exception:
+        return None
+
+
+async def save_hub_state(key: str, value: Dict[str, Any]) -> None:
+    pool = await get_pool()
+    if not pool:
+        return
+    await pool.execute(
+        """
+        INSERT INTO "HubState" ("key", "value", "updatedAt")
+        VALUES ($1, $2, CURRENT_TIMESTAMP)
+        ON CONFLICT ("key") DO UPDATE SET
+            "value" = EXCLUDED."value",
+            "updatedAt" = CURRENT_TIMESTAMP
+        """,
+        key,
+        json.dumps(value, ensure_ascii=True, default=str),
+    )
@@ -1,29 +1,60 @@
+import asyncio
+import hashlib
+import json
 import uuid
 import logging
-import re
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 from backend.services.movidesk_service import movidesk_svc
 from backend.services.netbox_service import netbox_svc
 from backend.services.jumpserver_service import jumpserver_svc
+from backend.services.jumpserver_index import NodeIndex, normalize_path
+from backend.services.tenant_index import TenantIndex, tenant_erp_id
+from backend.services.name_matcher import NameMatcher, numeric_tokens
+from backend.services.name_normalizer import key_in, names_equivalent, normalize
 from backend.core.config import settings
+from backend.core.executor import BoundedExecutor
 from backend.services.snapshot_store import (
     upsert_movidesk_companies,
-    upsert_jumpserver_assets,
     upsert_sync_actions,
     update_sync_action_status,
+    claim_sync_actions,
+    supersede_sync_actions,
+    SYNC_ACTION_CLAIMABLE_STATUSES,
     load_movidesk_snapshot_companies,
-    load_jumpserver_snapshot_assets,
     load_netbox_snapshot_tenants,
+    load_hub_state,
+    save_hub_state,
 )
 
 logger = logging.getLogger(__name__)
 
+# Onde ficam os nodes de clientes no JumpServer
+PRODUCTION_NODE_PATH = "/DEFAULT/PRODUÇÃO"
+# HubState key holding the summary of the last stored report
+REPORT_STATE_KEY = "movidesk_report"
+# Namespace of the deterministic MovideskSyncAction ids (see SyncService._with_action_id)
+SYNC_ACTION_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "netbox-ops-hub/movidesk-sync-action")
+
 class SyncService:
     def __init__(self):
         self._pending_actions: Dict[str, Dict[str, Any]] = {}
         self._last_report: List[Dict[str, Any]] = []
         self._last_report_at = None
+        # Whether the last report was persisted (and its actions can be approved)
+        self._last_report_stored = False
+        self._tenant_index: Optional[TenantIndex] = None
+        # movidesk_id -> {"fingerprint", "action"} of the last incremental report
+        self._company_state: Dict[str, Dict[str, Any]] = {}
+        self._last_report_delta: Dict[str, int] = {}
+        self._executor = BoundedExecutor(
+            "sync-actions",
+            settings.SYNC_EXECUTOR_CONCURRENCY,
+            {
+                "netbox": settings.SYNC_EXECUTOR_NETBOX_CONCURRENCY,
+                "jumpserver": settings.SYNC_EXECUTOR_JUMPSERVER_CONCURRENCY,
+            },
+        )
 
     def get_last_report_summary(self) -> Dict[str, Any]:
         if not self._last_report_at:
@@ -39,8 +70,18 @@ class SyncService:
             "pending_count": len(pending),
             "total": len(self._last_report),
             "last_run": self._last_report_at.isoformat(),
+            "last_delta": self._last_report_delta,
+            "stored": self._last_report_stored,
+            "jumpserver_cache": jumpserver_svc.get_cache_info(),
         }
 
+    async def load_stored_report_summary(self) -> Optional[Dict[str, Any]]:
+        """Summary of the last report stored by whichever replica ran it (no upstream calls)."""
+        stored = await load_hub_state(REPORT_STATE_KEY)
+        if not stored:
+            return None
+        return {**stored, "jumpserver_cache": jumpserver_svc.get_cache_info()}
+
     def _company_name_candidates(self, company: Dict[str, Any]) -> List[str]:
         keys = ("businessName", "companyName", "tradeName", "fantasyName", "name", "userName")
         candidates: List[str] = []
@@ -52,30 +93,6 @@ class SyncService:
                     candidates.append(cleaned)
         return candidates
 
-    def _normalize_name_tokens(self, name: str) -> List[str]:
-        if not name:
-            return []
-        cleaned = name.upper().strip()
-        cleaned = cleaned.replace("S/A", "SA").replace("S.A.", "SA").replace("S.A", "SA")
-        cleaned = re.sub(r"[^A-Z0-9\\s]", " ", cleaned)
-        cleaned = re.sub(r"\\s+", " ", cleaned).strip()
-        tokens = cleaned.split()
-        suffixes = {"LTDA", "ME", "EPP", "EIRELI", "SA", "TELECOM", "TELECOMUNICACAO", "TELECOMUNICACOES"}
-        while tokens and tokens[-1] in suffixes:
-            tokens.pop()
-        return tokens
-
-    def _names_equivalent(self, name_a: str, name_b: str) -> bool:
-        if not name_a or not name_b:
-            return False
-        return self._normalize_name_tokens(name_a) == self._normalize_name_tokens(name_b)
-
-    def _name_in_candidates(self, target: str, candidates: List[str]) -> bool:
-        for cand in candidates:
-            if self._names_equivalent(target, cand):
-                return True
-        return False
-
     def _tenant_name(self, tenant: Any) -> Optional[str]:
         if isinstance(tenant, dict):
             return tenant.get("name")
@@ -95,405 +112,830 @@ class SyncService:
         name = (settings.NETBOX_TENANT_GROUP_FILTER or "").strip()
         return name or "K3G Solutions"
 
-    async def generate_sync_report(self, store_pending: bool = True) -> List[Dict[str, Any]]:
+    async def _load_report_sources(self) -> Tuple[List[Dict[str, Any]], List[Any], Optional[NodeIndex]]:
         """
-        Compare systems and generate a report of pending actions.
+        Fetch phase: Movidesk companies, NetBox tenants and the JumpServer node index
+        are loaded concurrently, each bounded by its own timeout. Movidesk or NetBox
+        failing aborts the report; JumpServer failing yields None for the node index.
         """
-        try:
-            snapshot_ttl = settings.HUB_SNAPSHOT_TTL or settings.CACHE_TTL
-            allow_stale = settings.HUB_SNAPSHOT_ALLOW_STALE
-            tenant_group_name = self._tenant_group_name()
+        tenant_group_name = self._tenant_group_name()
 
-            # SEMPRE consulta Movidesk REAL para garantir dados atualizados
-            movidesk_companies = await movidesk_svc.get_active_companies()
-            logger.info(f"Carregadas {len(movidesk_companies) if movidesk_companies else 0} empresas do Movidesk REAL")
+        async def load_movidesk() -> List[Dict[str, Any]]:
+            # SEMPRE consulta Movidesk REAL para garantir dados atualizados.
+            # Falha ou lista vazia abortam o relatorio: tratar como "nenhuma empresa"
+            # resolveria todas as pendencias gravadas por causa de uma queda do Movidesk.
+            companies = await movidesk_svc.fetch_active_companies()
+            if not companies:
+                raise RuntimeError("Movidesk nao retornou nenhuma empresa ativa")
+            logger.info(f"Carregadas {len(companies)} empresas do Movidesk REAL")
             try:
-                await upsert_movidesk_companies(movidesk_companies)
+                await upsert_movidesk_companies(companies)
             except Exception as e:
                 logger.warning(f"Falha ao persistir Movidesk localmente: {e}")
+            return companies
 
-            js_assets = await load_jumpserver_snapshot_assets(snapshot_ttl, allow_stale=allow_stale)
-            if js_assets is None:
-                js_assets = await jumpserver_svc.get_assets()
-                try:
-                    await upsert_jumpserver_assets(js_assets)
-                except Exception as e:
-                    logger.warning(f"Falha ao persistir JumpServer localmente: {e}")
-
+        async def load_netbox() -> List[Any]:
             # User requirement: Only tenants from 'K3G Solutions' group
             # SEMPRE consulta NetBox REAL para garantir dados atualizados (custom_fields, group, etc)
-            netbox_tenants = await netbox_svc.get_tenants(**{"group-name": tenant_group_name})
-            logger.info(f"Carregados {len(netbox_tenants) if netbox_tenants else 0} tenants do NetBox REAL (grupo: {tenant_group_name})")
-            
-            # Mapping Netbox tenants
-            nb_by_movidesk_id = {}
-            nb_by_cnpj = {}
-            nb_by_name = {} # Fallback: normalized name
-            
-            for t in netbox_tenants:
-                cf = self._tenant_custom_fields(t)
-                # Support both new 'ERP_ID' and old 'movidesk_id' during transition
-                m_id = str(cf.get('ERP_ID') or cf.get('erp_id') or cf.get('movidesk_id') or "")
-                cnpj = str(cf.get('CNPJ') or cf.get('cnpj') or "")
-
-                if m_id: nb_by_movidesk_id[m_id] = t
-                if cnpj: nb_by_cnpj[cnpj] = t
-
-                # Store by name for fallback lookup (normalized)
-                tenant_name = self._tenant_name(t)
-                if tenant_name:
-                    nb_by_name[tenant_name.upper().strip()] = t
- 
-            # Clear previous pending for fresh report
-            if store_pending:
-                self._pending_actions.clear()
-            
-            report = []
-            for company in movidesk_companies:
-                m_id = str(company.get("id"))
-                cnpj = company.get("cpfCnpj")
-                name_candidates = self._company_name_candidates(company)
-                if not name_candidates:
-                    continue
+            tenants = await netbox_svc.get_tenants(**{"group-name": tenant_group_name})
+            logger.info(f"Carregados {len(tenants) if tenants else 0} tenants do NetBox REAL (grupo: {tenant_group_name})")
+            return tenants
+
+        movidesk_result, netbox_result, jumpserver_result = await asyncio.gather(
+            asyncio.wait_for(load_movidesk(), timeout=settings.SYNC_REPORT_MOVIDESK_TIMEOUT),
+            asyncio.wait_for(load_netbox(), timeout=settings.SYNC_REPORT_NETBOX_TIMEOUT),
+            asyncio.wait_for(jumpserver_svc.get_node_index(), timeout=settings.SYNC_REPORT_JUMPSERVER_TIMEOUT),
+            return_exceptions=True,
+        )
+        for source, result in (("Movidesk", movidesk_result), ("NetBox", netbox_result)):
+            if isinstance(result, BaseException):
+                raise RuntimeError(f"{source} indisponível para o relatório: {result!r}") from result
+        if isinstance(jumpserver_result, BaseException):
+            logger.warning(f"Nodes do JumpServer indisponíveis para o relatório: {jumpserver_result!r}")
+            jumpserver_result = None
+        return movidesk_result, netbox_result or [], jumpserver_result
+
+    def _production_node_paths(self, node_index: NodeIndex) -> Set[str]:
+        """
+        Case-folded, normalized paths of every node under PRODUCTION_NODE_PATH.
+        Built once per report so node checks in the matching loop are set lookups.
+        """
+        return {
+            normalize_path(node.get("full_value") or "").casefold()
+            for node in node_index.descendants(PRODUCTION_NODE_PATH)
+        }
 
-                name = name_candidates[0]
-                name_norm = name.upper().strip()
-
-                # 1. Try match by Movidesk ID or CNPJ
-                matching_tenant = nb_by_movidesk_id.get(m_id) or nb_by_cnpj.get(cnpj)
-                
-                # 2. Try match by Name (Case-Insensitive) as Fallback
-                fallback_match = None
-                if not matching_tenant:
-                    for cand in name_candidates:
-                        cand_norm = cand.upper().strip()
-                        fallback_match = nb_by_name.get(cand_norm)
-                        if fallback_match:
-                            break
-
-                if not matching_tenant and not fallback_match:
-                    # CASE 1: TRUE NEW CLIENT
-                    # Verifica se JumpServer node já existe antes de marcar para criação
-                    node_path = f"/DEFAULT/PRODUÇÃO/{name}"
-                    js_exists = await jumpserver_svc.check_node_exists(node_path)
-
-                    action_id = str(uuid.uuid4())
-                    systems_needed = ["NetBox", "Oxidized"]
-                    details_parts = [f"Tenant '{name}' não encontrado no NetBox."]
-
-                    if not js_exists:
-                        systems_needed.append("JumpServer")
-                        details_parts.append(f"Node JumpServer será criado em '{node_path}'.")
-                    else:
-                        details_parts.append(f"Node JumpServer já existe em '{node_path}'.")
-
-                    action = {
-                        "id": action_id,
-                        "status": "pending_create",
-                        "type": "sync_client",
-                        "client_name": name,
-                        "cnpj": cnpj or "N/A",
-                        "movidesk_id": m_id,
-                        "systems": systems_needed,
-                        "details": " ".join(details_parts)
-                    }
-                    if store_pending:
-                        if store_pending:
-                            self._pending_actions[action_id] = action
-                    report.append(action)
-                
-                elif fallback_match and not matching_tenant:
-                    # CASE 2: NAME MATCHES BUT NO ID LINKED
-                    preferred_name = self._tenant_name(fallback_match) or name
-                    node_paths = [f"/DEFAULT/PRODUÇÃO/{preferred_name}"]
-                    if preferred_name != name:
-                        node_paths.append(f"/DEFAULT/PRODUÇÃO/{name}")
-                    js_exists = False
-                    for node_path in node_paths:
-                        if await jumpserver_svc.check_node_exists(node_path):
-                            js_exists = True
-                            break
-                    
-                    action_id = str(uuid.uuid4())
-                    obs_list = [f"Aviso: Encontrado '{preferred_name}' no NetBox via nome."]
-
-                    if preferred_name != name and self._names_equivalent(preferred_name, name):
-                        obs_list.append(f"Nome alternativo no Movidesk: '{name}'.")
-                    elif preferred_name != name:
-                        obs_list.append(f"Divergência de nome: '{preferred_name}' vs '{name}'.")
-                    
-                    obs_list.append("Sem vínculo com Movidesk ID.")
-                    
-                    if not js_exists:
-                        obs_list.append(f"Node JumpServer ausente em '{node_paths[0]}'.")
-
-                    action = {
-                        "id": action_id,
-                        "status": "pending_update",
-                        "type": "update_client",
-                        "netbox_id": self._tenant_id(fallback_match),
-                        "client_name": preferred_name,
-                        "old_name": preferred_name,
-                        "cnpj": cnpj or "N/A",
-                        "movidesk_id": m_id,
-                        "systems": ["NetBox"],
-                        "details": " | ".join(obs_list) + ". Recomenda-se atualizar."
-                    }
-                    if not js_exists:
-                        action["systems"].append("JumpServer")
-                        
-                    if store_pending:
-                        self._pending_actions[action_id] = action
-                    report.append(action)
+    def _node_exists(self, production_nodes: Set[str], path: str) -> bool:
+        # Case-insensitive, like check_node_exists (avoids false negatives on casing)
+        return normalize_path(path).casefold() in production_nodes
+
+    def _build_name_matcher(self, tenants: List[Any]) -> Optional[NameMatcher]:
+        if not settings.SYNC_FUZZY_MATCH_ENABLED:
+            return None
+        entries = [
+            (self._tenant_id(t), self._tenant_name(t))
+            for t in tenants
+            if self._tenant_id(t) is not None and self._tenant_name(t)
+        ]
+        return NameMatcher(entries, normalize)
+
+    def _fuzzy_candidates(
+        self,
+        names: List[str],
+        name_matcher: NameMatcher,
+        tenant_index: TenantIndex,
+        movidesk_id: str,
+    ) -> List[Dict[str, Any]]:
+        """Ranked fuzzy hits, leaving out tenants already linked to another Movidesk company."""
+        limit = settings.SYNC_FUZZY_MATCH_CANDIDATES
+        ranked = name_matcher.rank(names, limit=limit * 3, min_score=settings.SYNC_FUZZY_MATCH_MIN_SCORE)
+        candidates = []
+        for hit in ranked:
+            tenant = tenant_index.by_id(hit["value"])
+            linked_to = tenant_erp_id(tenant) if tenant else ""
+            if linked_to and linked_to != movidesk_id:
+                continue
+            candidates.append({**hit, "netbox_id": hit["value"]})
+        return candidates[:limit]
 
-                else:
-                    # CASE 3: MATCHED BY ID/CNPJ (FULLY IDENTIFIED)
-                    tenant_name = self._tenant_name(matching_tenant) or name
-                    equivalent_name = self._name_in_candidates(tenant_name, name_candidates)
-                    preferred_name = tenant_name if equivalent_name else name
-                    node_paths = [f"/DEFAULT/PRODUÇÃO/{preferred_name}"]
-                    if preferred_name != name:
-                        node_paths.append(f"/DEFAULT/PRODUÇÃO/{name}")
-                    js_exists = False
-                    for node_path in node_paths:
-                        if await jumpserver_svc.check_node_exists(node_path):
-                            js_exists = True
-                            break
-
-                    name_mismatch = (not equivalent_name) and tenant_name != name
-                    case_only_mismatch = (not equivalent_name) and (tenant_name.upper() == name.upper()) and name_mismatch
-
-                    if name_mismatch or not js_exists:
-                        action_id = str(uuid.uuid4())
-                        obs_list = []
-
-                        if name_mismatch:
-                            if case_only_mismatch:
-                                obs_list.append(f"Variação de caixa: '{tenant_name}' vs '{name}'.")
-                            else:
-                                obs_list.append(f"Divergência de nome: '{tenant_name}' vs '{name}'.")
-                        
-                        if not js_exists:
-                            obs_list.append(f"Node JumpServer ausente em '{node_paths[0]}'.")
-
-                        action = {
-                            "id": action_id,
-                            "status": "pending_update",
-                            "type": "update_client",
-                            "netbox_id": self._tenant_id(matching_tenant),
-                            "client_name": preferred_name,
-                            "old_name": tenant_name,
-                            "cnpj": cnpj or "N/A",
-                            "movidesk_id": m_id,
-                            "systems": ["NetBox"] if name_mismatch else [],
-                            "details": " | ".join(obs_list) + ". Sugerido sincronizar."
-                        }
-                        if not js_exists:
-                            action["systems"].append("JumpServer")
-                            
-                        self._pending_actions[action_id] = action
-                        report.append(action)
+    def _fuzzy_match(self, name_candidates: List[str], candidates: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        The fuzzy candidate that may be adopted without review, if any. Character
+        similarity alone never qualifies: the shared tokens must reach the threshold,
+        the numeric tokens must be the same ("CLIENTE 01" is not "CLIENTE 02") and no
+        other candidate may reach the threshold.
+        """
+        threshold = settings.SYNC_FUZZY_MATCH_THRESHOLD
+        above = [c for c in candidates if c["score"] >= threshold]
+        if len(above) != 1 or above[0]["token_score"] < threshold:
+            return None
+        best = above[0]
+        best_numbers = numeric_tokens(best["tokens"])
+        if not any(numeric_tokens(normalize(name)) == best_numbers for name in name_candidates):
+            return None
+        return best
+
+    def _with_action_id(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Give an action an id derived from its company, type and content: re-running a
+        report (on any worker) yields the same id for the same proposed change, so
+        approvals stay valid, while a different proposal never reuses an approved id.
+        """
+        content = json.dumps(action, ensure_ascii=True, sort_keys=True, default=str)
+        digest = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        name = f"{action['movidesk_id']}:{action['type']}:{digest}"
+        return {"id": str(uuid.uuid5(SYNC_ACTION_ID_NAMESPACE, name)), **action}
+
+    def _match_company(
+        self,
+        company: Dict[str, Any],
+        tenant_index: TenantIndex,
+        production_nodes: Set[str],
+        name_matcher: Optional[NameMatcher] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Build the report entry of one Movidesk company (None when it has no usable name)."""
+        m_id = str(company.get("id"))
+        cnpj = company.get("cpfCnpj")
+        name_candidates = self._company_name_candidates(company)
+        if not name_candidates:
+            return None
+
+        name = name_candidates[0]
+        candidate_keys = {normalize(cand) for cand in name_candidates}
+
+        # 1. Try match by Movidesk ID or CNPJ
+        matching_tenant = tenant_index.by_erp_id(m_id) or tenant_index.by_cnpj(cnpj)
+
+        # 2. Try match by Name (Case-Insensitive) as Fallback
+        fallback_match = None
+        if not matching_tenant:
+            for cand in name_candidates:
+                fallback_match = tenant_index.by_normalized_name(cand)
+                if fallback_match:
+                    break
+
+        # 3. Fuzzy name match: adopted only when unambiguous (see _fuzzy_match),
+        #    otherwise listed on the action for review
+        candidates: List[Dict[str, Any]] = []
+        fuzzy_score = None
+        if not matching_tenant and not fallback_match and name_matcher is not None:
+            ranked = self._fuzzy_candidates(name_candidates, name_matcher, tenant_index, m_id)
+            accepted = self._fuzzy_match(name_candidates, ranked)
+            if accepted:
+                fallback_match = tenant_index.by_id(accepted["netbox_id"])
+                fuzzy_score = accepted["score"]
+            candidates = [{"netbox_id": c["netbox_id"], "name": c["name"], "score": c["score"]} for c in ranked]
+
+        if not matching_tenant and not fallback_match:
+            # CASE 1: TRUE NEW CLIENT
+            # Verifica se JumpServer node já existe antes de marcar para criação
+            node_path = f"{PRODUCTION_NODE_PATH}/{name}"
+            js_exists = self._node_exists(production_nodes, node_path)
+
+            systems_needed = ["NetBox", "Oxidized"]
+            details_parts = [f"Tenant '{name}' não encontrado no NetBox."]
+
+            if not js_exists:
+                systems_needed.append("JumpServer")
+                details_parts.append(f"Node JumpServer será criado em '{node_path}'.")
+            else:
+                details_parts.append(f"Node JumpServer já existe em '{node_path}'.")
+            if candidates:
+                similar = ", ".join(f"'{c['name']}' ({c['score']:.2f})" for c in candidates)
+                details_parts.append(f"Nomes parecidos no NetBox para revisão: {similar}.")
+
+            action = {
+                "status": "pending_create",
+                "type": "sync_client",
+                "client_name": name,
+                "cnpj": cnpj or "N/A",
+                "movidesk_id": m_id,
+                "systems": systems_needed,
+                "details": " ".join(details_parts)
+            }
+            if candidates:
+                action["candidates"] = candidates
+            return self._with_action_id(action)
+
+        elif fallback_match and not matching_tenant:
+            # CASE 2: NAME MATCHES BUT NO ID LINKED
+            preferred_name = self._tenant_name(fallback_match) or name
+            node_paths = [f"{PRODUCTION_NODE_PATH}/{preferred_name}"]
+            if preferred_name != name:
+                node_paths.append(f"{PRODUCTION_NODE_PATH}/{name}")
+            js_exists = False
+            for node_path in node_paths:
+                if self._node_exists(production_nodes, node_path):
+                    js_exists = True
+                    break
+
+            if fuzzy_score is not None:
+                obs_list = [f"Aviso: Encontrado '{preferred_name}' no NetBox por similaridade de nome ({fuzzy_score:.2f})."]
+            else:
+                obs_list = [f"Aviso: Encontrado '{preferred_name}' no NetBox via nome."]
+
+            if preferred_name != name and names_equivalent(preferred_name, name):
+                obs_list.append(f"Nome alternativo no Movidesk: '{name}'.")
+            elif preferred_name != name:
+                obs_list.append(f"Divergência de nome: '{preferred_name}' vs '{name}'.")
+
+            obs_list.append("Sem vínculo com Movidesk ID.")
+
+            if not js_exists:
+                obs_list.append(f"Node JumpServer ausente em '{node_paths[0]}'.")
+
+            action = {
+                "status": "pending_update",
+                "type": "update_client",
+                "netbox_id": self._tenant_id(fallback_match),
+                "client_name": preferred_name,
+                "old_name": preferred_name,
+                "cnpj": cnpj or "N/A",
+                "movidesk_id": m_id,
+                "systems": ["NetBox"],
+                "details": " | ".join(obs_list) + ". Recomenda-se atualizar."
+            }
+            if not js_exists:
+                action["systems"].append("JumpServer")
+            if candidates:
+                action["candidates"] = candidates
+
+            return self._with_action_id(action)
+
+        else:
+            # CASE 3: MATCHED BY ID/CNPJ (FULLY IDENTIFIED)
+            tenant_name = self._tenant_name(matching_tenant) or name
+            equivalent_name = key_in(tenant_name, candidate_keys)
+            preferred_name = tenant_name if equivalent_name else name
+            node_paths = [f"{PRODUCTION_NODE_PATH}/{preferred_name}"]
+            if preferred_name != name:
+                node_paths.append(f"{PRODUCTION_NODE_PATH}/{name}")
+            js_exists = False
+            for node_path in node_paths:
+                if self._node_exists(production_nodes, node_path):
+                    js_exists = True
+                    break
+
+            name_mismatch = (not equivalent_name) and tenant_name != name
+            case_only_mismatch = (not equivalent_name) and (tenant_name.upper() == name.upper()) and name_mismatch
+
+            if name_mismatch or not js_exists:
+                obs_list = []
+
+                if name_mismatch:
+                    if case_only_mismatch:
+                        obs_list.append(f"Variação de caixa: '{tenant_name}' vs '{name}'.")
                     else:
-                        # Already synced (Exactly identical name and JS node exists)
-                        report.append({
-                            "id": f"synced-{m_id}",
-                            "status": "synced",
-                            "type": "synced",
-                            "client_name": name,
-                            "cnpj": cnpj or "N/A",
-                            "movidesk_id": m_id,
-                            "systems": ["NetBox", "JumpServer", "Oxidized"],
-                            "details": "Sincronizado e validado (Nome idêntico e Node OK)."
-                        })
+                        obs_list.append(f"Divergência de nome: '{tenant_name}' vs '{name}'.")
+
+                if not js_exists:
+                    obs_list.append(f"Node JumpServer ausente em '{node_paths[0]}'.")
+
+                action = {
+                    "status": "pending_update",
+                    "type": "update_client",
+                    "netbox_id": self._tenant_id(matching_tenant),
+                    "client_name": preferred_name,
+                    "old_name": tenant_name,
+                    "cnpj": cnpj or "N/A",
+                    "movidesk_id": m_id,
+                    "systems": ["NetBox"] if name_mismatch else [],
+                    "details": " | ".join(obs_list) + ". Sugerido sincronizar."
+                }
+                if not js_exists:
+                    action["systems"].append("JumpServer")
+
+                return self._with_action_id(action)
+            else:
+                # Already synced (Exactly identical name and JS node exists)
+                return {
+                    "id": f"synced-{m_id}",
+                    "status": "synced",
+                    "type": "synced",
+                    "client_name": name,
+                    "cnpj": cnpj or "N/A",
+                    "movidesk_id": m_id,
+                    "systems": ["NetBox", "JumpServer", "Oxidized"],
+                    "details": "Sincronizado e validado (Nome idêntico e Node OK)."
+                }
+
+    def _fuzzy_inputs_version(self, tenant_index: TenantIndex, production_nodes: Set[str]) -> str:
+        """What a fuzzy match depends on beyond the company itself: every tenant and node."""
+        material = json.dumps([tenant_index.version(), sorted(production_nodes)], ensure_ascii=True)
+        return hashlib.sha1(material.encode("utf-8")).hexdigest()
+
+    def _company_fingerprint(
+        self,
+        company: Dict[str, Any],
+        tenant_index: TenantIndex,
+        production_nodes: Set[str],
+        fuzzy_inputs: Optional[str] = None,
+    ) -> str:
+        """
+        Hash of the inputs _match_company looks at: the company fields, the tenants
+        reachable by ERP_ID/CNPJ/name and which candidate JumpServer nodes exist.
+        Companies with no such tenant may be fuzzy-matched against any tenant, so
+        theirs also covers `fuzzy_inputs` (see _fuzzy_inputs_version); nothing is
+        ranked here.
+        """
+        m_id = str(company.get("id"))
+        cnpj = company.get("cpfCnpj")
+        name_candidates = self._company_name_candidates(company)
+        tenants = [tenant_index.by_erp_id(m_id), tenant_index.by_cnpj(cnpj)]
+        tenants.extend(tenant_index.by_normalized_name(cand) for cand in name_candidates)
+        tenant_parts = []
+        names = list(name_candidates)
+        for tenant in tenants:
+            if not tenant:
+                tenant_parts.append(None)
+                continue
+            cf = self._tenant_custom_fields(tenant)
+            tenant_parts.append([self._tenant_id(tenant), self._tenant_name(tenant), cf.get("ERP_ID"), cf.get("CNPJ")])
+            if self._tenant_name(tenant):
+                names.append(self._tenant_name(tenant))
+        fuzzy = fuzzy_inputs if not any(tenant_parts) else None
+        nodes = sorted({n for n in names if self._node_exists(production_nodes, f"{PRODUCTION_NODE_PATH}/{n}")})
+        material = json.dumps([m_id, cnpj, name_candidates, tenant_parts, fuzzy, nodes], ensure_ascii=True, default=str)
+        return hashlib.sha1(material.encode("utf-8")).hexdigest()
+
+    def _match_companies(
+        self,
+        movidesk_companies: List[Dict[str, Any]],
+        tenant_index: TenantIndex,
+        production_nodes: Set[str],
+        store_pending: bool,
+        name_matcher: Optional[NameMatcher] = None,
+    ) -> List[Dict[str, Any]]:
+        """Matching phase: pure in-memory comparison of the loaded sources (no I/O)."""
+        # Clear previous pending for fresh report
+        if store_pending:
+            self._pending_actions.clear()
+
+        report = []
+        for company in movidesk_companies:
+            action = self._match_company(company, tenant_index, production_nodes, name_matcher)
+            if action is None:
+                continue
+            if store_pending and action["status"] != "synced":
+                self._pending_actions[action["id"]] = action
+            report.append(action)
+        return report
+
+    def _match_companies_incremental(
+        self,
+        movidesk_companies: List[Dict[str, Any]],
+        tenant_index: TenantIndex,
+        production_nodes: Set[str],
+        name_matcher: Optional[NameMatcher] = None,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+        """
+        Re-run matching only for companies whose fingerprint changed since the last run;
+        unchanged ones keep their previous entry (and action id, so approvals stay valid).
+        Returns (full report, {"added", "changed", "resolved"}).
+        """
+        delta: Dict[str, List[Dict[str, Any]]] = {"added": [], "changed": [], "resolved": []}
+        fuzzy_inputs = self._fuzzy_inputs_version(tenant_index, production_nodes) if name_matcher is not None else None
+        previous = self._company_state
+        current: Dict[str, Dict[str, Any]] = {}
+        report = []
+        for company in movidesk_companies:
+            m_id = str(company.get("id"))
+            fingerprint = self._company_fingerprint(company, tenant_index, production_nodes, fuzzy_inputs)
+            state = previous.get(m_id)
+            if state and state["fingerprint"] == fingerprint:
+                action = state["action"]
+                if action["status"] != "synced":
+                    # Still pending (e.g. a failed execution): keep it approvable
+                    self._pending_actions.setdefault(action["id"], action)
+            else:
+                action = self._match_company(company, tenant_index, production_nodes, name_matcher)
+                if action is None:
+                    continue
+                if state is None:
+                    delta["added"].append(action)
+                else:
+                    delta["changed"].append(action)
+                    old = state["action"]
+                    if old["status"] != "synced":
+                        self._pending_actions.pop(old["id"], None)
+                        if action["status"] == "synced":
+                            delta["resolved"].append(old)
+                if action["status"] != "synced":
+                    self._pending_actions[action["id"]] = action
+            current[m_id] = {"fingerprint": fingerprint, "action": action}
+            report.append(action)
+
+        # Companies gone from Movidesk (or without a usable name anymore)
+        for m_id, state in previous.items():
+            if m_id not in current and state["action"]["status"] != "synced":
+                self._pending_actions.pop(state["action"]["id"], None)
+                delta["resolved"].append(state["action"])
+        self._company_state = current
+        return report, delta
+
+    async def generate_sync_report(self, store_pending: bool = True, full: bool = False) -> List[Dict[str, Any]]:
+        """
+        Compare systems and generate a report of pending actions.
+        With SYNC_REPORT_INCREMENTAL, only companies whose inputs changed are re-matched
+        and only added/changed/resolved actions are persisted; `full` forces a rebuild.
+        """
+        try:
+            movidesk_companies, netbox_tenants, node_index = await self._load_report_sources()
+            self._last_report_stored = store_pending
+            if node_index is None:
+                # Nodes are reported as missing, as before; but a partial view must not
+                # resolve, supersede or replace what is stored, nor be approved
+                node_index = NodeIndex()
+                if store_pending:
+                    logger.warning("Relatorio sem nodes do JumpServer: nao sera gravado nem liberado para aprovacao.")
+                    store_pending = False
+                    self._last_report_stored = False
+
+            # Mapping Netbox tenants (ERP_ID / CNPJ / normalized name), reused by execute_actions
+            tenant_index = TenantIndex(netbox_tenants)
+            self._tenant_index = tenant_index
+
+            production_nodes = self._production_node_paths(node_index)
+            name_matcher = self._build_name_matcher(netbox_tenants)
+            if store_pending and settings.SYNC_REPORT_INCREMENTAL:
+                if full:
+                    self._company_state = {}
+                    self._pending_actions.clear()
+                report, delta = self._match_companies_incremental(
+                    movidesk_companies, tenant_index, production_nodes, name_matcher
+                )
+                to_persist = delta["added"] + delta["changed"]
+            elif store_pending:
+                report = self._match_companies(
+                    movidesk_companies, tenant_index, production_nodes, store_pending, name_matcher
+                )
+                delta = {"added": report, "changed": [], "resolved": []}
+                to_persist = report
+            else:
+                # Summary-only run: nothing here can be approved, so nothing is persisted
+                report = self._match_companies(
+                    movidesk_companies, tenant_index, production_nodes, store_pending, name_matcher
+                )
+                delta = {"added": report, "changed": [], "resolved": []}
+                to_persist = []
+            self._last_report_delta = {key: len(value) for key, value in delta.items()}
+            logger.info(
+                f"Relatorio de sync: {len(report)} empresas, {len(delta['added'])} novas, "
+                f"{len(delta['changed'])} alteradas, {len(delta['resolved'])} resolvidas"
+            )
 
+            self._last_report = report
+            self._last_report_at = datetime.now(timezone.utc)
             try:
-                await upsert_sync_actions(report)
+                if to_persist:
+                    await upsert_sync_actions(to_persist)
+                for action in delta["resolved"]:
+                    # Only a still-approvable row: never an action being executed or already done
+                    await update_sync_action_status(
+                        action["id"],
+                        "resolved",
+                        "Resolvido: origem nao apresenta mais divergencia.",
+                        expected_status=SYNC_ACTION_CLAIMABLE_STATUSES,
+                    )
+                if store_pending:
+                    # The stored pending set is what every worker approves against
+                    await supersede_sync_actions(self._pending_actions.keys())
+                    # Replicas that do not run the scan serve their status from here
+                    summary = self.get_last_report_summary()
+                    summary.pop("jumpserver_cache", None)
+                    await save_hub_state(REPORT_STATE_KEY, summary)
             except Exception as e:
                 logger.warning(f"Falha ao persistir relatorio de sync: {e}")
-            self._last_report = report
-            self._last_report_at = datetime.now(timezone.utc)
             return report
         except Exception as e:
+            # Callers record the failure; nothing stored or cached was touched
             logger.error(f"Error generating sync report: {e}")
-            return []
+            raise
+
+    def _movidesk_id_value(self, action: Dict[str, Any]) -> Any:
+        # Convert Movidesk ID to int for NetBox compatibility
+        try:
+            return int(action["movidesk_id"])
+        except (TypeError, ValueError):
+            return action["movidesk_id"]
+
+    def _tenant_create_payload(self, action: Dict[str, Any], group_id: Optional[int]) -> Dict[str, Any]:
+        payload = {
+            "name": action["client_name"],
+            "slug": action["client_name"].lower().replace(" ", "-")[:50],
+            "description": f"Sincronizado via Movidesk ID: {action['movidesk_id']}",
+            "custom_fields": {
+                "ERP_ID": self._movidesk_id_value(action),
+                "CNPJ": action["cnpj"]
+            },
+        }
+        if group_id:
+            payload["group"] = group_id
+        return payload
+
+    def _tenant_update_payload(self, action: Dict[str, Any], tenant: Any) -> Tuple[Dict[str, Any], List[str]]:
+        cf = self._tenant_custom_fields(tenant)
+        conflicts = []
+        new_cf = {}
+
+        # Check ERP_ID
+        curr_erp = cf.get('ERP_ID') or cf.get('erp_id') or cf.get('movidesk_id')
+        m_id_val = self._movidesk_id_value(action)
+        if curr_erp and str(curr_erp) != str(m_id_val):
+            conflicts.append(f"ERP_ID ({curr_erp} vs {m_id_val})")
+        else:
+            new_cf["ERP_ID"] = m_id_val
+
+        # Check CNPJ
+        curr_cnpj = cf.get('CNPJ') or cf.get('cnpj')
+        if curr_cnpj and str(curr_cnpj) != str(action["cnpj"]):
+            conflicts.append(f"CNPJ ({curr_cnpj} vs {action['cnpj']})")
+        else:
+            new_cf["CNPJ"] = action["cnpj"]
+
+        update_payload = {"id": self._tenant_id(tenant), "name": action["client_name"]}
+        if new_cf:
+            update_payload["custom_fields"] = new_cf
+        return update_payload, conflicts
+
+    async def _get_tenant_index(self) -> TenantIndex:
+        """
+        Tenant index of the configured group: the one built by the last report while
+        fresh, otherwise the local snapshot, otherwise a single NetBox listing.
+        """
+        ttl = settings.CACHE_TTL
+        if self._tenant_index is not None and self._tenant_index.is_fresh(ttl):
+            return self._tenant_index
+        group_name = self._tenant_group_name()
+        tenants = None
+        try:
+            tenants = await load_netbox_snapshot_tenants(group_name, settings.HUB_SNAPSHOT_TTL or ttl)
+        except Exception as e:
+            logger.warning(f"Falha ao carregar tenants do snapshot local: {e}")
+        if tenants is not None:
+            self._tenant_index = TenantIndex(tenants, source="snapshot")
+        else:
+            self._tenant_index = TenantIndex(await netbox_svc.get_tenants(**{"group-name": group_name}))
+        return self._tenant_index
+
+    def _find_existing_tenant(self, action: Dict[str, Any], index: TenantIndex) -> Optional[Any]:
+        """Resolve the tenant of an update_client action (id, then ERP_ID, then name in the group)."""
+        tenant = index.by_id(action.get("netbox_id")) or index.by_erp_id(action.get("movidesk_id"))
+        if not tenant:
+            tenant = index.by_name(action["client_name"])
+            if tenant:
+                logger.warning(f"Tenant '{action['client_name']}' found by name match (not by ERP_ID)")
+        return tenant
+
+    async def _run_bulk(
+        self,
+        items: List[Tuple[str, Dict[str, Any]]],
+        bulk_fn: Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]],
+        on_saved: Callable[[List[str]], None],
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Send (action_id, payload) items to a NetBox bulk endpoint in chunks, run
+        concurrently on the executor's "netbox" slots. `on_saved` is called with the
+        action ids of each chunk as soon as NetBox accepts it.
+        Returns {action_id: {"object": saved object or None, "error": message or None}}.
+        """
+        outcomes: Dict[str, Dict[str, Any]] = {}
+        chunk_size = max(1, settings.NETBOX_BULK_CHUNK_SIZE)
+        chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+        async def send(chunk: List[Tuple[str, Dict[str, Any]]]) -> None:
+            saved = await bulk_fn([payload for _, payload in chunk])
+            # NetBox answers bulk writes in request order
+            for index, (aid, _) in enumerate(chunk):
+                outcomes[aid] = {"object": saved[index] if index < len(saved) else None, "error": None}
+            on_saved([aid for aid, _ in chunk])
+
+        retry: List[Tuple[str, Dict[str, Any]]] = []
+        for chunk, result in zip(chunks, await self._executor.map(chunks, send, system="netbox")):
+            if not isinstance(result, BaseException):
+                continue
+            if len(chunk) == 1:
+                outcomes[chunk[0][0]] = {"object": None, "error": str(result)}
+                continue
+            logger.warning(f"Lote de {len(chunk)} tenants rejeitado pelo NetBox ({result}); reenviando item a item.")
+            retry.extend(chunk)
+
+        # Bulk writes are atomic: retry one by one so a bad item does not fail the whole chunk
+        singles = [[item] for item in retry]
+        for single, result in zip(singles, await self._executor.map(singles, send, system="netbox")):
+            if isinstance(result, BaseException):
+                outcomes[single[0][0]] = {"object": None, "error": str(result)}
+        return outcomes
+
+    async def _claim_actions(self, action_ids: List[str]) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+        """
+        Take ownership of approved actions. The claim is a compare-and-set on
+        MovideskSyncAction.status, so an approval can land on any worker and an action
+        never runs twice; _pending_actions is only a read-through cache of the payloads.
+        Without a database, falls back to this process' pending actions.
+        Returns ({id: action}, whether the claim went through the store).
+        """
+        try:
+            rows = await claim_sync_actions(action_ids, settings.SYNC_ACTION_CLAIM_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Falha ao reservar acoes no banco, usando pendencias locais: {e}")
+            rows = None
+        if rows is None:
+            local = {aid: self._pending_actions[aid] for aid in action_ids if aid in self._pending_actions}
+            return local, False
+
+        claimed: Dict[str, Dict[str, Any]] = {}
+        for aid, payload in rows.items():
+            action = self._pending_actions.get(aid) or payload
+            if not action.get("type") or not action.get("client_name"):
+                logger.error(f"Sync action {aid} sem payload valido no banco.")
+                await update_sync_action_status(aid, "error", "Payload da acao invalido.", expected_status="executing")
+                continue
+            self._pending_actions[aid] = action
+            claimed[aid] = action
+        return claimed, True
 
     async def execute_actions(self, action_ids: List[str]) -> List[Dict[str, Any]]:
-        results = []
-        tenant_group_name = self._tenant_group_name()
-        for aid in action_ids:
-            action = self._pending_actions.get(aid)
+        """
+        Execute approved actions on the bounded parallel executor.
+        Actions are claimed first (see _claim_actions), so approvals may hit any worker.
+        NetBox creates/updates go out as concurrent bulk POST/PATCH chunks
+        (NETBOX_BULK_CHUNK_SIZE each); as soon as a chunk is accepted, the JumpServer
+        nodes of its clients are ensured, so each client still gets its tenant before
+        its node. Status updates are written concurrently at the end.
+        """
+        outcomes: Dict[str, Dict[str, Any]] = {}
+        creates: List[Tuple[str, Dict[str, Any]]] = []
+        updates: List[Tuple[str, Dict[str, Any]]] = []
+        conflicts_by_action: Dict[str, List[str]] = {}
+        node_paths: Dict[str, str] = {}
+        created_by_update: set = set()
+
+        expired: set = set()
+        actions: List[Tuple[str, Dict[str, Any]]] = []
+        requested = list(dict.fromkeys(action_ids))
+        claimed, from_store = await self._claim_actions(requested)
+        for aid in requested:
+            action = claimed.get(aid)
             if not action:
-                results.append({"id": aid, "status": "error", "message": "Ação expirou ou não existe."})
+                expired.add(aid)
+                outcomes[aid] = {"id": aid, "status": "error", "message": "Ação expirou ou não existe."}
                 continue
-            
-            try:
-                if action["type"] == "sync_client":
-                    # 1. NetBox - Ensure group exists or get ID
-                    group = await netbox_svc.get_tenant_group_by_name(tenant_group_name)
-                    group_id = group.id if group else None
+            actions.append((aid, action))
+        actions_by_id = dict(actions)
 
-                    # Convert Movidesk ID to int for NetBox compatibility
-                    try:
-                        m_id_val = int(action["movidesk_id"])
-                    except:
-                        m_id_val = action["movidesk_id"]
-
-                    tenant = await netbox_svc.create_tenant(
-                        name=action["client_name"],
-                        slug=action["client_name"].lower().replace(" ", "-")[:50],
-                        description=f"Sincronizado via Movidesk ID: {action['movidesk_id']}",
-                        custom_fields={
-                            "ERP_ID": m_id_val,
-                            "CNPJ": action["cnpj"]
-                        },
-                        group_id=group_id
+        # 1. Resolve tenants of update_client actions from the tenant index; the linked
+        #    ids are re-read in one call so conflict checks see current custom fields
+        index: Optional[TenantIndex] = None
+        if any(a["type"] == "update_client" for _, a in actions):
+            try:
+                index = await self._get_tenant_index()
+            except Exception as e:
+                logger.warning(f"Falha ao carregar indice de tenants do NetBox: {e}")
+                index = TenantIndex()
+            wanted_ids = [a.get("netbox_id") for _, a in actions if a["type"] == "update_client" and a.get("netbox_id")]
+            if wanted_ids:
+                try:
+                    for t in await netbox_svc.get_tenants_by_ids(wanted_ids):
+                        index.add(t)
+                except Exception as e:
+                    logger.warning(f"Falha ao buscar tenants em lote no NetBox: {e}")
+            # ERP_ID is looked up across every tenant group, as before the index: a
+            # linked tenant moved out of the configured group must not be recreated
+            missing_erp_ids = list(dict.fromkeys(
+                str(a["movidesk_id"]) for _, a in actions
+                if a["type"] == "update_client" and a.get("movidesk_id")
+                and not index.by_id(a.get("netbox_id")) and not index.by_erp_id(a["movidesk_id"])
+            ))
+            if missing_erp_ids:
+                try:
+                    found = await asyncio.gather(
+                        *(netbox_svc.get_tenant_by_custom_field("ERP_ID", m_id) for m_id in missing_erp_ids)
                     )
+                    for t in found:
+                        if t:
+                            index.add(t)
+                except Exception as e:
+                    logger.warning(f"Falha ao buscar tenants por ERP_ID no NetBox: {e}")
 
-                    # 2. JumpServer - só cria se estiver na lista de sistemas
-                    node_path = f"/DEFAULT/PRODUÇÃO/{action['client_name']}"
+        pending_creates: List[Tuple[str, Dict[str, Any]]] = []
+        for aid, action in actions:
+            node_path = f"{PRODUCTION_NODE_PATH}/{action['client_name']}"
+            try:
+                if action["type"] == "sync_client":
+                    pending_creates.append((aid, action))
+                    # JumpServer - só cria se estiver na lista de sistemas
                     if "JumpServer" in action.get("systems", []):
-                        await jumpserver_svc.ensure_node_path(node_path)
-                        logger.info(f"Node JumpServer criado/verificado: {node_path}")
+                        node_paths[aid] = node_path
                     else:
                         logger.info(f"Node JumpServer já existe (skip): {node_path}")
-
-                    # 3. Oxidized (Logic to create group if possible)
-                    # For now we assume the group is ready or assigned in metadata.
-
-                    results.append({"id": aid, "status": "success", "client": action["client_name"]})
-                    try:
-                        await update_sync_action_status(aid, "success")
-                    except Exception as e:
-                        logger.warning(f"Falha ao atualizar sync action {aid}: {e}")
-                    del self._pending_actions[aid]
-
                 elif action["type"] == "update_client":
-                    # Update or Create Netbox Tenant
-                    nb_id = action.get("netbox_id")
-                    tenant = None
-
-                    # Try multiple strategies to find existing tenant
-                    if nb_id:
-                        tenant = await netbox_svc.get_tenant_by_id(nb_id)
-
-                    if not tenant:
-                        # Fallback 1: Search by ERP_ID
-                        tenant = await netbox_svc.get_tenant_by_custom_field("ERP_ID", action["movidesk_id"]) or \
-                                 await netbox_svc.get_tenant_by_custom_field("erp_id", action["movidesk_id"]) or \
-                                 await netbox_svc.get_tenant_by_custom_field("movidesk_id", action["movidesk_id"])
-
-                    if not tenant:
-                        # Fallback 2: Search by name in the same group
-                        tenants = await netbox_svc.get_tenants(**{"group-name": tenant_group_name})
-                        for t in tenants:
-                            if t.name == action["client_name"]:
-                                tenant = t
-                                logger.warning(f"Tenant '{action['client_name']}' found by name match (not by ERP_ID)")
-                                break
-
-                    # If tenant doesn't exist in Netbox, create it
+                    tenant = self._find_existing_tenant(action, index)
                     if not tenant:
                         logger.info(f"Tenant '{action['client_name']}' não encontrado no Netbox. Criando novo tenant.")
-
-                        # Get or use group
-                        group = await netbox_svc.get_tenant_group_by_name(tenant_group_name)
-                        group_id = group.id if group else None
-
-                        # Convert Movidesk ID to int for NetBox compatibility
-                        try:
-                            m_id_val = int(action["movidesk_id"])
-                        except:
-                            m_id_val = action["movidesk_id"]
-
-                        tenant = await netbox_svc.create_tenant(
-                            name=action["client_name"],
-                            slug=action["client_name"].lower().replace(" ", "-")[:50],
-                            description=f"Sincronizado via Movidesk ID: {action['movidesk_id']}",
-                            custom_fields={
-                                "ERP_ID": m_id_val,
-                                "CNPJ": action["cnpj"]
-                            },
-                            group_id=group_id
-                        )
-
-                        # Create JumpServer node
-                        node_path = f"/DEFAULT/PRODUÇÃO/{action['client_name']}"
-                        await jumpserver_svc.ensure_node_path(node_path)
-
-                        results.append({"id": aid, "status": "success", "client": action["client_name"], "message": "Tenant criado no Netbox e node criado no Jumpserver"})
-                        try:
-                            await update_sync_action_status(aid, "success", "Tenant criado no Netbox e node criado no Jumpserver")
-                        except Exception as e:
-                            logger.warning(f"Falha ao atualizar sync action {aid}: {e}")
-                        del self._pending_actions[aid]
-                        continue
-                    else:
-                        # Use found tenant's ID
-                        nb_id = tenant.id
-                        logger.info(f"Tenant '{action['client_name']}' encontrado no Netbox (ID: {nb_id}). Atualizando...")
-
-                    # Tenant exists, update it
-                    cf = getattr(tenant, 'custom_fields', {}) or {}
-                    conflicts = []
-                    new_cf = {}
-
-                    # Check ERP_ID
-                    curr_erp = cf.get('ERP_ID') or cf.get('erp_id') or cf.get('movidesk_id')
-                    try:
-                        m_id_val = int(action["movidesk_id"])
-                    except:
-                        m_id_val = action["movidesk_id"]
-
-                    if curr_erp and str(curr_erp) != str(m_id_val):
-                        conflicts.append(f"ERP_ID ({curr_erp} vs {m_id_val})")
-                    else:
-                        new_cf["ERP_ID"] = m_id_val
-
-                    # Check CNPJ
-                    curr_cnpj = cf.get('CNPJ') or cf.get('cnpj')
-                    if curr_cnpj and str(curr_cnpj) != str(action["cnpj"]):
-                        conflicts.append(f"CNPJ ({curr_cnpj} vs {action['cnpj']})")
+                        pending_creates.append((aid, action))
+                        created_by_update.add(aid)
                     else:
-                        new_cf["CNPJ"] = action["cnpj"]
-
-                    update_payload = {"name": action["client_name"]}
-                    if new_cf:
-                        update_payload["custom_fields"] = new_cf
-
-                    await netbox_svc.update_tenant(nb_id, update_payload)
-
-                    # Ensure JumpServer node exists
-                    node_path = f"/DEFAULT/PRODUÇÃO/{action['client_name']}"
-                    await jumpserver_svc.ensure_node_path(node_path)
-
-                    if conflicts:
-                        results.append({
-                            "id": aid,
-                            "status": "warning",
-                            "message": f"Sincronizado parcial. Conflito em: {', '.join(conflicts)}",
-                            "client": action["client_name"]
-                        })
-                        try:
-                            await update_sync_action_status(aid, "warning", f"Sincronizado parcial. Conflito em: {', '.join(conflicts)}")
-                        except Exception as e:
-                            logger.warning(f"Falha ao atualizar sync action {aid}: {e}")
-                    else:
-                        results.append({"id": aid, "status": "success", "client": action["client_name"]})
-                        try:
-                            await update_sync_action_status(aid, "success")
-                        except Exception as e:
-                            logger.warning(f"Falha ao atualizar sync action {aid}: {e}")
-
-                    del self._pending_actions[aid]
-
+                        logger.info(f"Tenant '{action['client_name']}' encontrado no Netbox (ID: {self._tenant_id(tenant)}). Atualizando...")
+                        payload, conflicts = self._tenant_update_payload(action, tenant)
+                        updates.append((aid, payload))
+                        conflicts_by_action[aid] = conflicts
+                    node_paths[aid] = node_path
             except Exception as e:
                 logger.error(f"Error executing action {aid}: {e}")
-                results.append({"id": aid, "status": "error", "message": str(e)})
-                try:
-                    await update_sync_action_status(aid, "error", str(e))
-                except Exception as err:
-                    logger.warning(f"Falha ao atualizar sync action {aid}: {err}")
-        
+                outcomes[aid] = {"id": aid, "status": "error", "message": str(e)}
+
+        # JumpServer nodes are requested per accepted NetBox chunk; a path shared by
+        # several actions is ensured once and the others reuse that task
+        node_tasks: Dict[str, asyncio.Task] = {}
+
+        def ensure_nodes(aids: List[str]) -> None:
+            paths = [node_paths[aid] for aid in aids if aid in node_paths]
+            new_paths = list(dict.fromkeys(p for p in paths if normalize_path(p).casefold() not in node_tasks))
+            if not new_paths:
+                return
+            task = asyncio.ensure_future(
+                self._executor.run("jumpserver", lambda: jumpserver_svc.ensure_node_paths(new_paths))
+            )
+            for path in new_paths:
+                node_tasks[normalize_path(path).casefold()] = task
+
+        # 2. NetBox - group resolved once, then concurrent bulk POST/PATCH chunks
+        netbox_outcomes: Dict[str, Dict[str, Any]] = {}
+        try:
+            jobs = []
+            if pending_creates:
+                async def run_creates() -> Dict[str, Dict[str, Any]]:
+                    try:
+                        group = await netbox_svc.get_tenant_group_by_name(self._tenant_group_name())
+                        group_id = group.get("id") if group else None
+                        creates.extend((aid, self._tenant_create_payload(action, group_id)) for aid, action in pending_creates)
+                        return await self._run_bulk(creates, netbox_svc.bulk_create_tenants, ensure_nodes)
+                    except Exception as e:
+                        return {aid: {"object": None, "error": str(e)} for aid, _ in pending_creates}
+                jobs.append(run_creates())
+            if updates:
+                jobs.append(self._run_bulk(updates, netbox_svc.bulk_update_tenants, ensure_nodes))
+            for result in await asyncio.gather(*jobs):
+                netbox_outcomes.update(result)
+
+            # 3. JumpServer - wait for the node tasks started along the way
+            node_results: Dict[str, Dict[str, Any]] = {}
+            distinct_tasks = list({id(t): t for t in node_tasks.values()}.values())
+            for task, result in zip(distinct_tasks, await asyncio.gather(*distinct_tasks, return_exceptions=True)):
+                if isinstance(result, BaseException):
+                    logger.error(f"Falha ao garantir nodes no JumpServer: {result}")
+                    for key, t in node_tasks.items():
+                        if t is task:
+                            node_results[key] = {"id": None, "error": str(result)}
+                else:
+                    for path, value in result.items():
+                        node_results[normalize_path(path).casefold()] = value
+        except asyncio.CancelledError:
+            for task in node_tasks.values():
+                task.cancel()
+            raise
+
+        for aid, outcome in netbox_outcomes.items():
+            error = outcome["error"]
+            if not error and isinstance(outcome["object"], dict) and self._tenant_index is not None:
+                # Write-back so later lookups see the tenant as NetBox saved it
+                self._tenant_index.add(outcome["object"])
+            if error:
+                logger.error(f"Error executing action {aid}: {error}")
+                outcomes[aid] = {"id": aid, "status": "error", "message": error}
+
+        # 4. Results, in the order the actions were approved
+        results = []
+        for aid in dict.fromkeys(action_ids):
+            outcome = outcomes.get(aid)
+            if outcome is None:
+                action = actions_by_id[aid]
+                conflicts = conflicts_by_action.get(aid) or []
+                node_error = None
+                if aid in node_paths:
+                    node_error = (node_results.get(normalize_path(node_paths[aid]).casefold()) or {}).get("error")
+                if conflicts:
+                    outcome = {
+                        "id": aid,
+                        "status": "warning",
+                        "message": f"Sincronizado parcial. Conflito em: {', '.join(conflicts)}",
+                        "client": action["client_name"]
+                    }
+                elif node_error:
+                    outcome = {
+                        "id": aid,
+                        "status": "warning",
+                        "message": f"NetBox sincronizado, mas o node JumpServer falhou: {node_error}",
+                        "client": action["client_name"]
+                    }
+                elif aid in created_by_update:
+                    outcome = {"id": aid, "status": "success", "client": action["client_name"], "message": "Tenant criado no Netbox e node criado no Jumpserver"}
+                else:
+                    outcome = {"id": aid, "status": "success", "client": action["client_name"]}
+                if aid in node_paths and not node_error:
+                    logger.info(f"Node JumpServer criado/verificado: {node_paths[aid]}")
+                self._pending_actions.pop(aid, None)
+                # Force the next incremental report to re-evaluate this company
+                self._company_state.pop(str(action.get("movidesk_id")), None)
+            results.append(outcome)
+
+        async def record_status(outcome: Dict[str, Any]) -> None:
+            # Only finish claims that are still ours (compare-and-set on 'executing')
+            applied = await update_sync_action_status(
+                outcome["id"],
+                outcome["status"],
+                outcome.get("message"),
+                expected_status="executing" if from_store else None,
+            )
+            if from_store and not applied:
+                logger.warning(f"Sync action {outcome['id']} foi retomada por outro worker; status nao gravado.")
+
+        to_record = [outcome for outcome in results if outcome["id"] not in expired]
+        for outcome, result in zip(to_record, await self._executor.map(to_record, record_status)):
+            if isinstance(result, BaseException):
+                logger.warning(f"Falha ao atualizar sync action {outcome['id']}: {result}")
+
         return results
 
 sync_svc = SyncService()
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def tenant_erp_id(tenant: Dict[str, Any]) -> str:
+    cf = tenant.get("custom_fields") or {}
+    # Support both new 'ERP_ID' and old 'movidesk_id' during transition
+    return str(cf.get("ERP_ID") or cf.get("erp_id") or cf.get("movidesk_id") or "")
+
+
+def tenant_cnpj(tenant: Dict[str, Any]) -> str:
+    cf = tenant.get("custom_fields") or {}
+    return str(cf.get("CNPJ") or cf.get("cnpj") or "")
+
+
+def normalize_tenant_name(name: Optional[str]) -> str:
+    return (name or "").upper().strip()
+
+
+class TenantIndex:
+    """
+    In-memory lookup over the NetBox tenants of one tenant group.
+    Answers by id, ERP_ID, CNPJ, exact name and normalized name with dict hits;
+    writes done through the HUB are fed back with add() so the index stays current.
+    Each key keeps every tenant holding it, so removing one still finds the others.
+    """
+
+    def __init__(self, tenants: Optional[Iterable[Dict[str, Any]]] = None, source: str = "netbox"):
+        self.source = source
+        self.loaded_at = time.monotonic()
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        # key -> tenants holding it, in insertion order
+        self._by_erp_id: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_cnpj: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_name: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_normalized_name: Dict[str, List[Dict[str, Any]]] = {}
+        self._keys_by_id: Dict[str, List[tuple]] = {}
+        self._version: Optional[str] = None
+        for tenant in tenants or []:
+            self.add(tenant)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        return time.monotonic() - self.loaded_at <= ttl_seconds
+
+    def tenants(self) -> List[Dict[str, Any]]:
+        return list(self._by_id.values())
+
+    def version(self) -> str:
+        """Content hash of the indexed tenants (id, name, ERP_ID, CNPJ); cached until the next change."""
+        if self._version is None:
+            rows = sorted(
+                [str(tenant_id), tenant.get("name") or "", tenant_erp_id(tenant), tenant_cnpj(tenant)]
+                for tenant_id, tenant in self._by_id.items()
+            )
+            material = json.dumps(rows, ensure_ascii=True)
+            self._version = hashlib.sha1(material.encode("utf-8")).hexdigest()
+        return self._version
+
+    def add(self, tenant: Dict[str, Any]) -> None:
+        self._version = None
+        tenant_id = tenant.get("id")
+        keys: List[tuple] = []
+        # Later tenants win on ERP_ID/CNPJ/normalized name, as in the report mapping;
+        # the first one wins on the exact name
+        erp_id = tenant_erp_id(tenant)
+        if erp_id:
+            keys.append((self._by_erp_id, erp_id))
+        cnpj = tenant_cnpj(tenant)
+        if cnpj:
+            keys.append((self._by_cnpj, cnpj))
+        name = tenant.get("name")
+        if name:
+            keys.append((self._by_normalized_name, normalize_tenant_name(name)))
+            keys.append((self._by_name, name))
+
+        if tenant_id is not None:
+            self.remove(tenant_id)
+            self._by_id[str(tenant_id)] = tenant
+        for mapping, key in keys:
+            mapping.setdefault(key, []).append(tenant)
+        if tenant_id is not None:
+            self._keys_by_id[str(tenant_id)] = keys
+
+    def remove(self, tenant_id: Any) -> Optional[Dict[str, Any]]:
+        self._version = None
+        tenant = self._by_id.pop(str(tenant_id), None)
+        for mapping, key in self._keys_by_id.pop(str(tenant_id), []):
+            holders = [t for t in mapping.get(key, []) if t is not tenant]
+            if holders:
+                mapping[key] = holders
+            else:
+                mapping.pop(key, None)
+        return tenant
+
+    def by_id(self, tenant_id: Any) -> Optional[Dict[str, Any]]:
+        if tenant_id is None:
+            return None
+        return self._by_id.get(str(tenant_id))
+
+    def by_erp_id(self, erp_id: Any) -> Optional[Dict[str, Any]]:
+        return self._last(self._by_erp_id, str(erp_id)) if erp_id else None
+
+    def by_cnpj(self, cnpj: Any) -> Optional[Dict[str, Any]]:
+        return self._last(self._by_cnpj, str(cnpj)) if cnpj else None
+
+    def by_name(self, name: Optional[str]) -> Optional[Dict[str, Any]]:
+        holders = self._by_name.get(name) if name else None
+        return holders[0] if holders else None
+
+    def by_normalized_name(self, name: Optional[str]) -> Optional[Dict[str, Any]]:
+        return self._last(self._by_normalized_name, normalize_tenant_name(name)) if name else None
+
+    @staticmethod
+    def _last(mapping: Dict[str, List[Dict[str, Any]]], key: str) -> Optional[Dict[str, Any]]:
+        holders = mapping.get(key)
+        return holders[-1] if holders else None
@@ -0,0 +1,46 @@
+import asyncio
+
+from backend.core.executor import BoundedExecutor
+
+
+def test_map_keeps_order_and_isolates_failures():
+    executor = BoundedExecutor("test", limit=4)
+
+    async def job(n):
+        await asyncio.sleep(0.001 * (5 - n))
+        if n == 2:
+            raise ValueError("boom")
+        return n * 10
+
+    results = asyncio.run(executor.map(range(5), job))
+
+    assert results[:2] == [0, 10] and results[3:] == [30, 40]
+    assert isinstance(results[2], ValueError)
+
+
+def test_global_and_system_limits_are_enforced():
+    executor = BoundedExecutor("test", limit=3, system_limits={"jumpserver": 1})
+    running = {"all": 0, "jumpserver": 0}
+    peak = {"all": 0, "jumpserver": 0}
+
+    def track(system, delta):
+        for key in ("all", system):
+            if key in running:
+                running[key] += delta
+                peak[key] = max(peak[key], running[key])
+
+    async def job(system):
+        track(system, 1)
+        await asyncio.sleep(0.005)
+        track(system, -1)
+
+    async def main():
+        await asyncio.gather(
+            executor.map(["jumpserver"] * 4, job, system="jumpserver"),
+            executor.map(["netbox"] * 6, job, system="netbox"),
+        )
+
+    asyncio.run(main())
+
+    assert peak["jumpserver"] == 1
+    assert peak["all"] == 3
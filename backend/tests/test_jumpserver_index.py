@@ -0,0 +1,66 @@
+from backend.services.jumpserver_index import NodeIndex, normalize_path
+
+
+def _tree():
+    return NodeIndex([
+        {"id": "root", "full_value": "/DEFAULT"},
+        {"id": "prod", "full_value": "/DEFAULT/PRODUÇÃO"},
+        {"id": "a", "full_value": "/DEFAULT/PRODUÇÃO/Alfa"},
+        {"id": "b", "full_value": "/DEFAULT/PRODUÇÃO/Beta"},
+        {"id": "a1", "full_value": "/DEFAULT/PRODUÇÃO/Alfa/Core"},
+    ])
+
+
+def _children(index):
+    return {parent: sorted(n["id"] for n in nodes) for parent, nodes in index.children.items()}
+
+
+def _move(index, node_id, new_path):
+    node = index.get_by_id(node_id)
+    index.remove(node_id)
+    node["full_value"] = new_path
+    index.add(node)
+
+
+def test_normalize_path_collapses_slashes_and_spaces():
+    assert normalize_path(" //DEFAULT/ PRODUÇÃO //Alfa/ ") == "/DEFAULT/PRODUÇÃO/Alfa"
+
+
+def test_lookup_exact_then_case_insensitive():
+    index = _tree()
+    assert index.lookup("/DEFAULT/PRODUÇÃO/Alfa") == (index.get_by_id("a"), True)
+    assert index.lookup("/default/produção/ALFA") == (index.get_by_id("a"), False)
+    assert index.lookup("/DEFAULT/PRODUÇÃO/Gama") == (None, False)
+
+
+def test_children_follow_a_renamed_parent():
+    index = _tree()
+    _move(index, "a", "/DEFAULT/PRODUÇÃO/Alfa Renomeada")
+    _move(index, "a1", "/DEFAULT/PRODUÇÃO/Alfa Renomeada/Core")
+
+    assert _children(index) == {"root": ["prod"], "prod": ["a", "b"], "a": ["a1"]}
+    assert index.get("/DEFAULT/PRODUÇÃO/Alfa/Core") is None
+
+
+def test_move_to_another_parent_leaves_no_duplicates():
+    index = _tree()
+    _move(index, "a1", "/DEFAULT/PRODUÇÃO/Beta/Core")
+    _move(index, "a1", "/DEFAULT/PRODUÇÃO/Beta/Core")
+
+    assert _children(index) == {"root": ["prod"], "prod": ["a", "b"], "b": ["a1"]}
+
+
+def test_delete_after_parent_moved_drops_child_entry():
+    index = _tree()
+    _move(index, "a", "/DEFAULT/PRODUÇÃO/Outro")
+    index.remove("a1")
+
+    assert _children(index) == {"root": ["prod"], "prod": ["a", "b"]}
+    assert index.get_by_id("a1") is None
+
+
+def test_descendants_and_deepest_existing():
+    index = _tree()
+    assert sorted(n["id"] for n in index.descendants("/default/PRODUÇÃO/alfa")) == ["a", "a1"]
+    node, depth = index.deepest_existing("/DEFAULT/PRODUÇÃO/Alfa/Novo/Leaf")
+    assert (node["id"], depth) == ("a", 3)
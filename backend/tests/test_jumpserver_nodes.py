@@ -0,0 +1,114 @@
+import asyncio
+
+from backend.services.jumpserver_service import JumpServerService
+
+BASE_URL = "http://jumpserver.test"
+
+
+def _tree():
+    return [
+        {"id": "root", "full_value": "/DEFAULT"},
+        {"id": "prod", "full_value": "/DEFAULT/PRODUÇÃO"},
+        {"id": "a", "full_value": "/DEFAULT/PRODUÇÃO/Alfa"},
+    ]
+
+
+def _service(pages):
+    svc = JumpServerService()
+    svc.base_url = BASE_URL
+
+    async def get_page(url, params):
+        return pages()
+
+    svc._get_page = get_page
+    return svc
+
+
+def test_snapshot_writes_run_outside_the_refresh_and_in_order():
+    writes = []
+
+    async def main():
+        gate = asyncio.Event()
+
+        async def replace(nodes):
+            await gate.wait()
+            writes.append(("replace", sorted(n["id"] for n in nodes)))
+
+        async def upsert(nodes):
+            writes.append(("upsert", [n["id"] for n in nodes]))
+
+        async def delete(ids):
+            writes.append(("delete", ids))
+
+        svc = _service(_tree)
+        svc.set_nodes_persister(replace, upsert=upsert, delete=delete)
+
+        nodes = await asyncio.wait_for(svc.get_nodes(), 1)
+        assert len(nodes) == 3 and writes == []
+
+        svc._cache_node({"id": "b", "full_value": "/DEFAULT/PRODUÇÃO/Beta"})
+        svc._uncache_node("a")
+        gate.set()
+        await asyncio.gather(*svc._persist_tasks)
+
+    asyncio.run(main())
+
+    assert writes == [
+        ("replace", ["a", "prod", "root"]),
+        ("upsert", ["b"]),
+        ("delete", ["a"]),
+    ]
+
+
+def test_renamed_node_persists_its_moved_descendants():
+    upserts = []
+
+    async def main():
+        svc = _service(lambda: _tree() + [{"id": "a1", "full_value": "/DEFAULT/PRODUÇÃO/Alfa/Core"}])
+
+        async def upsert(nodes):
+            upserts.extend((n["id"], n["full_value"]) for n in nodes)
+
+        svc.set_nodes_persister(None, upsert=upsert)
+        await svc.get_nodes()
+        svc._cache_node({"id": "a", "full_value": "/DEFAULT/PRODUÇÃO/Alfa Nova"})
+        await asyncio.gather(*svc._persist_tasks)
+
+    asyncio.run(main())
+
+    assert sorted(upserts) == [
+        ("a", "/DEFAULT/PRODUÇÃO/Alfa Nova"),
+        ("a1", "/DEFAULT/PRODUÇÃO/Alfa Nova/Core"),
+    ]
+
+
+def test_changes_made_during_a_refresh_survive_it():
+    async def main():
+        crawl_started = asyncio.Event()
+        finish_crawl = asyncio.Event()
+        stale_tree = _tree() + [{"id": "old", "full_value": "/DEFAULT/PRODUÇÃO/Antigo"}]
+        svc = _service(lambda: stale_tree)
+        await svc.get_nodes()
+
+        async def slow_page(url, params):
+            # The crawl reads the tree before the HUB changes it
+            tree = [dict(n) for n in stale_tree]
+            crawl_started.set()
+            await finish_crawl.wait()
+            return tree
+
+        svc._get_page = slow_page
+        refresh = asyncio.create_task(svc._refresh_nodes())
+        await crawl_started.wait()
+        svc._cache_node({"id": "b", "full_value": "/DEFAULT/PRODUÇÃO/Beta"})
+        svc._uncache_node("old")
+        finish_crawl.set()
+        await refresh
+
+        index = await svc.get_node_index()
+        assert index.get("/DEFAULT/PRODUÇÃO/Beta")["id"] == "b"
+        assert index.get_by_id("old") is None
+        assert sorted(n["id"] for n in svc._nodes_cache) == ["a", "b", "prod", "root"]
+        assert svc._node_journal == []
+
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+import asyncio
+from urllib.parse import parse_qs, urlparse
+
+from backend.services.jumpserver_service import JumpServerService
+
+BASE_URL = "http://jumpserver.test"
+ENDPOINT = f"{BASE_URL}/api/v1/assets/assets/"
+
+
+class CappedServer:
+    """A JumpServer list endpoint that clamps `limit` like MAX_LIMIT_PER_PAGE does."""
+
+    def __init__(self, total, max_limit, first_page_limit=None):
+        self.items = [{"id": i} for i in range(total)]
+        self.max_limit = max_limit
+        self.first_page_limit = first_page_limit
+        self.requests = []
+
+    async def get_page(self, url, params):
+        if params is None:
+            query = parse_qs(urlparse(url).query)
+            params = {key: int(values[0]) for key, values in query.items()}
+        self.requests.append(dict(params))
+        offset = params.get("offset", 0)
+        limit = min(params.get("limit", self.max_limit), self.max_limit)
+        if offset == 0 and self.first_page_limit and len(self.requests) == 1:
+            limit = self.first_page_limit
+        end = offset + limit
+        return {
+            "count": len(self.items),
+            "next": f"{ENDPOINT}?limit={limit}&offset={end}" if end < len(self.items) else None,
+            "results": self.items[offset:end],
+        }
+
+
+def _fetch(server, **kwargs):
+    svc = JumpServerService()
+    svc.base_url = BASE_URL
+    svc._get_page = server.get_page
+    return asyncio.run(svc._fetch_all_pages(ENDPOINT, **kwargs))
+
+
+def test_stride_follows_the_server_page_size():
+    server = CappedServer(total=230, max_limit=50)
+    emitted = []
+
+    async def on_page(page):
+        emitted.extend(item["id"] for item in page)
+
+    items = _fetch(server, on_page=on_page)
+
+    assert [item["id"] for item in items] == list(range(230))
+    assert sorted(emitted) == list(range(230))
+    assert {r["offset"] for r in server.requests[1:]} == {50, 100, 150, 200}
+
+
+def test_pages_that_do_not_add_up_are_reread_through_next_links():
+    # The first page is larger than the ones after it: offset paging would leave gaps
+    server = CappedServer(total=230, max_limit=50, first_page_limit=60)
+
+    items = _fetch(server)
+
+    assert [item["id"] for item in items] == list(range(230))
+
+
+def test_concurrent_asset_crawls_persist_every_page_once():
+    server = CappedServer(total=120, max_limit=50)
+    persisted = []
+
+    async def slow_page(url, params):
+        await asyncio.sleep(0.01)
+        return await server.get_page(url, params)
+
+    async def persist(page):
+        persisted.extend(item["id"] for item in page)
+
+    async def main():
+        svc = JumpServerService()
+        svc.base_url = BASE_URL
+        svc._get_page = slow_page
+        svc.set_assets_persister(persist)
+        return await asyncio.gather(svc.get_assets(), svc.get_assets())
+
+    first, second = asyncio.run(main())
+
+    assert first == second and len(first) == 120
+    assert sorted(persisted) == list(range(120))
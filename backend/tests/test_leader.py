@@ -0,0 +1,159 @@
+import asyncio
+
+from backend.core import leader as leader_module
+from backend.core.leader import LeaderLease
+
+
+class FakeServer:
+    """Advisory locks held per session, like Postgres: a dropped session frees its locks."""
+
+    def __init__(self):
+        self.holders = {}
+        self.sessions = 0
+
+    async def connect(self):
+        self.sessions += 1
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, server):
+        self.server = server
+        self.alive = True
+        self.broken = False
+
+    async def fetchval(self, query, *args):
+        if not self.alive or self.broken:
+            raise ConnectionError("sessao encerrada")
+        if "pg_try_advisory_lock" in query:
+            holder = self.server.holders.setdefault(args[0], self)
+            return holder is self
+        if "pg_advisory_unlock" in query:
+            return self.server.holders.pop(args[0], None) is self
+        return 1
+
+    def _end(self):
+        if self.alive:
+            self.alive = False
+            self.server.sessions -= 1
+            for key, holder in list(self.server.holders.items()):
+                if holder is self:
+                    del self.server.holders[key]
+
+    async def close(self):
+        self._end()
+
+    def terminate(self):
+        self._end()
+
+
+def _leases(monkeypatch, count=2):
+    server = FakeServer()
+    monkeypatch.setattr(leader_module, "open_connection", server.connect)
+    return server, [LeaderLease("test:scheduler", renew_interval=0.01, retry_interval=0.01) for _ in range(count)]
+
+
+async def _run_for(leases, seconds):
+    tasks = [asyncio.create_task(lease.run()) for lease in leases]
+    await asyncio.sleep(seconds)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_only_one_replica_leads_and_followers_hold_no_session(monkeypatch):
+    server, (first, second) = _leases(monkeypatch)
+
+    async def main():
+        await _run_for([first, second], 0.05)
+
+    asyncio.run(main())
+
+    assert [first.is_leader, second.is_leader].count(True) == 1
+    assert server.sessions == 1
+
+
+def test_follower_takes_over_after_release_and_after_a_lost_session(monkeypatch):
+    server, (first, second) = _leases(monkeypatch)
+
+    async def main():
+        assert await first._try_acquire() and not await second._try_acquire()
+        first._set_leader(True)
+
+        await first.release()
+        assert await second._try_acquire()
+        second._set_leader(True)
+
+        # The leader's session breaks: renewal fails, the session is cut and the lock freed
+        second._conn.broken = True
+        await _run_for([second, first], 0.05)
+
+    asyncio.run(main())
+
+    assert first.is_leader and not second.is_leader
+    assert server.sessions == 1
+
+
+def test_without_a_database_the_process_leads_alone(monkeypatch):
+    async def no_database():
+        return None
+
+    monkeypatch.setattr(leader_module, "open_connection", no_database)
+    lease = LeaderLease("test:scheduler")
+
+    assert asyncio.run(lease._try_acquire()) is True
+    assert lease.standalone
+
+
+def test_follower_status_never_scans(monkeypatch):
+    from backend import main
+
+    async def nothing_stored():
+        return None
+
+    async def scan(**_kwargs):
+        raise AssertionError("seguidor nao deve varrer")
+
+    monkeypatch.setattr(main.scheduler_lease, "is_leader", False)
+    monkeypatch.setattr(main.sync_svc, "load_stored_report_summary", nothing_stored)
+    monkeypatch.setattr(main.sync_svc, "generate_sync_report", scan)
+    monkeypatch.setattr(main, "load_movidesk_application", nothing_stored)
+
+    status = asyncio.run(main.get_movidesk_sync_status())
+
+    assert status["leader_pending"] is True
+    assert status["last_run"] is None
+
+
+def test_losing_the_lease_cancels_the_running_pass(monkeypatch):
+    from backend import main
+
+    lease = LeaderLease("test:scheduler", enabled=False)
+    monkeypatch.setattr(main, "scheduler_lease", lease)
+    outcome = {}
+
+    async def endless_pass(full):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            outcome["cancelled"] = True
+            raise
+
+    async def quick():
+        return "ok"
+
+    async def scenario():
+        lease._set_leader(True)
+        assert await lease.run_as_leader(quick()) == "ok"
+
+        monkeypatch.setattr(main.netbox_snapshot_sync, "_run", endless_pass)
+        running = asyncio.create_task(lease.run_as_leader(main.run_netbox_snapshot_pass()))
+        await asyncio.sleep(0.01)
+        lease._set_leader(False)
+        outcome["result"] = await asyncio.wait_for(running, 1)
+        # The shared (shielded) pass itself stopped, not just this caller's wait
+        outcome["inflight"] = main.netbox_snapshot_sync._flight.inflight()
+
+    asyncio.run(scenario())
+
+    assert outcome == {"cancelled": True, "result": None, "inflight": 0}
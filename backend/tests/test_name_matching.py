@@ -0,0 +1,91 @@
+from backend.services.name_matcher import NameMatcher, numeric_tokens
+from backend.services.name_normalizer import normalize
+from backend.services.sync_service import SyncService
+from backend.services.tenant_index import TenantIndex
+
+
+def _tenant(tenant_id, name, erp_id=None):
+    custom_fields = {"ERP_ID": erp_id} if erp_id else {}
+    return {"id": tenant_id, "name": name, "custom_fields": custom_fields}
+
+
+def _match(company_name, tenants, movidesk_id="900"):
+    svc = SyncService()
+    index = TenantIndex(tenants)
+    matcher = svc._build_name_matcher(tenants)
+    company = {"id": movidesk_id, "businessName": company_name, "cpfCnpj": None}
+    return svc._match_company(company, index, set(), matcher)
+
+
+def test_normalize_folds_accents_and_strips_legal_suffixes():
+    assert normalize("Fibra Telecomunicações Ltda") == ("FIBRA",)
+    assert normalize("  Produção   S/A ") == ("PRODUCAO",)
+    assert normalize("ACME S.A.") == normalize("acme sa") == ("ACME",)
+
+
+def test_numeric_tokens():
+    assert numeric_tokens(("CLIENTE", "02", "NET2")) == {"02", "NET2"}
+
+
+def test_rank_orders_by_score_and_reports_token_score():
+    matcher = NameMatcher(
+        [(1, "Provedor Rapido Net"), (2, "Provedor Lento"), (3, "Outra Coisa")],
+        normalize,
+    )
+    ranked = matcher.rank(["Provedor Rapid Net"], limit=3)
+
+    assert [hit["value"] for hit in ranked][:2] == [1, 2]
+    assert ranked[0]["score"] > 0.9
+    assert ranked[0]["token_score"] < ranked[0]["score"]
+
+
+def test_candidate_set_is_capped():
+    entries = [(i, f"Internet Fibra {i:05d}") for i in range(10000)]
+    matcher = NameMatcher(entries, normalize, max_block_size=200, max_candidates=50)
+
+    # Every key of this query is shared by 10k entries: nothing selective, nothing scored
+    assert matcher._candidates(normalize("Internet Fibra")) == []
+    # A rare token keeps the exact hit within the cap
+    candidates = matcher._candidates(normalize("Internet Fibra 04242"))
+    assert len(candidates) <= 50
+    assert matcher.rank(["Internet Fibra 04242"], limit=1)[0]["value"] == 4242
+
+
+def test_fuzzy_does_not_adopt_a_tenant_with_other_numbers():
+    for company, tenant in (
+        ("CLIENTE 02", "CLIENTE 01"),
+        ("ALFA INTERNET 3", "ALFA INTERNET 2"),
+        ("ALFA INTERNET", "ALFA INTERNET 2"),
+    ):
+        action = _match(company, [_tenant(10, tenant)])
+        assert action["type"] == "sync_client", company
+        assert [c["netbox_id"] for c in action["candidates"]] == [10]
+
+
+def test_fuzzy_does_not_adopt_on_character_similarity_alone():
+    action = _match("Provedor Rapid Net", [_tenant(10, "Provedor Rapido Net")])
+
+    assert action["type"] == "sync_client"
+    assert action["candidates"][0]["netbox_id"] == 10
+
+
+def test_fuzzy_skips_tenants_linked_to_another_company():
+    action = _match("Rede Norte Fibra", [_tenant(10, "Fibra Rede Norte", erp_id="123")], movidesk_id="900")
+
+    assert action["type"] == "sync_client"
+    assert "candidates" not in action
+
+
+def test_fuzzy_adopts_an_unambiguous_token_match():
+    action = _match("Rede Norte Fibra", [_tenant(10, "Fibra Rede Norte"), _tenant(11, "Sul Cabo")])
+
+    assert action["type"] == "update_client"
+    assert action["netbox_id"] == 10
+
+
+def test_fuzzy_does_not_adopt_when_two_tenants_qualify():
+    tenants = [_tenant(10, "Fibra Rede Norte"), _tenant(11, "Norte Rede Fibra")]
+    action = _match("Rede Norte Fibra", tenants)
+
+    assert action["type"] == "sync_client"
+    assert {c["netbox_id"] for c in action["candidates"]} == {10, 11}
@@ -0,0 +1,62 @@
+import asyncio
+
+from backend.services import netbox_service as netbox_module
+from backend.services.netbox_service import NetBoxService
+
+
+class ClampingNetBox:
+    """REST and GraphQL list endpoints that clamp `limit` like NetBox's MAX_PAGE_SIZE."""
+
+    def __init__(self, total, max_page_size, first_page_size=None):
+        self.objects = [{"id": i, "name": f"obj-{i}"} for i in range(total)]
+        self.max_page_size = max_page_size
+        self.first_page_size = first_page_size
+        self.calls = 0
+
+    def _slice(self, offset, limit):
+        self.calls += 1
+        limit = min(limit, self.max_page_size)
+        if offset == 0 and self.first_page_size and self.calls == 1:
+            limit = self.first_page_size
+        return self.objects[offset:offset + limit]
+
+    async def get_json(self, path, params=None):
+        params = params or {}
+        return {"count": len(self.objects), "results": self._slice(params.get("offset", 0), params["limit"])}
+
+    async def graphql(self, query, variables=None):
+        return {"device_list": self._slice(variables["offset"], variables["limit"])}
+
+
+def _service(server, monkeypatch):
+    svc = NetBoxService()
+    svc._get_json = server.get_json
+    svc._graphql = server.graphql
+    monkeypatch.setattr(netbox_module.settings, "NETBOX_PAGE_SIZE", 500)
+    monkeypatch.setattr(netbox_module.settings, "NETBOX_GRAPHQL_PAGE_SIZE", 500)
+    return svc
+
+
+def test_list_follows_the_clamped_page_size(monkeypatch):
+    svc = _service(ClampingNetBox(total=1234, max_page_size=100), monkeypatch)
+
+    tenants = asyncio.run(svc._list("tenancy/tenants/"))
+
+    assert [t["id"] for t in tenants] == list(range(1234))
+
+
+def test_list_rereads_when_pages_do_not_add_up(monkeypatch):
+    svc = _service(ClampingNetBox(total=1234, max_page_size=100, first_page_size=150), monkeypatch)
+
+    tenants = asyncio.run(svc._list("tenancy/tenants/"))
+
+    assert [t["id"] for t in tenants] == list(range(1234))
+
+
+def test_graphql_devices_follow_the_clamped_page_size(monkeypatch):
+    svc = _service(ClampingNetBox(total=777, max_page_size=100), monkeypatch)
+    svc.base_url = "http://netbox.test/api"
+
+    devices = asyncio.run(svc.get_devices_graphql())
+
+    assert [d["netboxId"] for d in devices] == list(range(777))
@@ -0,0 +1,73 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+from backend.services import snapshot_store
+
+
+class FakeConnection:
+    def __init__(self, state, tenants):
+        self.state = state
+        self.tenants = tenants
+
+    async def fetchrow(self, query, *args):
+        assert '"NetboxSyncState"' in query and args == (snapshot_store.NETBOX_SNAPSHOT_STATE_KEY,)
+        return self.state
+
+    async def fetchval(self, query, *args):
+        return bool(self.tenants)
+
+    async def fetch(self, query, *args):
+        return self.tenants
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def acquire(self):
+        pool = self
+
+        class _Acquire:
+            async def __aenter__(self):
+                return pool.conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Acquire()
+
+
+def _load(monkeypatch, last_success_ago, ttl=600):
+    now = datetime.now(timezone.utc)
+    state = {
+        "metadata": json.dumps({"fullSyncCompleted": True}),
+        "lastSuccessAt": now - timedelta(seconds=last_success_ago),
+    }
+    # A quiet tenant set: nothing was touched by the recent incremental passes
+    tenants = [{
+        "netboxId": 1,
+        "name": "Cliente",
+        "groupName": "Clientes",
+        "erpId": "10",
+        "cnpj": None,
+        "rawData": None,
+        "lastSeenAt": now - timedelta(days=30),
+    }]
+
+    async def get_pool():
+        return FakePool(FakeConnection(state, tenants))
+
+    monkeypatch.setattr(snapshot_store, "get_pool", get_pool)
+    return asyncio.run(snapshot_store.load_netbox_snapshot_tenants("Clientes", ttl))
+
+
+def test_tenant_snapshot_freshness_follows_the_last_successful_pass(monkeypatch):
+    tenants = _load(monkeypatch, last_success_ago=60)
+
+    assert [t["id"] for t in tenants] == [1]
+    assert tenants[0]["custom_fields"] == {"ERP_ID": "10"}
+
+
+def test_tenant_snapshot_is_stale_when_sync_stopped(monkeypatch):
+    assert _load(monkeypatch, last_success_ago=3600) is None
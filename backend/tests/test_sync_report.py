@@ -0,0 +1,215 @@
+import asyncio
+import json
+
+import pytest
+
+from backend.services import sync_service as sync_module
+from backend.services.jumpserver_index import NodeIndex
+from backend.services.name_matcher import NameMatcher
+from backend.services.snapshot_store import SYNC_ACTION_CLAIMABLE_STATUSES
+from backend.services.sync_service import SyncService
+
+
+class FakeActionStore:
+    """In-memory stand-in for the MovideskSyncAction helpers of snapshot_store."""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def upsert(self, actions):
+        for action in actions:
+            row = self.rows.get(action["id"])
+            if row and row["status"] == "executing":
+                continue
+            self.rows[action["id"]] = {"status": action["status"], "payload": json.dumps(action)}
+
+    async def update_status(self, action_id, status, message=None, expected_status=None):
+        row = self.rows.get(action_id)
+        if isinstance(expected_status, str):
+            expected_status = [expected_status]
+        if not row or (expected_status is not None and row["status"] not in expected_status):
+            return False
+        row["status"] = status
+        return True
+
+    async def supersede(self, keep_ids):
+        keep = set(keep_ids)
+        for action_id, row in self.rows.items():
+            if row["status"] in SYNC_ACTION_CLAIMABLE_STATUSES and action_id not in keep:
+                row["status"] = "superseded"
+            elif row["status"] == "superseded" and action_id in keep:
+                row["status"] = json.loads(row["payload"])["status"]
+        return 0
+
+    def statuses(self):
+        return {action_id: row["status"] for action_id, row in self.rows.items()}
+
+
+class Sources:
+    def __init__(self):
+        self.companies = []
+        self.tenants = []
+        self.nodes = []
+        self.movidesk_error = None
+        self.jumpserver_error = None
+
+    async def movidesk(self):
+        if self.movidesk_error:
+            raise self.movidesk_error
+        return list(self.companies)
+
+    async def tenants_of_group(self, **_filters):
+        return list(self.tenants)
+
+    async def node_index(self):
+        if self.jumpserver_error:
+            raise self.jumpserver_error
+        return NodeIndex(self.nodes)
+
+
+async def _noop(*_args, **_kwargs):
+    return None
+
+
+@pytest.fixture
+def env(monkeypatch):
+    store = FakeActionStore()
+    sources = Sources()
+    monkeypatch.setattr(sync_module, "upsert_sync_actions", store.upsert)
+    monkeypatch.setattr(sync_module, "update_sync_action_status", store.update_status)
+    monkeypatch.setattr(sync_module, "supersede_sync_actions", store.supersede)
+    monkeypatch.setattr(sync_module, "save_hub_state", _noop)
+    monkeypatch.setattr(sync_module, "upsert_movidesk_companies", _noop)
+    monkeypatch.setattr(sync_module.movidesk_svc, "fetch_active_companies", sources.movidesk)
+    monkeypatch.setattr(sync_module.netbox_svc, "get_tenants", sources.tenants_of_group)
+    monkeypatch.setattr(sync_module.jumpserver_svc, "get_node_index", sources.node_index)
+    monkeypatch.setattr(sync_module.settings, "SYNC_REPORT_INCREMENTAL", True)
+    return store, sources
+
+
+def _companies(count):
+    return [{"id": str(i), "businessName": f"Cliente Exemplo {i}", "cpfCnpj": None} for i in range(1, count + 1)]
+
+
+def _report(svc, **kwargs):
+    return asyncio.run(svc.generate_sync_report(**kwargs))
+
+
+def test_movidesk_outage_leaves_stored_state_untouched(env):
+    store, sources = env
+    svc = SyncService()
+    sources.companies = _companies(5)
+    first = _report(svc)
+    before = store.statuses()
+    assert sorted(before.values()) == ["pending_create"] * 5
+
+    sources.movidesk_error = RuntimeError("Movidesk fora do ar")
+    with pytest.raises(RuntimeError):
+        _report(svc)
+    assert store.statuses() == before
+
+    sources.movidesk_error = None
+    third = _report(svc)
+    assert [a["id"] for a in third] == [a["id"] for a in first]
+    assert svc.get_last_report_summary()["last_delta"] == {"added": 0, "changed": 0, "resolved": 0}
+
+
+def test_empty_movidesk_answer_is_a_failed_report(env):
+    store, sources = env
+    svc = SyncService()
+    sources.companies = _companies(2)
+    _report(svc)
+    before = store.statuses()
+
+    sources.companies = []
+    with pytest.raises(RuntimeError):
+        _report(svc)
+    assert store.statuses() == before
+
+
+def test_resolved_only_overwrites_approvable_rows(env):
+    store, sources = env
+    svc = SyncService()
+    sources.companies = _companies(2)
+    first = {a["movidesk_id"]: a["id"] for a in _report(svc)}
+    store.rows[first["1"]]["status"] = "executing"
+
+    # Both companies now have their tenant, linked by ERP_ID, and their node
+    sources.tenants = [
+        {"id": 10 + i, "name": f"Cliente Exemplo {i}", "custom_fields": {"ERP_ID": str(i)}} for i in (1, 2)
+    ]
+    sources.nodes = [{"id": "prod", "full_value": "/DEFAULT/PRODUÇÃO"}] + [
+        {"id": f"n{i}", "full_value": f"/DEFAULT/PRODUÇÃO/Cliente Exemplo {i}"} for i in (1, 2)
+    ]
+    _report(svc)
+
+    assert store.rows[first["1"]]["status"] == "executing"
+    assert store.rows[first["2"]]["status"] == "resolved"
+
+
+def test_jumpserver_outage_does_not_persist_or_resolve(env):
+    store, sources = env
+    svc = SyncService()
+    sources.companies = _companies(2)
+    first = _report(svc)
+    before = store.statuses()
+
+    sources.jumpserver_error = RuntimeError("JumpServer fora do ar")
+    sources.companies = _companies(3)
+    report = _report(svc)
+
+    assert len(report) == 3
+    assert store.statuses() == before
+    assert svc.get_last_report_summary()["stored"] is False
+    assert set(svc._pending_actions) == {a["id"] for a in first}
+
+
+def test_quiet_cycle_does_not_rank(env, monkeypatch):
+    store, sources = env
+    svc = SyncService()
+    sources.companies = _companies(3)
+    sources.tenants = [{"id": 50, "name": "Outro Provedor", "custom_fields": {}}]
+    calls = []
+    original_rank = NameMatcher.rank
+
+    def counting_rank(self, names, *args, **kwargs):
+        calls.append(list(names))
+        return original_rank(self, names, *args, **kwargs)
+
+    monkeypatch.setattr(NameMatcher, "rank", counting_rank)
+    _report(svc)
+    assert len(calls) == 3
+
+    calls.clear()
+    _report(svc)
+    assert calls == []
+
+    # A tenant change can affect any fuzzy match, so unmatched companies are re-ranked
+    sources.tenants.append({"id": 51, "name": "Cliente Exemplo 9", "custom_fields": {}})
+    _report(svc)
+    assert len(calls) == 3
+
+
+def test_action_ids_are_stable_across_reports_and_workers(env):
+    store, sources = env
+    sources.companies = _companies(3)
+    first = _report(SyncService())
+    again = _report(SyncService(), full=True)
+
+    assert [a["id"] for a in again] == [a["id"] for a in first]
+    assert set(store.statuses().values()) == {"pending_create"}
+
+
+def test_a_different_proposal_gets_a_new_id_and_retires_the_old_one(env):
+    store, sources = env
+    svc = SyncService()
+    sources.companies = _companies(2)
+    first = {a["movidesk_id"]: a["id"] for a in _report(svc)}
+
+    sources.nodes = [{"id": "n1", "full_value": "/DEFAULT/PRODUÇÃO/Cliente Exemplo 1"}]
+    second = {a["movidesk_id"]: a["id"] for a in _report(svc)}
+
+    assert second["2"] == first["2"]
+    assert second["1"] != first["1"]
+    assert store.rows[first["1"]]["status"] == "superseded"
+    assert store.rows[second["1"]]["status"] == "pending_create"
@@ -0,0 +1,37 @@
+from backend.services.tenant_index import TenantIndex
+
+
+def _tenant(tenant_id, name, erp_id=None, cnpj=None):
+    custom_fields = {}
+    if erp_id:
+        custom_fields["ERP_ID"] = erp_id
+    if cnpj:
+        custom_fields["CNPJ"] = cnpj
+    return {"id": tenant_id, "name": name, "custom_fields": custom_fields}
+
+
+def test_removing_the_current_holder_falls_back_to_the_other_tenant():
+    index = TenantIndex([
+        _tenant(1, "Alfa Net", erp_id="10", cnpj="123"),
+        _tenant(2, "ALFA NET ", erp_id="10", cnpj="123"),
+    ])
+    assert index.by_erp_id("10")["id"] == 2
+
+    index.remove(2)
+
+    assert index.by_erp_id("10")["id"] == 1
+    assert index.by_cnpj("123")["id"] == 1
+    assert index.by_normalized_name("alfa net")["id"] == 1
+    assert index.by_name("ALFA NET ") is None
+
+
+def test_exact_name_keeps_the_first_tenant_and_updates_move_keys():
+    index = TenantIndex([_tenant(1, "Beta", erp_id="20"), _tenant(2, "Beta")])
+    assert index.by_name("Beta")["id"] == 1
+
+    index.add(_tenant(1, "Beta Renomeada", erp_id="21"))
+
+    assert index.by_name("Beta")["id"] == 2
+    assert index.by_erp_id("20") is None
+    assert index.by_erp_id("21")["id"] == 1
+    assert len(index) == 2
@@ -0,0 +1,21 @@
+-- CreateTable
+CREATE TABLE "JumpserverNodeSnapshot" (
+    "id" SERIAL NOT NULL,
+    "jumpserverId" TEXT NOT NULL,
+    "key" TEXT,
+    "value" TEXT,
+    "fullValue" TEXT,
+    "orgId" TEXT,
+    "rawData" TEXT,
+    "lastSeenAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "JumpserverNodeSnapshot_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "JumpserverNodeSnapshot_jumpserverId_key" ON "JumpserverNodeSnapshot"("jumpserverId");
+
+-- CreateIndex
+CREATE INDEX "JumpserverNodeSnapshot_fullValue_idx" ON "JumpserverNodeSnapshot"("fullValue");
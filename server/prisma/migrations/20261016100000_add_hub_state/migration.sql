@@ -0,0 +1,8 @@
+-- CreateTable
+CREATE TABLE "HubState" (
+    "key" TEXT NOT NULL,
+    "value" TEXT NOT NULL,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "HubState_pkey" PRIMARY KEY ("key")
+);